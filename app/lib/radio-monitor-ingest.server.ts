@@ -0,0 +1,441 @@
+/**
+ * Radio Monitor — Ingestão dos dados enviados pela VM
+ *
+ * Usado pelos endpoints api.radio-monitor-event, api.radio-monitor-song,
+ * api.radio-monitor-batch (o outbox da VM envia vários itens por requisição)
+ * api.radio-monitor-health (saúde das estações) e api.radio-monitor-nodes
+ * (lease das VMs que dividem as estações entre si).
+ */
+
+import { and, eq, gt, isNull, lt, sql } from "drizzle-orm";
+import { db } from "./db.server";
+import { radioMonitorEvents, radioMonitorNodes, radioMonitorSongs, radioStationHealth } from "../../drizzle/schema/radio-monitor";
+import { uploadFile } from "./storage.server";
+
+export type RadioMonitorEventInput = {
+  stationId: string;
+  stationName: string;
+  transcriptionText: string;
+  detectedKeywords: string[];
+  confidence: number;
+  detectedAt: string;
+  audioSnippet?: string; // base64 — recorte de ~10s antes/depois da keyword
+  audioMimeType?: string;
+  backfill?: boolean; // replay de áudio gravado (monitor.py --replay): salva sem notificar
+  eventKey?: string; // id do evento na VM (cooldown): reenvio e atualização caem na mesma linha
+  occurrences?: number; // > 1 = atualização do evento com as repetições agrupadas das `detectedKeywords`
+  lastDetectedAt?: string;
+};
+
+export type RadioMonitorSongInput = {
+  stationId: string;
+  title: string;
+  artist: string;
+  album?: string;
+  releaseYear?: number;
+  confidence?: number;
+  detectedAt?: string;
+  songKey?: string; // id da música na VM: reenvio do outbox não duplica
+};
+
+export type RadioStationHealthInput = {
+  stationId: string;
+  status: string;
+  consecutiveFailures?: number;
+  totalFailures?: number;
+  bytesReceived?: number;
+  keywordHits?: number;
+  lastSuccessAt?: string | null;
+  lastFailureAt?: string | null;
+  lastError?: string | null;
+  circuitOpenUntil?: string | null;
+  nodeId?: string | null; // VM que monitora a estação (sharding)
+};
+
+export type RadioMonitorNodeInput = {
+  nodeId: string;
+  role?: string; // "monitor" (padrão) ou "musicas"
+  leaseS?: number;
+  weight?: number;
+  ownedStations?: number;
+  release?: boolean; // encerramento normal: libera o lease na hora
+};
+
+export type RadioMonitorNode = { nodeId: string; weight: number };
+
+export type IngestResult = { ok: true } | { ok: false; error: string };
+
+export type RadioMonitorBatch = { events: RadioMonitorEventInput[]; songs: RadioMonitorSongInput[] };
+
+export type RadioMonitorBatchReport = { rejected: number[]; failed: number[] };
+
+export const RADIO_MONITOR_BATCH_MAX_ITEMS = 200;
+
+/**
+ * Valida a API key do script da VM (header x-radio-monitor-key).
+ */
+export function isRadioMonitorAuthorized(request: Request): boolean {
+  const apiKey = request.headers.get("x-radio-monitor-key");
+  const expected = process.env.RADIO_MONITOR_SECRET;
+  return Boolean(expected) && apiKey === expected;
+}
+
+export type RadioMonitorEventPlan =
+  | { kind: "invalid"; error: string }
+  | { kind: "update"; row: typeof radioMonitorEvents.$inferInsert } // repetições agrupadas (cooldown)
+  | { kind: "event"; row: typeof radioMonitorEvents.$inferInsert; notify: boolean };
+
+/**
+ * Decide o que fazer com um evento da VM: rejeitar, somar as repetições do
+ * cooldown na linha do `eventKey` (`occurrences` > 1) ou gravar um evento
+ * novo — que notifica, exceto no `backfill` (replay de áudio gravado).
+ */
+export function planRadioMonitorEvent(body: RadioMonitorEventInput): RadioMonitorEventPlan {
+  const {
+    stationId,
+    transcriptionText,
+    detectedKeywords,
+    confidence,
+    detectedAt,
+    backfill,
+    eventKey,
+    occurrences,
+    lastDetectedAt,
+  } = body ?? ({} as RadioMonitorEventInput);
+
+  if (!stationId || !transcriptionText || !detectedKeywords?.length) {
+    return { kind: "invalid", error: "Missing required fields" };
+  }
+
+  const recordedAt = detectedAt ? new Date(detectedAt) : new Date();
+  const row = {
+    stationId,
+    transcriptionText,
+    detectedPromotionKeywords: JSON.stringify(detectedKeywords),
+    confidence: String(confidence),
+    isPromotion: confidence >= 50,
+    recordedAt,
+    eventKey: eventKey ?? null,
+  };
+
+  if (eventKey && (occurrences ?? 1) > 1) {
+    return {
+      kind: "update",
+      row: {
+        ...row,
+        occurrences,
+        keywordOccurrences: Object.fromEntries(detectedKeywords.map((k) => [k, occurrences])),
+        lastDetectedAt: lastDetectedAt ? new Date(lastDetectedAt) : recordedAt,
+      },
+    };
+  }
+  return { kind: "event", row, notify: !backfill };
+}
+
+/**
+ * Mensagem do Telegram (Markdown) para um evento novo.
+ */
+export function formatRadioMonitorEventMessage(body: RadioMonitorEventInput): string {
+  const { stationName, transcriptionText, detectedKeywords, confidence, detectedAt } = body;
+  const dt = detectedAt
+    ? new Date(detectedAt).toLocaleString("pt-BR", { timeZone: "America/Sao_Paulo" })
+    : new Date().toLocaleString("pt-BR", { timeZone: "America/Sao_Paulo" });
+
+  const kws = detectedKeywords.map((k: string) => "`" + k + "`").join(", ");
+  const snippet = transcriptionText.slice(0, 400).replace(/[_*[\]()~`>#+=|{}.!-]/g, "\\$&");
+
+  const lines = [
+    "\u{1F4FB} *PALAVRA-CHAVE DETECTADA NO R\u00C1DIO*",
+    "",
+    "\u{1F399}\uFE0F Esta\u00E7\u00E3o: *" + stationName + "*",
+    "\uD83D\uDD11 Keywords: " + kws,
+    "\u23F0 Hor\u00E1rio: *" + dt + "*",
+    "\uD83D\uDCCA Confian\u00E7a: " + confidence + "%",
+    "",
+    "Transcri\u00E7\u00E3o:",
+    "_" + snippet + "_",
+  ];
+
+  return lines.join("\n");
+}
+
+/**
+ * Salva um evento de keyword e notifica via Telegram (openclaw bot).
+ * Eventos com `backfill` (replay de áudio gravado) não notificam.
+ * Com `eventKey`, o evento é idempotente: o reenvio não duplica e a
+ * atualização do cooldown (`occurrences` > 1) só soma as repetições na
+ * linha do evento, sem notificar. Cada keyword do evento fecha a própria
+ * janela na VM e manda a própria atualização, então a contagem é guardada
+ * por keyword (`keywordOccurrences`); `occurrences` fica com a maior delas.
+ * A notificação é marcada em `notifiedAt` e sai uma vez só, mesmo que a
+ * atualização chegue antes do evento.
+ */
+export async function ingestRadioMonitorEvent(body: RadioMonitorEventInput): Promise<IngestResult> {
+  const plan = planRadioMonitorEvent(body);
+  if (plan.kind === "invalid") {
+    return { ok: false, error: plan.error };
+  }
+
+  // Atualização do cooldown: repetições agrupadas num evento já enviado
+  if (plan.kind === "update") {
+    await db
+      .insert(radioMonitorEvents)
+      .values(plan.row)
+      .onConflictDoUpdate({
+        target: radioMonitorEvents.eventKey,
+        set: {
+          occurrences: sql`greatest(${radioMonitorEvents.occurrences}, ${plan.row.occurrences})`,
+          keywordOccurrences: sql`coalesce(${radioMonitorEvents.keywordOccurrences}, '{}'::jsonb) || ${JSON.stringify(plan.row.keywordOccurrences)}::jsonb`,
+          lastDetectedAt: sql`greatest(${radioMonitorEvents.lastDetectedAt}, ${plan.row.lastDetectedAt})`,
+        },
+      });
+    return { ok: true };
+  }
+
+  // Sobe o recorte de áudio (se veio) — falha no upload não impede o evento
+  let audioUrl: string | null = null;
+  if (body.audioSnippet) {
+    try {
+      const type = body.audioMimeType === "audio/wav" ? "audio/wav" : "audio/mpeg";
+      const ext = type === "audio/wav" ? "wav" : "mp3";
+      const file = new File([Buffer.from(body.audioSnippet, "base64")], `${body.stationId}.${ext}`, { type });
+      audioUrl = (await uploadFile(file, "radio-monitor")).url;
+    } catch (err) {
+      console.error("[RadioMonitor API] Audio snippet upload failed:", err);
+    }
+  }
+
+  // Salva evento no banco. Reenvio do mesmo eventKey não duplica; se a
+  // atualização do cooldown chegou antes e criou a linha, o evento completa
+  // as keywords e o áudio dela
+  const [saved] = await db
+    .insert(radioMonitorEvents)
+    .values({ ...plan.row, audioUrl })
+    .onConflictDoUpdate({
+      target: radioMonitorEvents.eventKey,
+      set: {
+        detectedPromotionKeywords: plan.row.detectedPromotionKeywords,
+        audioUrl: sql`coalesce(${radioMonitorEvents.audioUrl}, ${audioUrl})`,
+      },
+    })
+    .returning({ id: radioMonitorEvents.id });
+
+  // Notifica via Telegram (openclaw bot) — exceto eventos antigos do replay
+  const botToken = process.env.OPENCLAW_TELEGRAM_TOKEN;
+  const chatId = process.env.OPENCLAW_CHAT_ID;
+
+  if (botToken && chatId && plan.notify) {
+    // Uma notificação por evento, mesmo com reenvios concorrentes
+    const claimed = await db
+      .update(radioMonitorEvents)
+      .set({ notifiedAt: new Date() })
+      .where(and(eq(radioMonitorEvents.id, saved.id), isNull(radioMonitorEvents.notifiedAt)))
+      .returning({ id: radioMonitorEvents.id });
+    if (!claimed.length) {
+      return { ok: true };
+    }
+
+    try {
+      await fetch("https://api.telegram.org/bot" + botToken + "/sendMessage", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ chat_id: chatId, text: formatRadioMonitorEventMessage(body), parse_mode: "Markdown" }),
+      });
+    } catch (err) {
+      console.error("[RadioMonitor API] Telegram notification failed:", err);
+    }
+  }
+
+  return { ok: true };
+}
+
+/**
+ * Salva uma música identificada pelo ACRCloud. Com `songKey`, o reenvio
+ * (ex.: lote que estourou o timeout na VM mas foi gravado) não duplica.
+ */
+export async function ingestRadioMonitorSong(body: RadioMonitorSongInput): Promise<IngestResult> {
+  const { stationId, title, artist, album, releaseYear, confidence, detectedAt, songKey } =
+    body ?? ({} as RadioMonitorSongInput);
+
+  if (!stationId || !title || !artist) {
+    return { ok: false, error: "Missing required fields: stationId, title, artist" };
+  }
+
+  await db
+    .insert(radioMonitorSongs)
+    .values({
+      stationId,
+      title,
+      artist,
+      album: album ?? null,
+      releaseYear: releaseYear ?? null,
+      confidence: confidence != null ? String(confidence) : null,
+      songKey: songKey ?? null,
+      detectedAt: detectedAt ? new Date(detectedAt) : new Date(),
+    })
+    .onConflictDoNothing({ target: radioMonitorSongs.songKey });
+
+  return { ok: true };
+}
+
+/**
+ * Separa o lote do outbox da VM em eventos e músicas (lista ausente = vazia).
+ * Lote acima de RADIO_MONITOR_BATCH_MAX_ITEMS é recusado inteiro.
+ */
+export function parseRadioMonitorBatch(
+  body: unknown
+): { ok: true; batch: RadioMonitorBatch } | { ok: false; error: string } {
+  const { events, songs } = (body ?? {}) as Partial<RadioMonitorBatch>;
+  const batch = {
+    events: Array.isArray(events) ? events : [],
+    songs: Array.isArray(songs) ? songs : [],
+  };
+  if (batch.events.length + batch.songs.length > RADIO_MONITOR_BATCH_MAX_ITEMS) {
+    return { ok: false, error: `Batch too large (max ${RADIO_MONITOR_BATCH_MAX_ITEMS} items)` };
+  }
+  return { ok: true, batch };
+}
+
+/**
+ * Processa os itens de um tipo do lote, um a um: inválidos vão para
+ * `rejected` (não adianta reenviar), erros do servidor para `failed` (a VM
+ * reenvia só esses). Os índices são os da lista recebida.
+ */
+export async function ingestRadioMonitorItems<T>(
+  items: T[],
+  ingest: (item: T) => Promise<IngestResult>
+): Promise<RadioMonitorBatchReport> {
+  const report: RadioMonitorBatchReport = { rejected: [], failed: [] };
+  for (let i = 0; i < items.length; i++) {
+    try {
+      const result = await ingest(items[i]);
+      if (!result.ok) {
+        console.warn(`[RadioMonitor API] Batch item ${i} rejected: ${result.error}`);
+        report.rejected.push(i);
+      }
+    } catch (err) {
+      console.error(`[RadioMonitor API] Batch item ${i} failed:`, err);
+      report.failed.push(i);
+    }
+  }
+  return report;
+}
+
+const HEALTH_STATUSES = new Set(["ok", "degraded", "down", "unknown"]);
+
+/**
+ * Grava (sobrescreve) a saúde de uma estação reportada pela VM.
+ */
+export async function ingestRadioStationHealth(body: RadioStationHealthInput): Promise<IngestResult> {
+  const { stationId, status } = body ?? ({} as RadioStationHealthInput);
+
+  if (!stationId || !HEALTH_STATUSES.has(status)) {
+    return { ok: false, error: "Missing required fields: stationId, status" };
+  }
+
+  const toDate = (value?: string | null) => (value ? new Date(value) : null);
+  const values = {
+    status,
+    consecutiveFailures: body.consecutiveFailures ?? 0,
+    totalFailures: body.totalFailures ?? 0,
+    bytesReceived: body.bytesReceived ?? 0,
+    keywordHits: body.keywordHits ?? 0,
+    lastSuccessAt: toDate(body.lastSuccessAt),
+    lastFailureAt: toDate(body.lastFailureAt),
+    lastError: body.lastError ?? null,
+    circuitOpenUntil: toDate(body.circuitOpenUntil),
+    nodeId: body.nodeId ? String(body.nodeId).slice(0, 100) : null,
+    reportedAt: new Date(),
+  };
+
+  await db
+    .insert(radioStationHealth)
+    .values({ stationId, ...values })
+    .onConflictDoUpdate({ target: radioStationHealth.stationId, set: values });
+
+  return { ok: true };
+}
+
+const NODE_ROLES = new Set(["monitor", "musicas"]);
+const NODE_LEASE_MIN_S = 5;
+const NODE_LEASE_MAX_S = 600;
+const NODE_PURGE_AFTER_MS = 24 * 60 * 60 * 1000;
+
+export type RadioMonitorNodeLease = {
+  nodeId: string;
+  role: string;
+  release: boolean;
+  values: { weight: string; ownedStations: number; heartbeatAt: Date; leaseExpiresAt: Date };
+  purgeBefore: Date; // VMs com lease vencido antes disso saem da tabela
+};
+
+/**
+ * Valida o heartbeat de uma VM e calcula o que gravar: lease limitado entre
+ * NODE_LEASE_MIN_S e NODE_LEASE_MAX_S, peso positivo (padrão 1).
+ */
+export function planRadioMonitorNodeLease(
+  body: RadioMonitorNodeInput,
+  now: Date
+): { ok: true; lease: RadioMonitorNodeLease } | { ok: false; error: string } {
+  const nodeId = typeof body?.nodeId === "string" ? body.nodeId.trim().slice(0, 100) : "";
+  const role = body?.role ?? "monitor";
+
+  if (!nodeId || !NODE_ROLES.has(role)) {
+    return { ok: false, error: "Missing required fields: nodeId, role" };
+  }
+
+  const leaseS = Math.min(NODE_LEASE_MAX_S, Math.max(NODE_LEASE_MIN_S, Number(body.leaseS) || 30));
+  const weight = Number(body.weight) > 0 ? Number(body.weight) : 1;
+  return {
+    ok: true,
+    lease: {
+      nodeId,
+      role,
+      release: Boolean(body.release),
+      values: {
+        weight: String(weight),
+        ownedStations: Math.max(0, Math.trunc(Number(body.ownedStations) || 0)),
+        heartbeatAt: now,
+        leaseExpiresAt: new Date(now.getTime() + leaseS * 1000),
+      },
+      purgeBefore: new Date(now.getTime() - NODE_PURGE_AFTER_MS),
+    },
+  };
+}
+
+/**
+ * Renova (ou libera) o lease de uma VM e devolve as VMs vivas do mesmo papel.
+ * Cada VM calcula sozinha, por rendezvous hashing sobre essa lista, quais
+ * estações são dela — o SAAS só guarda quem está vivo.
+ */
+export async function renewRadioMonitorNode(
+  body: RadioMonitorNodeInput
+): Promise<{ ok: true; nodes: RadioMonitorNode[] } | { ok: false; error: string }> {
+  const now = new Date();
+  const plan = planRadioMonitorNodeLease(body, now);
+  if (!plan.ok) {
+    return plan;
+  }
+
+  const { nodeId, role, values } = plan.lease;
+  if (plan.lease.release) {
+    await db
+      .delete(radioMonitorNodes)
+      .where(and(eq(radioMonitorNodes.nodeId, nodeId), eq(radioMonitorNodes.role, role)));
+  } else {
+    await db
+      .insert(radioMonitorNodes)
+      .values({ nodeId, role, ...values })
+      .onConflictDoUpdate({ target: [radioMonitorNodes.nodeId, radioMonitorNodes.role], set: values });
+  }
+
+  // VMs desligadas há mais de um dia somem da tabela
+  await db.delete(radioMonitorNodes).where(lt(radioMonitorNodes.leaseExpiresAt, plan.lease.purgeBefore));
+
+  const live = await db
+    .select({ nodeId: radioMonitorNodes.nodeId, weight: radioMonitorNodes.weight })
+    .from(radioMonitorNodes)
+    .where(and(eq(radioMonitorNodes.role, role), gt(radioMonitorNodes.leaseExpiresAt, now)));
+
+  return { ok: true, nodes: live.map((n) => ({ nodeId: n.nodeId, weight: Number(n.weight) })) };
+}
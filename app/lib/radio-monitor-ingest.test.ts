@@ -0,0 +1,420 @@
+import { describe, it, expect, beforeEach, afterEach, vi } from "vitest";
+
+// Fronteira do banco: cada db.insert/db.update registra a tabela e a cadeia
+// de métodos (values, onConflict*, returning...) e resolve com o próximo
+// resultado de `results` (vazio se não houver).
+const db = vi.hoisted(() => {
+  type Query = { op: string; table: unknown; calls: Record<string, unknown> };
+  const queries: Query[] = [];
+  const results: unknown[][] = [];
+  const start = (op: string) => (table: unknown) => {
+    const query: Query = { op, table, calls: {} };
+    queries.push(query);
+    const result = results.shift() ?? [];
+    const chain: any = new Proxy(
+      {},
+      {
+        get: (_, method: string) =>
+          method === "then"
+            ? (resolve: (v: unknown) => unknown, reject: (e: unknown) => unknown) =>
+                Promise.resolve(result).then(resolve, reject)
+            : (arg: unknown) => {
+                query.calls[method] = arg;
+                return chain;
+              },
+      }
+    );
+    return chain;
+  };
+  return {
+    queries,
+    results,
+    insert: start("insert"),
+    update: start("update"),
+    reset() {
+      queries.length = 0;
+      results.length = 0;
+    },
+  };
+});
+
+vi.mock("~/lib/db.server", () => ({ db }));
+vi.mock("~/lib/storage.server", () => ({
+  uploadFile: vi.fn(async () => ({ url: "https://storage.test/radio-monitor/snippet.mp3" })),
+}));
+
+import { action as batchAction } from "~/routes/api.radio-monitor-batch";
+import { action as nodesAction } from "~/routes/api.radio-monitor-nodes";
+import {
+  formatRadioMonitorEventMessage,
+  ingestRadioMonitorEvent,
+  ingestRadioMonitorItems,
+  ingestRadioMonitorSong,
+  parseRadioMonitorBatch,
+  planRadioMonitorEvent,
+  planRadioMonitorNodeLease,
+} from "~/lib/radio-monitor-ingest.server";
+import { radioMonitorEvents, radioMonitorSongs } from "../../drizzle/schema/radio-monitor";
+
+const API_KEY = "test-radio-monitor-key";
+
+function event(overrides: Record<string, unknown> = {}) {
+  return {
+    stationId: "station-1",
+    stationName: "Rádio Teste",
+    transcriptionText: "hoje tem promoção na loja",
+    detectedKeywords: ["promoção"],
+    confidence: 90,
+    detectedAt: "2026-01-10T12:00:00-03:00",
+    ...overrides,
+  };
+}
+
+function song(overrides: Record<string, unknown> = {}) {
+  return { stationId: "station-1", title: "Música", artist: "Artista", ...overrides };
+}
+
+async function post(action: (args: any) => Promise<unknown>, body: unknown, key = API_KEY) {
+  const request = new Request("http://localhost/api/radio-monitor", {
+    method: "POST",
+    headers: { "Content-Type": "application/json", "x-radio-monitor-key": key },
+    body: typeof body === "string" ? body : JSON.stringify(body),
+  });
+  const result = (await action({ request, params: {}, context: {} })) as any;
+  return { status: result.init?.status ?? 200, body: result.data };
+}
+
+beforeEach(() => {
+  db.reset();
+  process.env.RADIO_MONITOR_SECRET = API_KEY;
+  delete process.env.OPENCLAW_TELEGRAM_TOKEN;
+  delete process.env.OPENCLAW_CHAT_ID;
+  vi.spyOn(console, "warn").mockImplementation(() => {});
+  vi.spyOn(console, "error").mockImplementation(() => {});
+});
+
+afterEach(() => {
+  vi.restoreAllMocks();
+});
+
+describe("Radio Monitor batch", () => {
+  it("should reject requests without the VM key", async () => {
+    const res = await post(batchAction, { events: [event()] }, "wrong-key");
+
+    expect(res.status).toBe(401);
+  });
+
+  it("should reject invalid JSON", async () => {
+    const res = await post(batchAction, "{not json");
+
+    expect(res.status).toBe(400);
+    expect(res.body.error).toBe("Invalid JSON");
+  });
+
+  it("should refuse batches over the size cap", async () => {
+    const events = Array.from({ length: 150 }, () => event());
+    const songs = Array.from({ length: 51 }, () => song());
+    const res = await post(batchAction, { events, songs });
+
+    expect(res.status).toBe(413);
+    expect(res.body.error).toBe("Batch too large (max 200 items)");
+  });
+
+  it("should accept a batch at the size cap", () => {
+    const parsed = parseRadioMonitorBatch({ events: Array.from({ length: 200 }, () => event()) });
+
+    expect(parsed.ok && parsed.batch.events).toHaveLength(200);
+  });
+
+  it("should treat missing or malformed lists as empty", () => {
+    expect(parseRadioMonitorBatch({ songs: [song()] })).toEqual({ ok: true, batch: { events: [], songs: [song()] } });
+    expect(parseRadioMonitorBatch({ events: "x" })).toEqual({ ok: true, batch: { events: [], songs: [] } });
+    expect(parseRadioMonitorBatch(null)).toEqual({ ok: true, batch: { events: [], songs: [] } });
+  });
+
+  it("should report rejected and failed items by index", async () => {
+    const ingest = vi.fn(async (item: string) => {
+      if (item === "invalid") return { ok: false as const, error: "Missing required fields" };
+      if (item === "db-down") throw new Error("Database unavailable");
+      return { ok: true as const };
+    });
+
+    const report = await ingestRadioMonitorItems(["ok", "invalid", "db-down", "ok"], ingest);
+
+    expect(report).toEqual({ rejected: [1], failed: [2] });
+    expect(ingest).toHaveBeenCalledTimes(4);
+  });
+});
+
+describe("Radio Monitor events", () => {
+  describe("plan", () => {
+    it("should reject events without station, transcription or keywords", () => {
+      expect(planRadioMonitorEvent(event({ stationId: "" })).kind).toBe("invalid");
+      expect(planRadioMonitorEvent(event({ transcriptionText: "" })).kind).toBe("invalid");
+      expect(planRadioMonitorEvent(event({ detectedKeywords: [] })).kind).toBe("invalid");
+      expect(planRadioMonitorEvent(null as any).kind).toBe("invalid");
+    });
+
+    it("should store a new event and notify", () => {
+      expect(planRadioMonitorEvent(event({ eventKey: "evt-1" }))).toEqual({
+        kind: "event",
+        notify: true,
+        row: {
+          stationId: "station-1",
+          transcriptionText: "hoje tem promoção na loja",
+          detectedPromotionKeywords: '["promoção"]',
+          confidence: "90",
+          isPromotion: true,
+          recordedAt: new Date("2026-01-10T12:00:00-03:00"),
+          eventKey: "evt-1",
+        },
+      });
+    });
+
+    it("should keep events without eventKey independent", () => {
+      const plan = planRadioMonitorEvent(event({ confidence: 40 }));
+
+      expect(plan).toMatchObject({ kind: "event", row: { eventKey: null, isPromotion: false } });
+    });
+
+    it("should store backfilled events without notifying", () => {
+      expect(planRadioMonitorEvent(event({ eventKey: "evt-1", backfill: true }))).toMatchObject({
+        kind: "event",
+        notify: false,
+      });
+    });
+
+    it("should treat a retry of the first detection as the event, not an update", () => {
+      expect(planRadioMonitorEvent(event({ eventKey: "evt-1", occurrences: 1 })).kind).toBe("event");
+    });
+
+    it("should fold cooldown repetitions into the row of the eventKey", () => {
+      const plan = planRadioMonitorEvent(
+        event({ eventKey: "evt-1", occurrences: 3, lastDetectedAt: "2026-01-10T12:05:00-03:00" })
+      );
+
+      expect(plan).toMatchObject({
+        kind: "update",
+        row: { eventKey: "evt-1", occurrences: 3, lastDetectedAt: new Date("2026-01-10T12:05:00-03:00") },
+      });
+    });
+
+    it("should count the repetitions of each keyword separately", () => {
+      // A VM manda uma atualização por keyword do evento, com o mesmo eventKey
+      const a = planRadioMonitorEvent(event({ eventKey: "evt-1", detectedKeywords: ["promoção"], occurrences: 3 }));
+      const b = planRadioMonitorEvent(event({ eventKey: "evt-1", detectedKeywords: ["sorteio"], occurrences: 5 }));
+
+      expect(a.kind === "update" && a.row.keywordOccurrences).toEqual({ promoção: 3 });
+      expect(b.kind === "update" && b.row.keywordOccurrences).toEqual({ sorteio: 5 });
+    });
+
+    it("should use the detection time when the update has no last detection", () => {
+      const plan = planRadioMonitorEvent(event({ eventKey: "evt-1", occurrences: 2 }));
+
+      expect(plan.kind === "update" && plan.row.lastDetectedAt).toEqual(new Date("2026-01-10T12:00:00-03:00"));
+    });
+  });
+
+  describe("Telegram message", () => {
+    it("should list the station, keywords and confidence", () => {
+      const msg = formatRadioMonitorEventMessage(event({ detectedKeywords: ["promoção", "sorteio"] }) as any);
+
+      expect(msg).toContain("Esta\u00E7\u00E3o: *Rádio Teste*");
+      expect(msg).toContain("Keywords: `promoção`, `sorteio`");
+      expect(msg).toContain("Confian\u00E7a: 90%");
+    });
+
+    it("should escape Markdown and cap the transcription at 400 characters", () => {
+      const msg = formatRadioMonitorEventMessage(event({ transcriptionText: "ligue já! *grátis* " + "a".repeat(500) }) as any);
+      const transcription = msg.split("\n").pop()!;
+
+      expect(transcription.startsWith("_ligue já\\! \\*grátis\\* a")).toBe(true);
+      expect(transcription.replace(/\\/g, "")).toHaveLength(402);
+    });
+  });
+
+  describe("ingest", () => {
+    let telegram: ReturnType<typeof vi.fn>;
+
+    beforeEach(() => {
+      process.env.OPENCLAW_TELEGRAM_TOKEN = "test-token";
+      process.env.OPENCLAW_CHAT_ID = "test-chat";
+      telegram = vi.fn(async () => new Response("{}"));
+      vi.stubGlobal("fetch", telegram);
+    });
+
+    afterEach(() => {
+      vi.unstubAllGlobals();
+    });
+
+    it("should upsert a new event by eventKey and notify", async () => {
+      db.results.push([{ id: "row-1" }], [{ id: "row-1" }]);
+
+      const result = await ingestRadioMonitorEvent(event({ eventKey: "evt-1", audioSnippet: "AAAA" }));
+
+      expect(result.ok).toBe(true);
+      const [upsert, claim] = db.queries;
+      expect(upsert.table).toBe(radioMonitorEvents);
+      expect(upsert.calls.values).toMatchObject({
+        eventKey: "evt-1",
+        audioUrl: "https://storage.test/radio-monitor/snippet.mp3",
+      });
+      expect(upsert.calls.onConflictDoUpdate).toMatchObject({
+        target: radioMonitorEvents.eventKey,
+        set: { detectedPromotionKeywords: '["promoção"]' },
+      });
+      expect(claim.op).toBe("update");
+      expect((claim.calls.set as { notifiedAt: unknown }).notifiedAt).toBeInstanceOf(Date);
+      expect(telegram).toHaveBeenCalledTimes(1);
+    });
+
+    it("should not notify an event that was already notified", async () => {
+      db.results.push([{ id: "row-1" }], []);
+
+      const result = await ingestRadioMonitorEvent(event({ eventKey: "evt-1" }));
+
+      expect(result.ok).toBe(true);
+      expect(db.queries.map((q) => q.op)).toEqual(["insert", "update"]);
+      expect(telegram).not.toHaveBeenCalled();
+    });
+
+    it("should notify exactly once when the update arrives before the event", async () => {
+      await ingestRadioMonitorEvent(event({ eventKey: "evt-1", occurrences: 4 }));
+      db.results.push([{ id: "row-1" }], [{ id: "row-1" }]);
+      await ingestRadioMonitorEvent(event({ eventKey: "evt-1" }));
+      db.results.push([{ id: "row-1" }], []);
+      await ingestRadioMonitorEvent(event({ eventKey: "evt-1" }));
+
+      expect(db.queries.map((q) => q.op)).toEqual(["insert", "insert", "update", "insert", "update"]);
+      expect(telegram).toHaveBeenCalledTimes(1);
+    });
+
+    it("should upsert cooldown updates without notifying", async () => {
+      await ingestRadioMonitorEvent(event({ eventKey: "evt-1", occurrences: 3 }));
+
+      const [upsert] = db.queries;
+      expect(upsert.op).toBe("insert");
+      expect(upsert.calls.values).toMatchObject({ eventKey: "evt-1", occurrences: 3 });
+      expect(upsert.calls.onConflictDoUpdate).toMatchObject({ target: radioMonitorEvents.eventKey });
+      expect(telegram).not.toHaveBeenCalled();
+    });
+
+    it("should not notify backfilled events", async () => {
+      db.results.push([{ id: "row-1" }]);
+
+      await ingestRadioMonitorEvent(event({ eventKey: "evt-1", backfill: true }));
+
+      expect(db.queries).toHaveLength(1);
+      expect(telegram).not.toHaveBeenCalled();
+    });
+
+    it("should not claim the notification when Telegram is not configured", async () => {
+      delete process.env.OPENCLAW_TELEGRAM_TOKEN;
+      db.results.push([{ id: "row-1" }]);
+
+      await ingestRadioMonitorEvent(event({ eventKey: "evt-1" }));
+
+      expect(db.queries).toHaveLength(1);
+      expect(telegram).not.toHaveBeenCalled();
+    });
+
+    it("should not touch the database for invalid events", async () => {
+      const result = await ingestRadioMonitorEvent(event({ detectedKeywords: [] }));
+
+      expect(result.ok).toBe(false);
+      expect(db.queries).toHaveLength(0);
+    });
+  });
+});
+
+describe("Radio Monitor songs", () => {
+  it("should insert songs once per songKey", async () => {
+    const result = await ingestRadioMonitorSong(song({ songKey: "song-1", confidence: 87.5 }) as any);
+
+    expect(result.ok).toBe(true);
+    const [insert] = db.queries;
+    expect(insert.table).toBe(radioMonitorSongs);
+    expect(insert.calls.values).toMatchObject({ songKey: "song-1", confidence: "87.5", album: null });
+    expect(insert.calls.onConflictDoNothing).toEqual({ target: radioMonitorSongs.songKey });
+  });
+
+  it("should reject songs without title or artist", async () => {
+    expect((await ingestRadioMonitorSong(song({ artist: "" }) as any)).ok).toBe(false);
+    expect((await ingestRadioMonitorSong(song({ title: "" }) as any)).ok).toBe(false);
+    expect(db.queries).toHaveLength(0);
+  });
+});
+
+describe("Radio Monitor node leases", () => {
+  const now = new Date("2026-01-10T12:00:00Z");
+  const lease = (body: Record<string, unknown>) => {
+    const plan = planRadioMonitorNodeLease(body as any, now);
+    if (!plan.ok) throw new Error(plan.error);
+    return plan.lease;
+  };
+  const expiresInS = (body: Record<string, unknown>) => (lease(body).values.leaseExpiresAt.getTime() - now.getTime()) / 1000;
+
+  it("should renew a monitor lease of 30 seconds with weight 1 by default", () => {
+    expect(lease({ nodeId: " vm-1 " })).toEqual({
+      nodeId: "vm-1",
+      role: "monitor",
+      release: false,
+      values: { weight: "1", ownedStations: 0, heartbeatAt: now, leaseExpiresAt: new Date("2026-01-10T12:00:30Z") },
+      purgeBefore: new Date("2026-01-09T12:00:00Z"),
+    });
+  });
+
+  it("should keep the role, weight and station count reported by the VM", () => {
+    const plan = lease({ nodeId: "vm-1", role: "musicas", weight: 1.5, ownedStations: 4.7 });
+
+    expect(plan.role).toBe("musicas");
+    expect(plan.values.weight).toBe("1.5");
+    expect(plan.values.ownedStations).toBe(4);
+  });
+
+  it("should fall back to weight 1 and no stations for invalid values", () => {
+    const plan = lease({ nodeId: "vm-1", weight: -2, ownedStations: -3 });
+
+    expect(plan.values.weight).toBe("1");
+    expect(plan.values.ownedStations).toBe(0);
+  });
+
+  it("should clamp the lease between 5 and 600 seconds", () => {
+    expect(expiresInS({ nodeId: "vm-1", leaseS: 1 })).toBe(5);
+    expect(expiresInS({ nodeId: "vm-1", leaseS: 86400 })).toBe(600);
+    expect(expiresInS({ nodeId: "vm-1", leaseS: "abc" })).toBe(30);
+  });
+
+  it("should mark a release", () => {
+    expect(lease({ nodeId: "vm-1", role: "musicas", release: true })).toMatchObject({
+      nodeId: "vm-1",
+      role: "musicas",
+      release: true,
+    });
+  });
+
+  it("should cap the node id at 100 characters", () => {
+    expect(lease({ nodeId: "x".repeat(150) }).nodeId).toHaveLength(100);
+  });
+
+  it("should reject a missing node id or an unknown role", () => {
+    expect(planRadioMonitorNodeLease({ nodeId: "  " }, now).ok).toBe(false);
+    expect(planRadioMonitorNodeLease({ role: "monitor" } as any, now).ok).toBe(false);
+    expect(planRadioMonitorNodeLease({ nodeId: "vm-1", role: "other" }, now).ok).toBe(false);
+  });
+
+  describe("endpoint", () => {
+    it("should reject requests without the VM key", async () => {
+      const res = await post(nodesAction, { nodeId: "vm-1" }, "wrong-key");
+
+      expect(res.status).toBe(401);
+    });
+
+    it("should reject invalid JSON and invalid nodes", async () => {
+      expect((await post(nodesAction, "{not json")).status).toBe(400);
+      const res = await post(nodesAction, { role: "monitor" });
+      expect(res.status).toBe(400);
+      expect(res.body.error).toBe("Missing required fields: nodeId, role");
+    });
+  });
+});
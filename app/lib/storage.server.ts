@@ -24,6 +24,8 @@ const ALLOWED_TYPES = [
   "application/vnd.openxmlformats-officedocument.wordprocessingml.document", // docx
   "application/msword", // doc
   "text/csv",
+  "audio/mpeg", // recortes do Radio Monitor
+  "audio/wav",
 ];
 
 export async function uploadFile(
@@ -136,6 +136,9 @@ export default [
   route("api/radio-monitor-config", "routes/api.radio-monitor-config.tsx"),
   route("api/radio-monitor-event", "routes/api.radio-monitor-event.tsx"),
   route("api/radio-monitor-song", "routes/api.radio-monitor-song.tsx"),
+  route("api/radio-monitor-batch", "routes/api.radio-monitor-batch.tsx"),
+  route("api/radio-monitor-health", "routes/api.radio-monitor-health.tsx"),
+  route("api/radio-monitor-nodes", "routes/api.radio-monitor-nodes.tsx"),
   route("api/scpc-search", "routes/api.scpc-search.tsx"),
   route("api/personal-studies", "routes/api.personal-studies.tsx"),
 
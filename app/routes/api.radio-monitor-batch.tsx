@@ -0,0 +1,42 @@
+import { data } from "react-router";
+import type { Route } from "./+types/api.radio-monitor-batch";
+import {
+  ingestRadioMonitorEvent,
+  ingestRadioMonitorItems,
+  ingestRadioMonitorSong,
+  isRadioMonitorAuthorized,
+  parseRadioMonitorBatch,
+} from "~/lib/radio-monitor-ingest.server";
+
+/**
+ * Lote de eventos e músicas do outbox da VM.
+ *
+ * Cada item é processado de forma independente. A resposta diz, por tipo,
+ * quais índices foram rejeitados (inválidos — não adianta reenviar) e quais
+ * falharam (erro do servidor — a VM reenvia só esses).
+ */
+export async function action({ request }: Route.ActionArgs) {
+  if (!isRadioMonitorAuthorized(request)) {
+    return data({ error: "Unauthorized" }, { status: 401 });
+  }
+
+  let body: unknown;
+
+  try {
+    body = await request.json();
+  } catch {
+    return data({ error: "Invalid JSON" }, { status: 400 });
+  }
+
+  const parsed = parseRadioMonitorBatch(body);
+  if (!parsed.ok) {
+    return data({ error: parsed.error }, { status: 413 });
+  }
+
+  const report = {
+    events: await ingestRadioMonitorItems(parsed.batch.events, ingestRadioMonitorEvent),
+    songs: await ingestRadioMonitorItems(parsed.batch.songs, ingestRadioMonitorSong),
+  };
+
+  return data({ success: true, ...report });
+}
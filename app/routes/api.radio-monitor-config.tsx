@@ -3,12 +3,12 @@ import type { Route } from "./+types/api.radio-monitor-config";
 import { db } from "~/lib/db.server";
 import { radioStations, radioMonitorKeywords } from "../../drizzle/schema/radio-monitor";
 import { eq, and } from "drizzle-orm";
+import { createHash } from "crypto";
+import { isRadioMonitorAuthorized } from "~/lib/radio-monitor-ingest.server";
 
 export async function loader({ request }: Route.LoaderArgs) {
   // Valida API key do script da VM
-  const apiKey = request.headers.get("x-radio-monitor-key");
-  const expected = process.env.RADIO_MONITOR_SECRET;
-  if (!expected || apiKey !== expected) {
+  if (!isRadioMonitorAuthorized(request)) {
     return data({ error: "Unauthorized" }, { status: 401 });
   }
 
@@ -23,13 +23,14 @@ export async function loader({ request }: Route.LoaderArgs) {
       .where(eq(radioMonitorKeywords.isActive, true)),
   ]);
 
-  return data({
+  const config = {
     stations: stations.map((s) => ({
       id: s.id,
       name: s.name,
       streamUrl: s.streamUrl,
       frequency: s.frequency,
       city: s.city,
+      modelTier: s.modelTier,
     })),
     keywords: keywords.map((k) => ({
       id: k.id,
@@ -37,11 +38,20 @@ export async function loader({ request }: Route.LoaderArgs) {
       category: k.category,
       priority: k.priority,
       stationId: k.stationId,
+      fuzzyThreshold: k.fuzzyThreshold === null ? null : Number(k.fuzzyThreshold),
     })),
     acrcloud: {
       host: process.env.ACRCLOUD_HOST ?? "",
       access_key: process.env.ACRCLOUD_ACCESS_KEY ?? "",
       access_secret: process.env.ACRCLOUD_ACCESS_SECRET ?? "",
     },
-  });
+  };
+
+  // ETag do conteúdo: a VM manda If-None-Match e, sem mudanças, recebe só um 304
+  const etag = `"${createHash("sha256").update(JSON.stringify(config)).digest("hex").slice(0, 32)}"`;
+  if (request.headers.get("if-none-match") === etag) {
+    return new Response(null, { status: 304, headers: { ETag: etag } });
+  }
+
+  return data(config, { headers: { ETag: etag, "Cache-Control": "no-cache" } });
 }
@@ -0,0 +1,36 @@
+import { data } from "react-router";
+import type { Route } from "./+types/api.radio-monitor-health";
+import {
+  ingestRadioStationHealth,
+  isRadioMonitorAuthorized,
+  type RadioStationHealthInput,
+} from "~/lib/radio-monitor-ingest.server";
+
+const MAX_STATIONS = 500;
+
+/**
+ * Saúde das estações enviada periodicamente pelo monitor.py da VM
+ * (status, falhas seguidas, circuit breaker, último áudio recebido).
+ */
+export async function action({ request }: Route.ActionArgs) {
+  if (!isRadioMonitorAuthorized(request)) {
+    return data({ error: "Unauthorized" }, { status: 401 });
+  }
+
+  let body: { stations?: RadioStationHealthInput[] };
+
+  try {
+    body = await request.json();
+  } catch {
+    return data({ error: "Invalid JSON" }, { status: 400 });
+  }
+
+  const stations = Array.isArray(body?.stations) ? body.stations.slice(0, MAX_STATIONS) : [];
+  let rejected = 0;
+  for (const station of stations) {
+    const result = await ingestRadioStationHealth(station);
+    if (!result.ok) rejected++;
+  }
+
+  return data({ success: true, updated: stations.length - rejected, rejected });
+}
@@ -0,0 +1,33 @@
+import { data } from "react-router";
+import type { Route } from "./+types/api.radio-monitor-nodes";
+import {
+  isRadioMonitorAuthorized,
+  renewRadioMonitorNode,
+  type RadioMonitorNodeInput,
+} from "~/lib/radio-monitor-ingest.server";
+
+/**
+ * Heartbeat das VMs do radio monitor (sharding): renova o lease da VM e
+ * devolve as VMs vivas do mesmo papel, sobre as quais cada uma divide as
+ * estações por rendezvous hashing.
+ */
+export async function action({ request }: Route.ActionArgs) {
+  if (!isRadioMonitorAuthorized(request)) {
+    return data({ error: "Unauthorized" }, { status: 401 });
+  }
+
+  let body: RadioMonitorNodeInput;
+
+  try {
+    body = await request.json();
+  } catch {
+    return data({ error: "Invalid JSON" }, { status: 400 });
+  }
+
+  const result = await renewRadioMonitorNode(body);
+  if (!result.ok) {
+    return data({ error: result.error }, { status: 400 });
+  }
+
+  return data({ success: true, nodes: result.nodes });
+}
@@ -7,7 +7,7 @@ import { Form, redirect, useLoaderData, useNavigation } from "react-router";
 import { useState } from "react";
 import { db } from "~/lib/db.server";
 import { requireAuth } from "~/lib/auth.server";
-import { radioStations, radioMonitorEvents, radioMonitorKeywords, radioMonitorSongs } from "../../drizzle/schema";
+import { radioStations, radioMonitorEvents, radioMonitorKeywords, radioMonitorSongs, radioStationHealth } from "../../drizzle/schema";
 import { desc, eq, or, isNull } from "drizzle-orm";
 import {
   Radio,
@@ -32,20 +32,25 @@ type Station = typeof radioStations.$inferSelect;
 type Keyword = typeof radioMonitorKeywords.$inferSelect;
 type Event = typeof radioMonitorEvents.$inferSelect;
 type Song = typeof radioMonitorSongs.$inferSelect;
+type StationHealth = typeof radioStationHealth.$inferSelect;
 
 export async function loader({ request }: { request: Request }) {
   await requireAuth(request);
 
-  const [stations, keywords, events, songs] = await Promise.all([
+  const [stations, keywords, events, songs, health] = await Promise.all([
     db.select().from(radioStations).orderBy(desc(radioStations.createdAt)),
     db.select().from(radioMonitorKeywords).orderBy(desc(radioMonitorKeywords.createdAt)),
     db.select().from(radioMonitorEvents).orderBy(desc(radioMonitorEvents.recordedAt)).limit(20),
     db.select().from(radioMonitorSongs).orderBy(desc(radioMonitorSongs.detectedAt)).limit(50),
+    db.select().from(radioStationHealth),
   ]);
 
-  return { stations, keywords, events, songs };
+  return { stations, keywords, events, songs, health };
 }
 
+// Modelos VOSK da VM (vazio = padrão da VM)
+const MODEL_TIERS = new Set(["small", "large"]);
+
 export async function action({ request }: { request: Request }) {
   await requireAuth(request);
   const formData = await request.formData();
@@ -97,6 +102,7 @@ export async function action({ request }: { request: Request }) {
           contactPhone: String(formData.get("contactPhone") || "").trim() || null,
           contactWhatsapp: String(formData.get("contactWhatsapp") || "").trim() || null,
           monitoringEnabled: String(formData.get("monitoringEnabled") || "false") === "true",
+          modelTier: MODEL_TIERS.has(String(formData.get("modelTier") || "")) ? String(formData.get("modelTier")) : null,
           updatedAt: new Date(),
         })
         .where(eq(radioStations.id, stationId));
@@ -116,11 +122,15 @@ export async function action({ request }: { request: Request }) {
     const keyword = String(formData.get("keyword") || "").trim();
     if (keyword) {
       const stationId = String(formData.get("stationId") || "").trim() || null;
+      // Similaridade mínima do match aproximado (%, 50-100); vazio = padrão da VM
+      const similarity = Number(String(formData.get("fuzzyThreshold") || "").trim());
+      const fuzzyThreshold = similarity >= 50 && similarity <= 100 ? (similarity / 100).toFixed(2) : null;
       await db.insert(radioMonitorKeywords).values({
         keyword,
         stationId,
         category: String(formData.get("category") || "promotion").trim() || null,
         priority: String(formData.get("priority") || "medium").trim(),
+        fuzzyThreshold,
       });
     }
   }
@@ -190,6 +200,11 @@ function KeywordBadge({ kw, onDelete, onToggle, isSubmitting }: {
       <Tag className="h-3 w-3 shrink-0" />
       <span className={kw.isActive ? "" : "line-through"}>{kw.keyword}</span>
       <span className="text-[10px] opacity-60">{CATEGORY_LABELS[kw.category ?? ""] ?? kw.category}</span>
+      {kw.fuzzyThreshold !== null && (
+        <span className="text-[10px] opacity-60" title="Similaridade mínima do match aproximado">
+          ≈{Math.round(Number(kw.fuzzyThreshold) * 100)}%
+        </span>
+      )}
       <button onClick={onToggle} disabled={isSubmitting} title={kw.isActive ? "Desativar" : "Ativar"} className="ml-0.5 opacity-70 hover:opacity-100">
         {kw.isActive ? <ToggleRight className="h-3.5 w-3.5" /> : <ToggleLeft className="h-3.5 w-3.5" />}
       </button>
@@ -276,6 +291,16 @@ function EditStationModal({
             placeholder="https://stream.exemplo.com/radio.mp3"
             className="w-full rounded-lg border border-gray-200 bg-white px-3 py-2 text-sm dark:border-gray-700 dark:bg-gray-900 dark:text-gray-100"
           />
+          <select
+            name="modelTier"
+            defaultValue={station.modelTier ?? ""}
+            title="Modelo de transcrição VOSK usado pela VM para esta estação"
+            className="w-full rounded-lg border border-gray-200 bg-white px-3 py-2 text-sm dark:border-gray-700 dark:bg-gray-900 dark:text-gray-100"
+          >
+            <option value="">Modelo VOSK: padrão da VM</option>
+            <option value="small">Modelo VOSK: pequeno (mais leve)</option>
+            <option value="large">Modelo VOSK: grande (mais preciso)</option>
+          </select>
           <input
             type="url"
             name="websiteUrl"
@@ -318,7 +343,13 @@ function EditStationModal({
   );
 }
 
-function StationCard({ station, keywords }: { station: Station; keywords: Keyword[] }) {
+const HEALTH_BADGE: Record<string, { label: string; className: string }> = {
+  ok: { label: "No ar", className: "bg-green-100 text-green-700 dark:bg-green-900/30 dark:text-green-400" },
+  degraded: { label: "Instável", className: "bg-amber-100 text-amber-700 dark:bg-amber-900/30 dark:text-amber-300" },
+  down: { label: "Fora do ar", className: "bg-red-100 text-red-700 dark:bg-red-900/30 dark:text-red-400" },
+};
+
+function StationCard({ station, keywords, health }: { station: Station; keywords: Keyword[]; health?: StationHealth }) {
   const [expanded, setExpanded] = useState(false);
   const [showAddKw, setShowAddKw] = useState(false);
   const [showEditModal, setShowEditModal] = useState(false);
@@ -331,6 +362,7 @@ function StationCard({ station, keywords }: { station: Station; keywords: Keywor
   const instagramHref = station.instagramUrl || null;
   const phoneHref = normalizePhoneHref(station.contactPhone);
   const whatsappHref = normalizeWhatsappHref(station.contactWhatsapp);
+  const healthBadge = station.monitoringEnabled && health ? HEALTH_BADGE[health.status] : undefined;
 
   return (
     <>
@@ -349,7 +381,27 @@ function StationCard({ station, keywords }: { station: Station; keywords: Keywor
             <p className="text-xs text-gray-500 dark:text-gray-400">
               {[station.frequency, station.city, station.state].filter(Boolean).join(" • ")}
               {activeCount > 0 && <span className="ml-2 text-blue-500">{activeCount} keyword{activeCount !== 1 ? "s" : ""}</span>}
+              {station.modelTier === "large" && <span className="ml-2 text-purple-500">modelo grande</span>}
             </p>
+            {healthBadge && health ? (
+              <p className="mt-1 text-xs text-gray-500 dark:text-gray-400">
+                <span
+                  className={`rounded-full px-2 py-0.5 font-medium ${healthBadge.className}`}
+                  title={health.lastError ?? undefined}
+                >
+                  {healthBadge.label}
+                </span>
+                {health.lastSuccessAt && (
+                  <span className="ml-2">
+                    Último áudio: {new Date(health.lastSuccessAt).toLocaleString("pt-BR", { day: "2-digit", month: "2-digit", hour: "2-digit", minute: "2-digit" })}
+                  </span>
+                )}
+                {health.consecutiveFailures > 0 && (
+                  <span className="ml-2 text-red-500">{health.consecutiveFailures} falha(s) seguida(s)</span>
+                )}
+                {health.nodeId && <span className="ml-2">VM: {health.nodeId}</span>}
+              </p>
+            ) : null}
             <div className="mt-2 flex flex-wrap items-center gap-2 text-xs">
               {websiteHref ? (
                 <a href={websiteHref} target="_blank" rel="noreferrer" className="inline-flex items-center gap-1 rounded-full bg-gray-100 px-2 py-0.5 text-gray-700 hover:bg-gray-200 dark:bg-gray-800 dark:text-gray-200">
@@ -511,6 +563,16 @@ function StationCard({ station, keywords }: { station: Station; keywords: Keywor
                     <option value="high">Alta</option>
                     <option value="low">Baixa</option>
                   </select>
+                  <input
+                    type="number"
+                    name="fuzzyThreshold"
+                    min={50}
+                    max={100}
+                    step={5}
+                    placeholder="Similar. %"
+                    title="Similaridade mínima do match aproximado (vazio = padrão da VM)"
+                    className="w-24 rounded-lg border border-gray-200 bg-white px-2 py-1 text-xs dark:border-gray-700 dark:bg-gray-800 dark:text-gray-100"
+                  />
                   <Button type="submit" size="sm" className="h-7 text-xs">Adicionar</Button>
                 </Form>
               )}
@@ -544,7 +606,7 @@ function SongConfidenceBadge({ confidence }: { confidence: string | null }) {
 }
 
 export default function PersonalLifeRadioMonitorPage() {
-  const { stations, keywords, events, songs } = useLoaderData<typeof loader>();
+  const { stations, keywords, events, songs, health } = useLoaderData<typeof loader>();
   const navigation = useNavigation();
   const isSubmitting = navigation.state === "submitting";
   const [showAddStation, setShowAddStation] = useState(false);
@@ -648,7 +710,12 @@ export default function PersonalLifeRadioMonitorPage() {
         ) : (
           <div className="space-y-3">
             {stations.map(s => (
-              <StationCard key={s.id} station={s as Station} keywords={keywords as Keyword[]} />
+              <StationCard
+                key={s.id}
+                station={s as Station}
+                keywords={keywords as Keyword[]}
+                health={(health as StationHealth[]).find(h => h.stationId === s.id)}
+              />
             ))}
           </div>
         )}
@@ -714,6 +781,16 @@ export default function PersonalLifeRadioMonitorPage() {
             <option value="high">Alta</option>
             <option value="low">Baixa</option>
           </select>
+          <input
+            type="number"
+            name="fuzzyThreshold"
+            min={50}
+            max={100}
+            step={5}
+            placeholder="Similar. %"
+            title="Similaridade mínima do match aproximado (vazio = padrão da VM)"
+            className="w-24 rounded-lg border border-gray-200 bg-gray-50 px-2 py-1.5 text-sm dark:border-gray-700 dark:bg-gray-800 dark:text-gray-100"
+          />
           <Button type="submit" size="sm" disabled={isSubmitting}>
             <Plus className="mr-1 h-3.5 w-3.5" />
             Adicionar
@@ -818,6 +895,14 @@ export default function PersonalLifeRadioMonitorPage() {
                     <tr key={ev.id} className={ev.reviewed ? "opacity-50" : ""}>
                       <td className="px-4 py-3 text-xs text-gray-600 dark:text-gray-300">
                         {new Date(ev.recordedAt).toLocaleString("pt-BR", { day: "2-digit", month: "2-digit", hour: "2-digit", minute: "2-digit" })}
+                        {ev.occurrences > 1 && (
+                          <span
+                            className="ml-1.5 rounded-full bg-amber-100 px-1.5 py-0.5 text-[10px] font-medium text-amber-700 dark:bg-amber-900/30 dark:text-amber-400"
+                            title={ev.lastDetectedAt ? "Última menção: " + new Date(ev.lastDetectedAt).toLocaleTimeString("pt-BR", { hour: "2-digit", minute: "2-digit" }) : undefined}
+                          >
+                            ×{ev.occurrences}
+                          </span>
+                        )}
                       </td>
                       <td className="px-4 py-3 text-xs font-medium text-gray-900 dark:text-gray-100">
                         {station?.name ?? "—"}
@@ -826,7 +911,10 @@ export default function PersonalLifeRadioMonitorPage() {
                         <div className="flex flex-wrap gap-1">
                           {keywords_found.length > 0
                             ? keywords_found.map((k, i) => (
-                                <span key={i} className="rounded-full bg-blue-100 px-1.5 py-0.5 text-[10px] text-blue-700 dark:bg-blue-900/30 dark:text-blue-400">{k}</span>
+                                <span key={i} className="rounded-full bg-blue-100 px-1.5 py-0.5 text-[10px] text-blue-700 dark:bg-blue-900/30 dark:text-blue-400">
+                                  {k}
+                                  {(ev.keywordOccurrences?.[k] ?? 1) > 1 && <span className="ml-0.5 font-medium">×{ev.keywordOccurrences?.[k]}</span>}
+                                </span>
                               ))
                             : <span className="text-xs text-gray-400">—</span>
                           }
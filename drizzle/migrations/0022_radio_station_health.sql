@@ -0,0 +1,13 @@
+CREATE TABLE IF NOT EXISTS "radio_station_health" (
+  "station_id" uuid PRIMARY KEY,
+  "status" varchar(20) NOT NULL DEFAULT 'unknown',
+  "consecutive_failures" integer NOT NULL DEFAULT 0,
+  "total_failures" integer NOT NULL DEFAULT 0,
+  "bytes_received" bigint NOT NULL DEFAULT 0,
+  "keyword_hits" integer NOT NULL DEFAULT 0,
+  "last_success_at" timestamp with time zone,
+  "last_failure_at" timestamp with time zone,
+  "last_error" text,
+  "circuit_open_until" timestamp with time zone,
+  "reported_at" timestamp with time zone NOT NULL DEFAULT now()
+);
@@ -0,0 +1 @@
+ALTER TABLE "radio_monitor_keywords" ADD COLUMN IF NOT EXISTS "fuzzy_threshold" numeric(3, 2);
@@ -0,0 +1,4 @@
+ALTER TABLE "radio_monitor_events" ADD COLUMN IF NOT EXISTS "event_key" varchar(64);
+ALTER TABLE "radio_monitor_events" ADD COLUMN IF NOT EXISTS "occurrences" integer NOT NULL DEFAULT 1;
+ALTER TABLE "radio_monitor_events" ADD COLUMN IF NOT EXISTS "last_detected_at" timestamp with time zone;
+CREATE UNIQUE INDEX IF NOT EXISTS "radio_monitor_events_event_key_idx" ON "radio_monitor_events" ("event_key");
@@ -0,0 +1,12 @@
+CREATE TABLE IF NOT EXISTS "radio_monitor_nodes" (
+  "id" uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  "node_id" varchar(100) NOT NULL,
+  "role" varchar(20) NOT NULL DEFAULT 'monitor',
+  "weight" decimal(6, 2) NOT NULL DEFAULT 1,
+  "owned_stations" integer NOT NULL DEFAULT 0,
+  "started_at" timestamp with time zone NOT NULL DEFAULT now(),
+  "heartbeat_at" timestamp with time zone NOT NULL DEFAULT now(),
+  "lease_expires_at" timestamp with time zone NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "radio_monitor_nodes_node_role_idx" ON "radio_monitor_nodes" ("node_id", "role");
+ALTER TABLE "radio_station_health" ADD COLUMN IF NOT EXISTS "node_id" varchar(100);
@@ -0,0 +1 @@
+ALTER TABLE "radio_stations" ADD COLUMN IF NOT EXISTS "model_tier" varchar(20);
@@ -0,0 +1 @@
+ALTER TABLE "radio_monitor_events" ADD COLUMN IF NOT EXISTS "keyword_occurrences" jsonb;
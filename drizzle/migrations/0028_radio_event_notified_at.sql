@@ -0,0 +1,3 @@
+ALTER TABLE "radio_monitor_events" ADD COLUMN IF NOT EXISTS "notified_at" timestamp with time zone;
+-- Eventos anteriores já foram notificados (ou eram replay): reenvios não notificam de novo
+UPDATE "radio_monitor_events" SET "notified_at" = "created_at" WHERE "notified_at" IS NULL;
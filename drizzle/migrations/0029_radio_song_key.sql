@@ -0,0 +1,2 @@
+ALTER TABLE "radio_monitor_songs" ADD COLUMN IF NOT EXISTS "song_key" varchar(64);
+CREATE UNIQUE INDEX IF NOT EXISTS "radio_monitor_songs_song_key_idx" ON "radio_monitor_songs" ("song_key");
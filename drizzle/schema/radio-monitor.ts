@@ -1,4 +1,4 @@
-import { pgTable, uuid, varchar, text, timestamp, boolean, decimal, integer, index } from "drizzle-orm/pg-core";
+import { pgTable, uuid, varchar, text, timestamp, boolean, decimal, integer, bigint, jsonb, index, uniqueIndex } from "drizzle-orm/pg-core";
 
 export const radioStations = pgTable(
   "radio_stations",
@@ -15,6 +15,7 @@ export const radioStations = pgTable(
     contactWhatsapp: text("contact_whatsapp"),
     isActive: boolean("is_active").notNull().default(true),
     monitoringEnabled: boolean("monitoring_enabled").notNull().default(false),
+    modelTier: varchar("model_tier", { length: 20 }), // modelo VOSK na VM: "small", "large"; null = padrão da VM
     createdAt: timestamp("created_at", { withTimezone: true }).notNull().defaultNow(),
     updatedAt: timestamp("updated_at", { withTimezone: true }).notNull().defaultNow(),
   },
@@ -39,12 +40,18 @@ export const radioMonitorEvents = pgTable(
     promotionDetails: text("promotion_details"), // Extracted details (prize, deadline, etc)
     reviewed: boolean("reviewed").notNull().default(false),
     reviewNotes: text("review_notes"),
+    eventKey: varchar("event_key", { length: 64 }), // id do evento na VM — repetições em cooldown atualizam a mesma linha
+    occurrences: integer("occurrences").notNull().default(1), // menções agrupadas no evento (a keyword mais repetida)
+    keywordOccurrences: jsonb("keyword_occurrences").$type<Record<string, number>>(), // menções por keyword, das atualizações do cooldown
+    lastDetectedAt: timestamp("last_detected_at", { withTimezone: true }), // última menção agrupada
+    notifiedAt: timestamp("notified_at", { withTimezone: true }), // Telegram enviado (uma vez por evento)
     createdAt: timestamp("created_at", { withTimezone: true }).notNull().defaultNow(),
   },
   (table) => [
     index("radio_monitor_events_station_idx").on(table.stationId),
     index("radio_monitor_events_recorded_idx").on(table.recordedAt),
     index("radio_monitor_events_promotion_idx").on(table.isPromotion),
+    uniqueIndex("radio_monitor_events_event_key_idx").on(table.eventKey),
   ]
 );
 
@@ -56,6 +63,7 @@ export const radioMonitorKeywords = pgTable(
     keyword: varchar("keyword", { length: 255 }).notNull(),
     category: varchar("category", { length: 50 }), // "promotion", "raffle", "discount", "contest"
     priority: varchar("priority", { length: 20 }).notNull().default("medium"), // "low", "medium", "high"
+    fuzzyThreshold: decimal("fuzzy_threshold", { precision: 3, scale: 2 }), // similaridade mínima do match aproximado na VM (0-1); null = padrão da VM
     isActive: boolean("is_active").notNull().default(true),
     createdAt: timestamp("created_at", { withTimezone: true }).notNull().defaultNow(),
   },
@@ -76,11 +84,47 @@ export const radioMonitorSongs = pgTable(
     album: varchar("album", { length: 255 }),
     releaseYear: integer("release_year"),
     confidence: decimal("confidence", { precision: 5, scale: 2 }), // ACRCloud score 0-100
+    songKey: varchar("song_key", { length: 64 }), // id da música na VM — reenvio do outbox não duplica
     detectedAt: timestamp("detected_at", { withTimezone: true }).notNull().defaultNow(),
     createdAt: timestamp("created_at", { withTimezone: true }).notNull().defaultNow(),
   },
   (table) => [
     index("radio_monitor_songs_station_idx").on(table.stationId),
     index("radio_monitor_songs_detected_idx").on(table.detectedAt),
+    uniqueIndex("radio_monitor_songs_song_key_idx").on(table.songKey),
+  ]
+);
+
+// Saúde de cada estação reportada pela VM (uma linha por estação, sobrescrita a cada envio)
+export const radioStationHealth = pgTable("radio_station_health", {
+  stationId: uuid("station_id").primaryKey(),
+  status: varchar("status", { length: 20 }).notNull().default("unknown"), // "ok", "degraded", "down", "unknown"
+  consecutiveFailures: integer("consecutive_failures").notNull().default(0),
+  totalFailures: integer("total_failures").notNull().default(0),
+  bytesReceived: bigint("bytes_received", { mode: "number" }).notNull().default(0),
+  keywordHits: integer("keyword_hits").notNull().default(0),
+  lastSuccessAt: timestamp("last_success_at", { withTimezone: true }),
+  lastFailureAt: timestamp("last_failure_at", { withTimezone: true }),
+  lastError: text("last_error"),
+  circuitOpenUntil: timestamp("circuit_open_until", { withTimezone: true }),
+  nodeId: varchar("node_id", { length: 100 }), // VM que monitora a estação (sharding)
+  reportedAt: timestamp("reported_at", { withTimezone: true }).notNull().defaultNow(),
+});
+
+// VMs do radio monitor com lease válido (sharding das estações); o lease é renovado pelo heartbeat
+export const radioMonitorNodes = pgTable(
+  "radio_monitor_nodes",
+  {
+    id: uuid("id").defaultRandom().primaryKey(),
+    nodeId: varchar("node_id", { length: 100 }).notNull(),
+    role: varchar("role", { length: 20 }).notNull().default("monitor"), // "monitor" (VOSK), "musicas" (ACRCloud)
+    weight: decimal("weight", { precision: 6, scale: 2 }).notNull().default("1"),
+    ownedStations: integer("owned_stations").notNull().default(0),
+    startedAt: timestamp("started_at", { withTimezone: true }).notNull().defaultNow(),
+    heartbeatAt: timestamp("heartbeat_at", { withTimezone: true }).notNull().defaultNow(),
+    leaseExpiresAt: timestamp("lease_expires_at", { withTimezone: true }).notNull(),
+  },
+  (table) => [
+    uniqueIndex("radio_monitor_nodes_node_role_idx").on(table.nodeId, table.role),
   ]
 );
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Agendador de consultas ACRCloud com cota diária
+=====================================================================
+
+Substitui a varredura fixa (todas as estações a cada 30 min) por um
+agendamento por estação:
+
+  - Cota: balde de tokens com reposição contínua (orçamento diário / 24h),
+    mais um teto rígido de chamadas por dia (UTC). Sem token, ninguém é
+    consultado — o orçamento dura o dia inteiro em vez de acabar de manhã.
+  - Prioridade aprendida: cada estação tem uma taxa de acerto (média móvel
+    exponencial de "identificou música"). Estação que só fala acerta pouco e
+    passa a ser consultada raramente; estação musical, com frequência.
+  - Fim da música: quando o ACRCloud diz até quando a música vai tocar, a
+    próxima consulta da estação fica para logo depois do fim previsto.
+  - Estado em disco (JSON): reiniciar o serviço não zera a contagem do dia,
+    o balde, as taxas de acerto nem os horários agendados.
+
+No modo asyncio do musicas.py, `due` devolve todas as estações vencidas
+(até os tokens disponíveis) para consultar em paralelo, e o AcrRateLimiter
+segura o ritmo: chamadas simultâneas, chamadas por segundo e pausa quando o
+ACRCloud recusa por QPS.
+
+Uso:
+  sched = AcrScheduler(state_path, daily_budget=720)
+  station_id = sched.next_due(station_ids)   # None = nada a fazer agora
+  station_ids = sched.due(station_ids)       # modo asyncio: todas as vencidas
+  sched.consume()                            # ao chamar o ACRCloud
+  sched.record(station_id, "identified", ends_at=...)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+log = logging.getLogger("musicas")
+
+# ── Parâmetros ─────────────────────────────────────────────────────────────
+
+DAILY_BUDGET = 720            # Chamadas/dia (free tier: ~3h de amostras de 15s)
+BURST_HOURS = 2               # Capacidade do balde: até 2h de orçamento acumulado
+MIN_INTERVAL_S = 120          # Intervalo mínimo entre consultas da mesma estação
+MAX_INTERVAL_S = 1800         # Estação que nunca acerta ainda é testada a cada 30 min
+SONG_END_GRACE_S = 5          # Consulta logo depois do fim previsto da música
+HIT_RATE_ALPHA = 0.2          # Peso da última consulta na taxa de acerto
+HIT_RATE_INITIAL = 0.5
+
+OUTCOMES = ("identified", "cached", "miss", "error")
+
+ACR_CONCURRENCY = 4           # Chamadas ACRCloud simultâneas (modo asyncio)
+ACR_MAX_QPS = 2.0             # Chamadas ACRCloud iniciadas por segundo
+ACR_QPS_BACKOFF_S = 5.0       # Pausa depois de uma recusa por QPS (status 3015)
+
+
+def _utc_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class AcrScheduler:
+    def __init__(
+        self,
+        state_path: str | Path,
+        daily_budget: int = DAILY_BUDGET,
+        min_interval_s: float = MIN_INTERVAL_S,
+        max_interval_s: float = MAX_INTERVAL_S,
+    ):
+        self.state_path = Path(state_path)
+        self.daily_budget = daily_budget
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.capacity = max(1.0, daily_budget * BURST_HOURS / 24)
+        self.refill_per_s = daily_budget / 86400
+
+        now = time.time()
+        self.tokens = self.capacity
+        self.refilled_at = now
+        self.day = _utc_day(now)
+        self.used_today = 0
+        # station_id → {"hit_rate", "next_at", "probes", "hits"}
+        self.stations: dict[str, dict] = {}
+        self._load()
+
+    # ── Cota ──────────────────────────────────────────────────────────────
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.refilled_at) * self.refill_per_s)
+        self.refilled_at = now
+        if _utc_day(now) != self.day:
+            self.day = _utc_day(now)
+            self.used_today = 0
+
+    def set_budget(self, daily_budget: int):
+        """Troca a cota diária (sharding: a cota da conta dividida entre as VMs vivas)."""
+        self.daily_budget = daily_budget
+        self.capacity = max(1.0, daily_budget * BURST_HOURS / 24)
+        self.refill_per_s = daily_budget / 86400
+        self.tokens = min(self.tokens, self.capacity)
+
+    def available(self, now: float | None = None) -> bool:
+        now = now or time.time()
+        self._refill(now)
+        return self.tokens >= 1 and self.used_today < self.daily_budget
+
+    def consume(self):
+        """Registra uma chamada ao ACRCloud (debita o balde e a cota do dia)."""
+        self._refill(time.time())
+        self.tokens = max(0.0, self.tokens - 1)
+        self.used_today += 1
+        self.save()
+
+    def seconds_until_token(self) -> float:
+        if self.used_today >= self.daily_budget:
+            now = datetime.now(tz=timezone.utc)
+            midnight = now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp() + 86400
+            return max(1.0, midnight - now.timestamp())
+        return max(0.0, (1 - self.tokens) / self.refill_per_s) if self.refill_per_s else 3600.0
+
+    # ── Agenda ────────────────────────────────────────────────────────────
+
+    def _station(self, station_id: str) -> dict:
+        return self.stations.setdefault(station_id, {
+            "hit_rate": HIT_RATE_INITIAL,
+            "next_at": 0.0,
+            "probes": 0,
+            "hits": 0,
+        })
+
+    def next_due(self, station_ids: list[str], now: float | None = None) -> str | None:
+        """
+        Estação a consultar agora: entre as vencidas, a de maior taxa de
+        acerto (desempate: a mais atrasada). None se nenhuma venceu ou se
+        não há cota.
+        """
+        due = self.due(station_ids, now)
+        return due[0] if due else None
+
+    def due(self, station_ids: list[str], now: float | None = None) -> list[str]:
+        """
+        Estações vencidas em ordem de prioridade (a de `next_due` primeiro),
+        no máximo tantas quanto os tokens inteiros e a cota restante do dia.
+        """
+        now = now or time.time()
+        due = [sid for sid in station_ids if self._station(sid)["next_at"] <= now]
+        if not due or not self.available(now):
+            return []
+        due.sort(key=lambda sid: (self.stations[sid]["hit_rate"], now - self.stations[sid]["next_at"]), reverse=True)
+        return due[:min(int(self.tokens), self.daily_budget - self.used_today)]
+
+    def seconds_until_next(self, station_ids: list[str], now: float | None = None) -> float:
+        """Quanto dormir até a próxima consulta possível (agenda e cota)."""
+        now = now or time.time()
+        if not station_ids:
+            return self.max_interval_s
+        next_at = min(self._station(sid)["next_at"] for sid in station_ids)
+        wait_s = max(0.0, next_at - now)
+        if not self.available(now):
+            wait_s = max(wait_s, self.seconds_until_token())
+        return wait_s
+
+    def interval_for(self, station_id: str) -> float:
+        """Intervalo após uma consulta sem música: cresce quando a estação acerta pouco."""
+        hit_rate = self._station(station_id)["hit_rate"]
+        interval = self.min_interval_s / max(hit_rate, 0.05)
+        return min(self.max_interval_s, max(self.min_interval_s, interval))
+
+    def record(self, station_id: str, outcome: str, ends_at: float | None = None, now: float | None = None):
+        """Atualiza a taxa de acerto e agenda a próxima consulta da estação."""
+        now = now or time.time()
+        st = self._station(station_id)
+        if outcome in ("identified", "miss"):
+            hit = 1.0 if outcome == "identified" else 0.0
+            st["hit_rate"] = (1 - HIT_RATE_ALPHA) * st["hit_rate"] + HIT_RATE_ALPHA * hit
+            st["probes"] += 1
+            st["hits"] += int(hit)
+
+        if outcome in ("identified", "cached") and ends_at and ends_at > now:
+            # Próxima consulta logo depois da música acabar
+            st["next_at"] = ends_at + SONG_END_GRACE_S
+        elif outcome == "error":
+            st["next_at"] = now + self.min_interval_s
+        else:
+            st["next_at"] = now + self.interval_for(station_id)
+        self.save()
+
+    def forget_missing(self, station_ids: list[str]):
+        """Descarta estado de estações que saíram da config."""
+        for sid in set(self.stations) - set(station_ids):
+            del self.stations[sid]
+
+    def summary(self) -> str:
+        return (
+            f"cota hoje {self.used_today}/{self.daily_budget}, balde {self.tokens:.1f}/{self.capacity:.0f}"
+        )
+
+    # ── Persistência ──────────────────────────────────────────────────────
+
+    def _load(self):
+        if not self.state_path.exists():
+            return
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            log.warning("Estado do agendador ilegível (%s) — começando do zero", e)
+            return
+        self.tokens = min(self.capacity, float(state.get("tokens", self.capacity)))
+        self.refilled_at = float(state.get("refilled_at", self.refilled_at))
+        self.day = state.get("day", self.day)
+        self.used_today = int(state.get("used_today", 0))
+        self.stations = state.get("stations", {})
+        self._refill(time.time())
+
+    def save(self):
+        """Grava o estado de forma atômica (arquivo temporário + rename)."""
+        state = {
+            "tokens": self.tokens,
+            "refilled_at": self.refilled_at,
+            "day": self.day,
+            "used_today": self.used_today,
+            "stations": self.stations,
+        }
+        tmp = self.state_path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(state, indent=1), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            log.warning("Falha ao salvar estado do agendador: %s", e)
+
+
+class AcrRateLimiter:
+    """
+    Ritmo das chamadas ao ACRCloud no modo asyncio (a cota do dia continua
+    com o AcrScheduler): no máximo `concurrency` em andamento e um início a
+    cada 1/`max_qps` segundos. Uso: `async with limiter:` em volta da chamada.
+    """
+
+    def __init__(self, concurrency: int = ACR_CONCURRENCY, max_qps: float = ACR_MAX_QPS):
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._spacing = 1.0 / max_qps if max_qps > 0 else 0.0
+        self._next_at = 0.0
+
+    async def __aenter__(self):
+        await self._slots.acquire()
+        try:
+            # Reserva o horário de início antes de dormir: quem chega depois fica atrás
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self._spacing
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+        except BaseException:
+            self._slots.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self._slots.release()
+
+    def backoff(self, seconds: float = ACR_QPS_BACKOFF_S):
+        """O ACRCloud recusou por QPS: ninguém começa antes de `seconds`."""
+        self._next_at = max(self._next_at, time.monotonic() + seconds)
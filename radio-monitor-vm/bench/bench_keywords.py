@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark — detect_keywords antigo vs KeywordMatcher
+====================================================
+
+Compara a checagem antiga (normaliza tudo a cada chamada + substring por
+keyword) com o KeywordMatcher pré-compilado, variando o nº de keywords.
+A última coluna é o KeywordIndex com match aproximado (fuzzy=True):
+exato + FuzzyMatcher, o custo de ligar "fuzzy_matching" na VM.
+
+Uso:
+  python3 bench/bench_keywords.py
+  python3 bench/bench_keywords.py --sizes 10 100 1000 5000 --words 80
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keywords import KeywordIndex, KeywordMatcher  # noqa: E402
+
+VOCAB = (
+    "promoção sorteio ganhe prêmio ligue agora rádio ouvinte carro zero "
+    "desconto loja supermercado oferta válida até domingo cupom participe "
+    "concurso cultural música sucesso notícia trânsito previsão tempo "
+    "são paulo campinas santos futebol jogo hoje amanhã manhã tarde noite"
+).split()
+
+
+def legacy_detect_keywords(text: str, keywords: list[dict]) -> list[dict]:
+    """Cópia da implementação original de monitor.detect_keywords (referência)."""
+    import unicodedata
+
+    def normalize(s: str) -> str:
+        s = s.lower()
+        s = unicodedata.normalize("NFD", s)
+        s = "".join(c for c in s if unicodedata.category(c) != "Mn")
+        return s
+
+    text_norm = normalize(text)
+    found = []
+    for kw in keywords:
+        kw_norm = normalize(kw["keyword"])
+        if kw_norm in text_norm:
+            found.append(kw)
+    return found
+
+
+def make_keywords(n: int, rng: random.Random) -> list[dict]:
+    kws = [{"keyword": w} for w in VOCAB[:10]]
+    while len(kws) < n:
+        size = rng.choice((1, 1, 2, 2, 3))
+        phrase = " ".join(rng.choice(VOCAB) for _ in range(size)) + f" marca{len(kws)}"
+        kws.append({"keyword": phrase})
+    return kws[:n]
+
+
+def make_texts(count: int, words: int, rng: random.Random) -> list[str]:
+    return [" ".join(rng.choice(VOCAB) for _ in range(words)) for _ in range(count)]
+
+
+def ops_per_sec(fn, texts: list[str], min_time: float = 0.5) -> float:
+    done = 0
+    start = time.perf_counter()
+    while True:
+        for t in texts:
+            fn(t)
+        done += len(texts)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--words", type=int, default=80, help="palavras por transcrição (~30s de fala)")
+    parser.add_argument("--texts", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    texts = make_texts(args.texts, args.words, rng)
+
+    print(
+        f"{'keywords':>9} {'build (ms)':>11} {'antigo (ops/s)':>15} {'matcher (ops/s)':>16} {'ganho':>8}"
+        f" {'fuzzy build (ms)':>17} {'fuzzy (ops/s)':>14}"
+    )
+    for n in args.sizes:
+        keywords = make_keywords(n, rng)
+        t0 = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        index = KeywordIndex(keywords, fuzzy=True)
+        fuzzy_build_ms = (time.perf_counter() - t0) * 1000
+
+        legacy = ops_per_sec(lambda t: legacy_detect_keywords(t, keywords), texts)
+        compiled = ops_per_sec(matcher.match, texts)
+        fuzzy = ops_per_sec(lambda t: index.match("bench", t), texts)
+        print(
+            f"{n:>9} {build_ms:>11.1f} {legacy:>15.0f} {compiled:>16.0f} {compiled / legacy:>7.0f}x"
+            f" {fuzzy_build_ms:>17.1f} {fuzzy:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark — keyword spotting (gramática restrita) vs transcrição completa
+=========================================================================
+
+Decodifica as fixtures do manifest.json em janelas (como o monitor.py no
+modo janela) com o mesmo modelo VOSK, em três modos:
+
+  - full:   vocabulário completo (kws_mode "off");
+  - only:   gramática com as keywords + "[unk]" (kws_mode "only");
+  - verify: gramática e, só nas janelas em que ela achou keyword, a
+            transcrição completa (kws_mode "verify").
+
+Para cada modo: CPU gasta (time.process_time — o VOSK roda no próprio
+processo), fator de tempo real, recall e falsos positivos contra o
+gabarito do manifest e o recall relativo ao modo full (das keywords que a
+transcrição completa achou, quantas o modo achou). Sem pré-filtro de fala:
+compara só o custo do decode.
+
+Pré-requisitos: fixtures geradas (python3 bench/make_fixtures.py) e o
+modelo VOSK na pasta do monitor.
+
+Uso:
+  python3 bench/bench_kws.py
+  python3 bench/bench_kws.py --window 15 --min-conf 0.7 --json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from vosk import KaldiRecognizer, Model, SetLogLevel
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from keywords import UNK, KeywordIndex  # noqa: E402
+from pcm_share import resample_pcm  # noqa: E402
+from stubs import FIXTURES_DIR, load_manifest  # noqa: E402
+
+VM_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_RATE = 16000
+CHUNK_BYTES = 4000
+STATION = "bench"
+MODES = ("full", "only", "verify")
+
+
+def find_model() -> Path:
+    """Mesma busca do monitor.py (sem importá-lo: ele abre o log da VM)."""
+    models = sorted(p for p in VM_DIR.iterdir() if p.is_dir() and p.name.startswith("vosk-model"))
+    if not models:
+        sys.exit("Modelo VOSK não encontrado ao lado do monitor.py — veja o README")
+    small = [p for p in models if p.name.startswith("vosk-model-small-pt")]
+    return (small or models)[0]
+
+
+def decode(recognizer: KaldiRecognizer, pcm: bytes) -> list[dict]:
+    """Palavras reconhecidas na janela (recognizer reaproveitado, como nos workers)."""
+    words = []
+    for i in range(0, len(pcm), CHUNK_BYTES):
+        if recognizer.AcceptWaveform(pcm[i:i + CHUNK_BYTES]):
+            words += json.loads(recognizer.Result()).get("result", [])
+    words += json.loads(recognizer.FinalResult()).get("result", [])
+    return words
+
+
+def spot(index: KeywordIndex, words: list[dict], min_conf: float) -> set[str]:
+    """Keywords no resultado, descartando "[unk]" e palavras de confiança baixa."""
+    tokens = [w["word"] for w in words if w["word"] != UNK and w.get("conf", 1.0) >= min_conf]
+    return {kw["keyword"] for kw in index.match(STATION, " ".join(tokens))}
+
+
+def windows(fixture: dict, window_s: float) -> list[tuple[float, bytes]]:
+    pcm = fixture["pcm"]
+    if fixture["sample_rate"] != SAMPLE_RATE:
+        pcm = resample_pcm(pcm, fixture["sample_rate"], SAMPLE_RATE)
+    size = int(window_s * SAMPLE_RATE) * 2
+    return [(i / (SAMPLE_RATE * 2), pcm[i:i + size]) for i in range(0, len(pcm), size)]
+
+
+def run_mode(mode: str, model: Model, index: KeywordIndex, fixtures: list[dict], args) -> dict:
+    """Decodifica tudo num modo; devolve CPU e as keywords achadas por (fixture, janela)."""
+    full = KaldiRecognizer(model, SAMPLE_RATE)
+    full.SetWords(True)
+    kws = KaldiRecognizer(model, SAMPLE_RATE, index.grammar(STATION))
+    kws.SetWords(True)
+
+    found, audio_s, full_windows = {}, 0.0, 0
+    cpu_start = time.process_time()
+    for fixture in fixtures:
+        for offset, pcm in windows(fixture, args.window):
+            audio_s += len(pcm) / (SAMPLE_RATE * 2)
+            if mode == "full":
+                hits = spot(index, decode(full, pcm), 0.0)
+            else:
+                hits = spot(index, decode(kws, pcm), args.min_conf)
+                if mode == "verify" and hits:
+                    full_windows += 1
+                    hits = spot(index, decode(full, pcm), 0.0)
+            found[(fixture["file"], offset)] = hits
+    cpu_s = time.process_time() - cpu_start
+    return {"cpu_s": cpu_s, "audio_s": audio_s, "full_windows": full_windows, "found": found}
+
+
+def score(found: dict, fixtures: list[dict], window_s: float) -> tuple[float | None, int]:
+    """Recall contra o gabarito (ocorrência achada na janela em que terminou) e falsos positivos."""
+    expected = {}
+    for fixture in fixtures:
+        for kw in fixture.get("keywords", []):
+            for _, end in kw["spans"]:
+                key = (fixture["file"], (end // window_s) * window_s)
+                expected.setdefault(key, set()).add(kw["keyword"])
+    total = sum(len(v) for v in expected.values())
+    hit = sum(len(v & found.get(key, set())) for key, v in expected.items())
+    false_positives = sum(len(v - expected.get(key, set())) for key, v in found.items())
+    return (hit / total if total else None), false_positives
+
+
+def relative_recall(found: dict, reference: dict) -> float | None:
+    total = sum(len(v) for v in reference.values())
+    if not total:
+        return None
+    return sum(len(v & found.get(key, set())) for key, v in reference.items()) / total
+
+
+def _pct(value: float | None) -> str:
+    return "—" if value is None else f"{value:.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR)
+    parser.add_argument("--model", type=Path, help="pasta do modelo VOSK (padrão: a do monitor)")
+    parser.add_argument("--window", type=float, default=30.0, help="segundos por janela (window_seconds)")
+    parser.add_argument("--min-conf", type=float, default=0.6, help="kws_min_conf")
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    SetLogLevel(-1)
+    fixtures = load_manifest(args.fixtures)
+    keywords = sorted({kw["keyword"] for f in fixtures for kw in f.get("keywords", [])})
+    index = KeywordIndex([
+        {"id": f"kw-{i}", "keyword": k, "category": "promotion", "priority": "medium", "stationId": None}
+        for i, k in enumerate(keywords)
+    ])
+    model = Model(str(args.model or find_model()))
+
+    runs = {mode: run_mode(mode, model, index, fixtures, args) for mode in MODES}
+    base_cpu = runs["full"]["cpu_s"]
+    result = {"window_s": args.window, "min_conf": args.min_conf, "keywords": keywords, "modes": {}}
+    for mode, run in runs.items():
+        recall, false_positives = score(run["found"], fixtures, args.window)
+        result["modes"][mode] = {
+            "cpu_s": round(run["cpu_s"], 2),
+            "realtime_factor": round(run["audio_s"] / run["cpu_s"], 1) if run["cpu_s"] else None,
+            "cpu_saved": round(1 - run["cpu_s"] / base_cpu, 3) if base_cpu else None,
+            "recall": recall,
+            "recall_vs_full": relative_recall(run["found"], runs["full"]["found"]),
+            "false_positives": false_positives,
+            "full_windows": run["full_windows"],
+        }
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    print(f"Janela {args.window:.0f}s | kws_min_conf {args.min_conf} | {len(keywords)} keyword(s)")
+    print(f"{'modo':<8} {'CPU (s)':>8} {'×RT':>6} {'economia':>9} {'recall':>7} {'vs full':>8} {'FP':>4}")
+    for mode, m in result["modes"].items():
+        print(
+            f"{mode:<8} {m['cpu_s']:>8.1f} {m['realtime_factor'] or 0:>6.1f} {_pct(m['cpu_saved']):>9} "
+            f"{_pct(m['recall']):>7} {_pct(m['recall_vs_full']):>8} {m['false_positives']:>4}"
+        )
+    verify = result["modes"]["verify"]
+    print(f"verify: transcrição completa em {verify['full_windows']} janela(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Benchmark — gera o corpus de fixtures PT-BR (WAV 16 kHz mono)
+=============================================================
+
+Cada fixture é uma "programação de rádio" curta: trilha musical sintética
+(NumPy, reproduzível), silêncio e falas em PT-BR geradas pelo espeak-ng —
+comerciais com keywords, locução sem keyword e locução por cima da música.
+O manifest.json guarda, por keyword, os intervalos (s) em que ela foi ao
+ar (estimados pela posição no texto, ±0,5s): é o gabarito do run_bench.py
+para recall e latência.
+
+Gravações reais podem ser adicionadas à mão: WAV mono 16-bit em
+bench/fixtures/ e uma entrada no manifest.json com "file", "name" e
+"keywords": [{"keyword": "...", "spans": [[início_s, fim_s], ...]}].
+
+Requisitos:
+  sudo apt install espeak-ng -y
+
+Uso:
+  python3 bench/make_fixtures.py
+  python3 bench/make_fixtures.py --voice pt-br --rate 165
+"""
+
+import argparse
+import io
+import json
+import shutil
+import subprocess
+import sys
+import unicodedata
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pcm_share import resample_pcm  # noqa: E402
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+SAMPLE_RATE = 16000
+
+KEYWORDS = ["promoção", "sorteio", "loja central", "bom preço", "carro zero"]
+
+# ("music", s) | ("silence", s) | ("speech", texto) | ("voiceover", texto): fala sobre a trilha
+PROGRAMS = [
+    {
+        "file": "pop_comerciais.wav",
+        "name": "Rádio Bench Pop",
+        "song": {"title": "Canção de Teste", "artist": "Banda Sintética", "duration_ms": 200000},
+        "segments": [
+            ("music", 20),
+            ("speech", "Aproveite a promoção da loja central, descontos de até cinquenta por cento em toda a loja."),
+            ("music", 15),
+            ("speech", "Participe do sorteio e concorra a um carro zero. Ligue agora e participe."),
+            ("music", 20),
+        ],
+    },
+    {
+        "file": "jornal_falado.wav",
+        "name": "Rádio Bench Notícias",
+        "segments": [
+            ("speech", "Bom dia, ouvinte. Agora são oito horas e começa o nosso jornal da manhã."),
+            ("speech", "O trânsito está lento na marginal e a previsão é de chuva forte à tarde."),
+            ("silence", 2),
+            ("speech", "No intervalo, a promoção do supermercado bom preço: ofertas válidas até domingo."),
+            ("speech", "Voltamos com as notícias do futebol e o resultado do jogo de ontem."),
+            ("silence", 3),
+        ],
+    },
+    {
+        "file": "locucao_sobre_musica.wav",
+        "name": "Rádio Bench Sertanejo",
+        "segments": [
+            ("music", 15),
+            ("voiceover", "Chegou o sorteio de fim de ano da loja central. Cadastre sua nota fiscal."),
+            ("music", 20),
+            ("voiceover", "Tocando os maiores sucessos, vinte e quatro horas por dia."),
+            ("music", 10),
+        ],
+    },
+    {
+        "file": "so_musica.wav",
+        "name": "Rádio Bench Música",
+        "song": {"title": "Canção de Teste", "artist": "Banda Sintética", "duration_ms": 200000},
+        "segments": [
+            ("music", 40),
+            ("silence", 3),
+            ("music", 30),
+        ],
+    },
+]
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFD", text.lower())
+    return "".join(c for c in text if unicodedata.category(c) != "Mn")
+
+
+def music(seconds: float, rng: np.random.Generator) -> np.ndarray:
+    """Trilha sintética: acordes que mudam a cada 2s, vibrato e batida a cada 0,5s."""
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    x = np.zeros(n)
+    chords = [(220, 277, 330), (196, 247, 294), (175, 220, 262), (247, 311, 370)]
+    for c in range(int(np.ceil(seconds / 2))):
+        lo, hi = c * 2 * SAMPLE_RATE, min(n, (c + 1) * 2 * SAMPLE_RATE)
+        for i, f in enumerate(chords[c % len(chords)]):
+            for h in (1, 2, 3):
+                tt = t[lo:hi]
+                x[lo:hi] += np.sin(2 * np.pi * f * h * tt * (1 + 0.003 * np.sin(2 * np.pi * 5 * tt))) / (h * (i + 1))
+    hit = int(0.15 * SAMPLE_RATE)
+    for b in np.arange(0, seconds, 0.5):
+        s = int(b * SAMPLE_RATE)
+        m = min(hit, n - s)
+        x[s:s + m] += rng.normal(0, 0.6, m) * np.exp(-np.arange(m) / 800)
+    return 0.5 * x / (np.abs(x).max() + 1e-9)
+
+
+def tts(text: str, voice: str, rate: int) -> np.ndarray:
+    """Fala PT-BR via espeak-ng, reamostrada para 16 kHz."""
+    result = subprocess.run(
+        ["espeak-ng", "-v", voice, "-s", str(rate), "--stdout", text],
+        capture_output=True,
+        check=True,
+    )
+    with wave.open(io.BytesIO(result.stdout), "rb") as w:
+        pcm = w.readframes(w.getnframes())
+        pcm = resample_pcm(pcm, w.getframerate(), SAMPLE_RATE)
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float64) / 32768.0
+
+
+def build_program(program: dict, voice: str, rate: int, rng: np.random.Generator) -> tuple[np.ndarray, dict]:
+    parts, spans, speech_s = [], {}, 0.0
+    position = 0.0
+    for kind, value in program["segments"]:
+        if kind == "music":
+            audio = music(value, rng)
+        elif kind == "silence":
+            audio = rng.normal(0, 0.001, int(value * SAMPLE_RATE))
+        else:
+            voice_audio = tts(value, voice, rate) * 0.9
+            if kind == "voiceover":
+                voice_audio = voice_audio + 0.25 * music(len(voice_audio) / SAMPLE_RATE, rng)
+            audio = voice_audio
+            duration = len(audio) / SAMPLE_RATE
+            speech_s += duration
+            folded = _fold(value)
+            for keyword in KEYWORDS:
+                # Posição estimada pela fração do texto (o espeak fala em ritmo ~constante): ±0,5s
+                start = folded.find(_fold(keyword))
+                while start >= 0:
+                    stop = start + len(keyword)
+                    spans.setdefault(keyword, []).append([
+                        round(position + duration * start / len(folded), 2),
+                        round(position + duration * stop / len(folded), 2),
+                    ])
+                    start = folded.find(_fold(keyword), stop)
+        parts.append(audio)
+        position += len(audio) / SAMPLE_RATE
+
+    x = np.clip(np.concatenate(parts), -1, 1)
+    entry = {
+        "file": program["file"],
+        "name": program["name"],
+        "duration_s": round(position, 2),
+        "speech_s": round(speech_s, 2),
+        "keywords": [{"keyword": k, "spans": v} for k, v in spans.items()],
+    }
+    if program.get("song"):
+        entry["song"] = program["song"]
+    return x, entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--voice", default="pt-br")
+    parser.add_argument("--rate", type=int, default=165, help="palavras por minuto do espeak-ng")
+    parser.add_argument("--out", type=Path, default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    if shutil.which("espeak-ng") is None:
+        sys.exit("espeak-ng não encontrado. Instale com: sudo apt install espeak-ng -y")
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(42)
+    fixtures = []
+    for program in PROGRAMS:
+        x, entry = build_program(program, args.voice, args.rate, rng)
+        with wave.open(str(args.out / program["file"]), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(SAMPLE_RATE)
+            w.writeframes((x * 32767).astype("<i2").tobytes())
+        fixtures.append(entry)
+        n_kw = sum(len(k["spans"]) for k in entry["keywords"])
+        print(f"{entry['file']:<28} {entry['duration_s']:>6.1f}s  fala {entry['speech_s']:>5.1f}s  {n_kw} keyword(s)")
+
+    manifest = {"sample_rate": SAMPLE_RATE, "keywords": KEYWORDS, "fixtures": fixtures}
+    (args.out / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Manifest: {args.out / 'manifest.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Benchmark — monitor.py de ponta a ponta contra fixtures e stubs locais
+======================================================================
+
+Sobe os stubs (bench/stubs.py: fake streams + SAAS + ACRCloud), roda o
+monitor.py de verdade (e, com --musicas, o musicas.py) por --duration
+segundos apontando para eles e mede:
+
+  - vazão: estação-horas de áudio decodificado por core-hora de CPU
+    (CPU de toda a árvore de processos: monitor, workers VOSK, ffmpeg);
+  - latência ponta a ponta: do fim da keyword na fake stream até o evento
+    chegar ao stub do SAAS (p50/p90/máx);
+  - recall e falsos positivos contra o gabarito do manifest.json;
+  - pico de RSS (soma da árvore de processos, amostrada a cada 0,5s);
+  - ops/s do KeywordMatcher com as keywords do manifest e com 1000 keywords.
+
+O resultado vai para bench/results/<data>.json (máquina, commit, parâmetros
+e números), para comparar rodadas: --compare bench/results/anterior.json.
+
+Pré-requisitos: fixtures geradas (python3 bench/make_fixtures.py), VOSK e
+ffmpeg instalados — o mesmo ambiente da VM.
+
+Uso:
+  python3 bench/run_bench.py --duration 300
+  python3 bench/run_bench.py --duration 120 --speed 2 --set recognition_mode=streaming
+  python3 bench/run_bench.py --musicas --compare bench/results/20260101-120000.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_keywords import make_keywords, make_texts, ops_per_sec  # noqa: E402
+from keywords import KeywordMatcher  # noqa: E402
+from stubs import FIXTURES_DIR, SECRET, BenchState, StubServer, load_manifest  # noqa: E402
+
+BENCH_DIR = Path(__file__).resolve().parent
+VM_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+BYTES_PER_AUDIO_S = 16000 * 2
+RSS_POLL_S = 0.5
+MAX_LATENCY_S = 120           # Evento mais atrasado que isso não conta como detecção
+SHUTDOWN_TIMEOUT_S = 60
+# Conexões mais curtas que isso são capturas de 15s do musicas.py, não do monitor
+# (o modo por blocos abre conexões de CHUNK_DURATION_S = 30s)
+MIN_CONNECTION_S = 20
+
+
+def free_port() -> int:
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_set(values: list[str]) -> dict:
+    """--set chave=valor (valor em JSON quando possível: 4, true, "x")."""
+    extra = {}
+    for item in values:
+        key, _, raw = item.partition("=")
+        try:
+            extra[key] = json.loads(raw)
+        except ValueError:
+            extra[key] = raw
+    return extra
+
+
+# ── Processos ─────────────────────────────────────────────────────────────
+
+def _proc_children() -> dict[int, list[int]]:
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # pid (comm) state ppid ... — comm pode ter espaços
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def tree_rss_bytes(root_pids: list[int]) -> int:
+    """Soma do VmRSS dos processos e de todos os descendentes."""
+    children = _proc_children()
+    stack, total = list(root_pids), 0
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            pass
+    return total
+
+
+def scrape_counter(port: int, name: str) -> float:
+    """Soma de todas as séries de um contador no /metrics do daemon."""
+    try:
+        text = requests.get(f"http://127.0.0.1:{port}/metrics", timeout=5).text
+    except requests.RequestException:
+        return 0.0
+    total = 0.0
+    for line in text.splitlines():
+        if line.startswith(name + "{") or line.startswith(name + " "):
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+def launch(script: str, config_path: Path, log_path: Path, args: list[str]) -> subprocess.Popen:
+    env = dict(os.environ, RADIO_MONITOR_CONFIG=str(config_path), PYTHONUNBUFFERED="1")
+    log_file = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, str(VM_DIR / script), *args],
+        cwd=VM_DIR,
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def stop(proc: subprocess.Popen):
+    """SIGINT (desligamento gracioso: pool, ffmpeg e outbox são esperados) e wait."""
+    if proc.poll() is None:
+        proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=SHUTDOWN_TIMEOUT_S)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+# ── Gabarito × eventos ────────────────────────────────────────────────────
+
+def served_occurrences(state: BenchState, until: float) -> list[dict]:
+    """Cada keyword do manifest que de fato foi ao ar numa conexão, com o horário (epoch) do fim."""
+    occurrences = []
+    for fid, fixture in state.fixtures.items():
+        duration = fixture["duration_s"]
+        for start, end in state.connections[fid]:
+            if end is not None and end - start < MIN_CONNECTION_S:
+                continue
+            end = end or until
+            loop = 0
+            while start + loop * duration / state.speed < end:
+                for kw in fixture.get("keywords", []):
+                    for span_start, span_end in kw["spans"]:
+                        aired_end = start + (loop * duration + span_end) / state.speed
+                        if aired_end <= end:
+                            occurrences.append({
+                                "station_id": fid,
+                                "keyword": kw["keyword"],
+                                "aired_start": start + (loop * duration + span_start) / state.speed,
+                                "aired_end": aired_end,
+                                "latency_s": None,
+                            })
+                loop += 1
+    occurrences.sort(key=lambda o: o["aired_end"])
+    return occurrences
+
+
+def match_events(occurrences: list[dict], events: list[tuple[float, dict]]) -> tuple[int, int]:
+    """
+    Casa cada keyword de cada evento com a ocorrência mais antiga ainda não
+    detectada da mesma estação/keyword que já tinha começado a ir ao ar.
+    Retorna (falsos positivos, duplicados).
+    """
+    false_positives = duplicates = 0
+    for received_at, event in sorted(events, key=lambda e: e[0]):
+        for keyword in event.get("detectedKeywords", []):
+            candidates = [
+                o for o in occurrences
+                if o["station_id"] == event.get("stationId")
+                and o["keyword"] == keyword
+                and o["aired_start"] <= received_at <= o["aired_end"] + MAX_LATENCY_S
+            ]
+            pending = [o for o in candidates if o["latency_s"] is None]
+            if pending:
+                pending[0]["latency_s"] = received_at - pending[0]["aired_end"]
+            elif candidates:
+                duplicates += 1
+            else:
+                false_positives += 1
+    return false_positives, duplicates
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+# ── Relatório ─────────────────────────────────────────────────────────────
+
+def machine_info() -> dict:
+    cpu_model = ""
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu_model = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), "")
+    except OSError:
+        pass
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=VM_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "cpu_model": cpu_model,
+        "git_commit": commit,
+    }
+
+
+def matcher_throughput(manifest_keywords: list[str]) -> dict:
+    rng = random.Random(42)
+    texts = make_texts(50, 80, rng)
+    own = KeywordMatcher([{"keyword": k} for k in manifest_keywords])
+    large = KeywordMatcher(make_keywords(1000, rng))
+    return {
+        "manifest_keywords": round(ops_per_sec(own.match, texts)),
+        "keywords_1000": round(ops_per_sec(large.match, texts)),
+    }
+
+
+COMPARE_KEYS = [
+    ("throughput", "station_hours_per_core_hour"),
+    ("latency_s", "p50"),
+    ("latency_s", "p90"),
+    ("detection", "recall"),
+    ("detection", "false_positives"),
+    ("memory", "peak_rss_mb"),
+    ("matcher_ops_per_sec", "keywords_1000"),
+]
+
+
+def print_summary(result: dict, previous: dict | None = None):
+    print()
+    print(f"{'métrica':<44} {'atual':>12} {'anterior':>12}")
+    for section, key in COMPARE_KEYS:
+        now = result.get(section, {}).get(key)
+        before = (previous or {}).get(section, {}).get(key)
+        fmt = lambda v: "—" if v is None else (f"{v:.3f}" if isinstance(v, float) else str(v))  # noqa: E731
+        print(f"{section + '.' + key:<44} {fmt(now):>12} {fmt(before) if previous else '':>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=300, help="segundos de monitoramento")
+    parser.add_argument("--speed", type=float, default=1.0, help="velocidade das fake streams (1 = tempo real)")
+    parser.add_argument("--grace", type=float, default=45, help="keywords no ar nos últimos N s não contam")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR)
+    parser.add_argument("--musicas", action="store_true", help="roda também o musicas.py (ACRCloud falso)")
+    parser.add_argument("--chunked", action="store_true", help="monitor.py --chunked")
+    parser.add_argument("--set", nargs="*", default=[], metavar="CHAVE=VALOR", help="extras do config.json")
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--compare", type=Path, help="resultado anterior (JSON) para comparar")
+    args = parser.parse_args()
+
+    fixtures = load_manifest(args.fixtures)
+    state = BenchState(fixtures, speed=args.speed)
+    server = StubServer(state).start()
+    workdir = Path(tempfile.mkdtemp(prefix="radio-bench-"))
+    metrics_port, musicas_port = free_port(), free_port()
+    config = {
+        "saas_url": server.base_url,
+        "radio_monitor_secret": SECRET,
+        "outbox_dir": str(workdir),
+        "pcm_socket": str(workdir / "pcm.sock"),
+        "metrics_port": metrics_port,
+        "musicas_metrics_port": musicas_port,
+        "log_console": True,  # stdout vai para workdir/*.log (o "auto" desligaria)
+        **parse_set(args.set),
+    }
+    config_path = workdir / "config.json"
+    config_path.write_text(json.dumps(config, indent=2), encoding="utf-8")
+    print(f"Stubs em {server.base_url} | {len(fixtures)} fixture(s) | logs em {workdir}")
+
+    usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    procs = [launch("monitor.py", config_path, workdir / "monitor.log", ["--chunked"] if args.chunked else [])]
+    if args.musicas:
+        procs.append(launch("musicas.py", config_path, workdir / "musicas.log", []))
+
+    started = time.time()
+    peak_rss = 0
+    decoded_bytes = 0.0
+    while time.time() - started < args.duration and all(p.poll() is None for p in procs):
+        peak_rss = max(peak_rss, tree_rss_bytes([p.pid for p in procs]))
+        time.sleep(RSS_POLL_S)
+    # Último scrape antes do desligamento (o contador some com o processo)
+    decoded_bytes = scrape_counter(metrics_port, "radio_monitor_decoded_bytes_total")
+    vosk_audio_s = scrape_counter(metrics_port, "radio_monitor_vosk_audio_seconds_total")
+    stopped_at = time.time()
+    for proc in procs:
+        stop(proc)
+    usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    server.stop()
+
+    crashed = [p.args[1] for p in procs if p.returncode not in (0, -signal.SIGINT)]
+    if stopped_at - started < args.duration:
+        print(f"Aviso: processo encerrou antes do fim ({', '.join(crashed) or '?'}) — veja os logs em {workdir}")
+
+    cpu_s = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    audio_s = decoded_bytes / BYTES_PER_AUDIO_S
+
+    occurrences = served_occurrences(state, stopped_at)
+    false_positives, duplicates = match_events(occurrences, state.events)
+    expected = [o for o in occurrences if o["aired_end"] <= stopped_at - args.grace or o["latency_s"] is not None]
+    latencies = [o["latency_s"] for o in expected if o["latency_s"] is not None]
+
+    per_fixture = []
+    for fid, fixture in state.fixtures.items():
+        own = [o for o in expected if o["station_id"] == fid]
+        per_fixture.append({
+            "file": fixture["file"],
+            "expected": len(own),
+            "detected": sum(1 for o in own if o["latency_s"] is not None),
+            "events": sum(1 for _, e in state.events if e.get("stationId") == fid),
+            "connections": len(state.connections[fid]),
+        })
+
+    result = {
+        "timestamp": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "params": {
+            "duration_s": args.duration,
+            "speed": args.speed,
+            "grace_s": args.grace,
+            "stations": len(fixtures),
+            "musicas": args.musicas,
+            "chunked": args.chunked,
+            "config": {k: v for k, v in config.items() if k not in ("radio_monitor_secret",)},
+        },
+        "throughput": {
+            "wall_s": round(stopped_at - started, 1),
+            "audio_decoded_s": round(audio_s, 1),
+            "audio_to_vosk_s": round(vosk_audio_s, 1),
+            "cpu_s": round(cpu_s, 1),
+            "station_hours_per_core_hour": round(audio_s / cpu_s, 2) if cpu_s else None,
+            "realtime_cores": round(cpu_s / (stopped_at - started), 2),
+        },
+        "latency_s": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "max": max(latencies) if latencies else None,
+            "mean": round(statistics.mean(latencies), 2) if latencies else None,
+        },
+        "detection": {
+            "expected": len(expected),
+            "detected": len(latencies),
+            "recall": round(len(latencies) / len(expected), 3) if expected else None,
+            "false_positives": false_positives,
+            "duplicates": duplicates,
+            "per_fixture": per_fixture,
+        },
+        "memory": {
+            "peak_rss_mb": round(peak_rss / 2**20, 1),
+            # ru_maxrss (KiB no Linux) = maior processo individual já encerrado e esperado
+            "max_process_rss_mb": round(usage_after.ru_maxrss / 1024, 1),
+        },
+        "songs": {"acr_calls": state.acr_calls, "received": len(state.songs)},
+        "health_reports": len(state.health),
+        "matcher_ops_per_sec": matcher_throughput(
+            sorted({kw["keyword"] for f in fixtures for kw in f.get("keywords", [])})
+        ),
+    }
+    for key in ("p50", "p90", "max"):
+        if result["latency_s"][key] is not None:
+            result["latency_s"][key] = round(result["latency_s"][key], 2)
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    out_path = args.out / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    out_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    previous = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    print_summary(result, previous)
+    print(f"\nResultado: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Benchmark — servidores locais no lugar das rádios, do SAAS e do ACRCloud
+========================================================================
+
+  - FakeStreams: cada fixture WAV vira uma "rádio" em /stream/<id>, tocada
+    em loop no ritmo real (ou `speed`× mais rápido). Guarda início e fim
+    de cada conexão, para saber quando cada trecho foi ao ar.
+  - StubSaas: /api/radio-monitor-config (estações apontando para as
+    FakeStreams + keywords do manifest) e os POSTs de evento, música, lote
+    e saúde — cada item recebido fica registrado com o horário de chegada.
+    /api/radio-monitor-nodes guarda os leases do sharding em memória: dá
+    para subir vários monitor.py com "sharding": true e node_id diferentes
+    e matar um para ver os outros assumirem as estações dele.
+  - MockAcr: /v1/identify responde a primeira música do manifest (score 100,
+    com play_offset_ms/duration_ms — exercita o cache "tocando agora").
+
+Uso isolado (para rodar monitor.py/musicas.py à mão contra os stubs):
+  python3 bench/stubs.py --port 8790
+  # config.json: "saas_url": "http://127.0.0.1:8790", "radio_monitor_secret": "bench"
+"""
+
+import argparse
+import json
+import struct
+import sys
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+SECRET = "bench"
+CHUNK_S = 0.1                 # Granularidade do envio das fake streams
+
+
+def load_manifest(fixtures_dir: Path = FIXTURES_DIR) -> list[dict]:
+    """Fixtures do manifest.json (gerado por make_fixtures.py ou escrito à mão)."""
+    manifest = fixtures_dir / "manifest.json"
+    if not manifest.exists():
+        sys.exit(f"{manifest} não encontrado — rode antes: python3 bench/make_fixtures.py")
+    fixtures = json.loads(manifest.read_text(encoding="utf-8"))["fixtures"]
+    for i, fixture in enumerate(fixtures):
+        fixture.setdefault("id", f"00000000-0000-4000-8000-{i + 1:012d}")
+        with wave.open(str(fixtures_dir / fixture["file"]), "rb") as w:
+            if (w.getnchannels(), w.getsampwidth()) != (1, 2):
+                sys.exit(f"{fixture['file']}: use WAV mono 16-bit")
+            fixture["sample_rate"] = w.getframerate()
+            fixture["pcm"] = w.readframes(w.getnframes())
+        fixture["duration_s"] = len(fixture["pcm"]) / (fixture["sample_rate"] * 2)
+    return fixtures
+
+
+def _wav_header(sample_rate: int) -> bytes:
+    """Header WAV de tamanho "infinito" — o ffmpeg lê como stream ao vivo."""
+    size = 0xFFFFFFFF - 36
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVEfmt "
+        + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", size)
+    )
+
+
+class BenchState:
+    """Tudo que os stubs registram durante uma rodada (lido pelo run_bench.py)."""
+
+    def __init__(self, fixtures: list[dict], speed: float = 1.0, acr_base: str = ""):
+        self.fixtures = {f["id"]: f for f in fixtures}
+        self.speed = speed
+        self.acr_base = acr_base
+        self.lock = threading.Lock()
+        # [início, fim] de cada conexão a cada fake stream (fim None = ainda aberta)
+        self.connections: dict[str, list[list]] = {fid: [] for fid in self.fixtures}
+        self.events: list[tuple[float, dict]] = []
+        self.songs: list[tuple[float, dict]] = []
+        self.health: list[tuple[float, dict]] = []
+        # (papel, node_id) → (lease vence em, peso)
+        self.nodes: dict[tuple[str, str], tuple[float, float]] = {}
+        self.acr_calls = 0
+        self.requests = 0
+
+    def config(self, base_url: str) -> dict:
+        keywords = {}
+        for fixture in self.fixtures.values():
+            for kw in fixture.get("keywords", []):
+                keywords.setdefault(kw["keyword"], {
+                    "id": f"kw-{len(keywords) + 1}",
+                    "keyword": kw["keyword"],
+                    "category": "promotion",
+                    "priority": kw.get("priority", "medium"),
+                    "stationId": None,
+                })
+        return {
+            "stations": [
+                {"id": fid, "name": f.get("name", fid), "streamUrl": f"{base_url}/stream/{fid}", "city": "Bench"}
+                for fid, f in self.fixtures.items()
+            ],
+            "keywords": list(keywords.values()),
+            "acrcloud": {"host": self.acr_base, "access_key": "bench", "access_secret": "bench"},
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.0"
+    server: "StubServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        state = self.server.state
+        with state.lock:
+            state.requests += 1
+        if self.path.startswith("/stream/"):
+            self._stream(self.path.rsplit("/", 1)[-1])
+        elif self.path == "/api/radio-monitor-config":
+            if self.headers.get("x-radio-monitor-key") != SECRET:
+                self._json(401, {"error": "Unauthorized"})
+                return
+            self._json(200, state.config(self.server.base_url))
+        else:
+            self._json(404, {"error": "not found"})
+
+    def _stream(self, fixture_id: str):
+        state = self.server.state
+        fixture = state.fixtures.get(fixture_id)
+        if fixture is None:
+            self._json(404, {"error": "unknown stream"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav")
+        self.end_headers()
+        rate = fixture["sample_rate"]
+        pcm = fixture["pcm"]
+        chunk = int(rate * CHUNK_S) * 2
+        started = time.time()
+        connection = [started, None]
+        with state.lock:
+            state.connections[fixture_id].append(connection)
+        try:
+            self.wfile.write(_wav_header(rate))
+            sent = 0
+            while not self.server.stopping:
+                pos = sent % len(pcm)
+                block = pcm[pos:pos + chunk]
+                self.wfile.write(block)
+                sent += len(block)
+                # Ritmo de rádio ao vivo: não adianta o áudio além de `speed`× o tempo real
+                ahead = started + sent / (rate * 2) / state.speed - time.time()
+                if ahead > 0:
+                    time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            connection[1] = time.time()
+
+    def do_POST(self):
+        state = self.server.state
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+        now = time.time()
+        with state.lock:
+            state.requests += 1
+        if self.path == "/v1/identify":
+            self._identify()
+            return
+        if self.path == "/api/radio-monitor-nodes":
+            self._nodes(body, now)
+            return
+        if self.headers.get("x-radio-monitor-key") != SECRET:
+            self._json(401, {"error": "Unauthorized"})
+            return
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            self._json(400, {"error": "Invalid JSON"})
+            return
+
+        with state.lock:
+            if self.path == "/api/radio-monitor-event":
+                state.events.append((now, data))
+            elif self.path == "/api/radio-monitor-song":
+                state.songs.append((now, data))
+            elif self.path == "/api/radio-monitor-batch":
+                state.events.extend((now, e) for e in data.get("events", []))
+                state.songs.extend((now, s) for s in data.get("songs", []))
+            elif self.path == "/api/radio-monitor-health":
+                state.health.extend((now, h) for h in data.get("stations", []))
+            else:
+                self._json(404, {"error": "not found"})
+                return
+        if self.path == "/api/radio-monitor-batch":
+            empty = {"rejected": [], "failed": []}
+            self._json(200, {"success": True, "events": empty, "songs": empty})
+        else:
+            self._json(200, {"success": True})
+
+    def _nodes(self, body: bytes, now: float):
+        """Leases do sharding, como o SAAS: renova (ou libera) e devolve os nós vivos do papel."""
+        if self.headers.get("x-radio-monitor-key") != SECRET:
+            self._json(401, {"error": "Unauthorized"})
+            return
+        data = json.loads(body or b"{}")
+        state = self.server.state
+        key = (data.get("role", "monitor"), data["nodeId"])
+        with state.lock:
+            if data.get("release"):
+                state.nodes.pop(key, None)
+            else:
+                state.nodes[key] = (now + float(data.get("leaseS", 30)), float(data.get("weight", 1)))
+            live = [
+                {"nodeId": node_id, "weight": weight}
+                for (role, node_id), (expires, weight) in sorted(state.nodes.items())
+                if role == key[0] and expires > now
+            ]
+        self._json(200, {"success": True, "nodes": live})
+
+    def _identify(self):
+        """ACRCloud falso: sempre a primeira música do manifest (ou "não identificado")."""
+        state = self.server.state
+        with state.lock:
+            state.acr_calls += 1
+        song = next((f["song"] for f in state.fixtures.values() if f.get("song")), None)
+        if song is None:
+            self._json(200, {"status": {"code": 1001, "msg": "No result"}})
+            return
+        self._json(200, {
+            "status": {"code": 0, "msg": "Success"},
+            "metadata": {"music": [{
+                "title": song["title"],
+                "artists": [{"name": song["artist"]}],
+                "album": {"name": song.get("album", "")},
+                "release_date": song.get("release_date", ""),
+                "score": 100,
+                "play_offset_ms": song.get("play_offset_ms", 30000),
+                "duration_ms": song.get("duration_ms", 200000),
+            }]},
+        })
+
+
+class StubServer(ThreadingHTTPServer):
+    """Um único servidor HTTP faz as vezes de rádios, SAAS e ACRCloud."""
+
+    daemon_threads = True
+
+    def __init__(self, state: BenchState, port: int = 0, host: str = "127.0.0.1"):
+        super().__init__((host, port), _Handler)
+        self.state = state
+        self.stopping = False
+        self.base_url = f"http://{host}:{self.server_address[1]}"
+        if not state.acr_base:
+            state.acr_base = self.base_url
+        self._thread = threading.Thread(target=self.serve_forever, name="bench-stubs", daemon=True)
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.stopping = True
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = StubServer(BenchState(load_manifest(), speed=args.speed), port=args.port).start()
+    print(f"Stubs em {server.base_url} (secret: {SECRET!r}) — Ctrl+C para sair")
+    try:
+        while True:
+            time.sleep(5)
+            s = server.state
+            now = time.time()
+            nodes = sorted(n for (_, n), (expires, _) in s.nodes.items() if expires > now)
+            print(
+                f"eventos={len(s.events)} músicas={len(s.songs)} acr={s.acr_calls} saúde={len(s.health)} "
+                f"nós={','.join(nodes) or '-'}"
+            )
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
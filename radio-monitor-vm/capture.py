@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Captura contínua de streams
+=================================================
+
+Mantém um único processo ffmpeg de longa duração por estação, decodificando
+o stream para PCM 16 kHz mono 16-bit (s16le) e entregando blocos de áudio
+ao consumidor à medida que chegam. Se o stream cair ou travar, o ffmpeg é
+encerrado e reaberto automaticamente com backoff exponencial.
+
+Uso (dentro do monitor.py):
+  stream = StationStream(station_id, name, url, on_pcm=callback)
+  stream.start()
+  ...
+  stream.stop()
+"""
+
+import logging
+import os
+import select
+import subprocess
+import threading
+import time
+from typing import Callable
+
+log = logging.getLogger("radio-monitor")
+
+# ── Configuração ───────────────────────────────────────────────────────────
+
+SAMPLE_RATE = 16000           # Hz — padrão VOSK
+BYTES_PER_SAMPLE = 2          # 16-bit mono
+BLOCK_DURATION_S = 0.5        # Granularidade da entrega ao consumidor
+STALL_TIMEOUT_S = 20          # Sem bytes por esse tempo = stream travado
+RECONNECT_MIN_S = 2           # Backoff inicial após queda
+RECONNECT_MAX_S = 120         # Backoff máximo entre tentativas
+HEALTHY_AFTER_S = 60          # Conexão estável por esse tempo zera o backoff
+
+
+def build_ffmpeg_cmd(stream_url: str, sample_rate: int = SAMPLE_RATE) -> list[str]:
+    """Monta o comando ffmpeg que decodifica o stream para PCM s16le no stdout."""
+    cmd = ["ffmpeg", "-loglevel", "quiet", "-nostdin"]
+    if stream_url.startswith(("http://", "https://")):
+        # Reconexão do próprio ffmpeg cobre quedas curtas sem reabrir o processo
+        cmd += [
+            "-reconnect", "1",
+            "-reconnect_streamed", "1",
+            "-reconnect_delay_max", "10",
+        ]
+    cmd += [
+        "-i", stream_url,
+        "-vn",                         # ignora capas/vídeo embutidos
+        "-ar", str(sample_rate),       # sample rate
+        "-ac", "1",                    # mono
+        "-f", "s16le",                 # PCM cru, sem header WAV
+        "pipe:1",
+    ]
+    return cmd
+
+
+class StationStream(threading.Thread):
+    """
+    Captura contínua de uma estação: um ffmpeg de longa duração por stream.
+
+    `on_pcm(block, captured_at)` é chamado na thread de captura para cada
+    bloco de BLOCK_DURATION_S segundos, onde `captured_at` é o horário
+    (epoch) estimado do primeiro sample do bloco. O callback deve ser rápido
+    — trabalho pesado (transcrição) deve ir para uma fila.
+
+    `on_failure(reason, retry_in_s)` (opcional) é chamado a cada queda, com
+    o motivo e em quantos segundos a reconexão será tentada.
+    """
+
+    def __init__(
+        self,
+        station_id: str,
+        name: str,
+        stream_url: str,
+        on_pcm: Callable[[bytes, float], None],
+        sample_rate: int = SAMPLE_RATE,
+        on_failure: Callable[[str, float], None] | None = None,
+    ):
+        super().__init__(name=f"capture-{name}", daemon=True)
+        self.station_id = station_id
+        self.station_name = name
+        self.stream_url = stream_url
+        self.on_pcm = on_pcm
+        self.on_failure = on_failure
+        self.sample_rate = sample_rate
+        self.block_bytes = int(sample_rate * BLOCK_DURATION_S) * BYTES_PER_SAMPLE
+
+        self._stop_event = threading.Event()
+        self._proc: subprocess.Popen | None = None
+        self.reconnects = 0
+        self.bytes_received = 0
+
+    # ── Ciclo de vida ─────────────────────────────────────────────────────
+
+    def stop(self):
+        """Sinaliza parada e encerra o ffmpeg em execução."""
+        self._stop_event.set()
+        self._kill_proc()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def run(self):
+        backoff = RECONNECT_MIN_S
+        while not self.stopped:
+            connected_at = time.time()
+            reason = "stream encerrado"
+            try:
+                reason = self._run_once()
+            except FileNotFoundError:
+                log.error("ffmpeg não encontrado. Instale com: sudo apt install ffmpeg -y")
+                return
+            except Exception as e:
+                reason = str(e)
+                log.warning(f"[{self.station_name}] Erro na captura contínua: {e}")
+            finally:
+                self._kill_proc()
+
+            if self.stopped:
+                break
+
+            # Conexão que durou bastante conta como saudável: recomeça o backoff
+            if time.time() - connected_at >= HEALTHY_AFTER_S:
+                backoff = RECONNECT_MIN_S
+
+            self.reconnects += 1
+            if self.on_failure is not None:
+                self.on_failure(reason, backoff)
+            log.warning(
+                f"[{self.station_name}] Stream interrompido — reconectando em {backoff}s "
+                f"(tentativa {self.reconnects})"
+            )
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_S)
+
+    # ── Internos ──────────────────────────────────────────────────────────
+
+    def _run_once(self) -> str:
+        """Abre o ffmpeg e lê blocos até EOF, travamento ou parada. Retorna o motivo da saída."""
+        self._proc = subprocess.Popen(
+            build_ffmpeg_cmd(self.stream_url, self.sample_rate),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL,
+            bufsize=0,
+        )
+        fd = self._proc.stdout.fileno()
+        log.info(f"[{self.station_name}] Captura contínua conectada")
+
+        # Bloco pré-alocado: o kernel escreve direto nele (readv), sem bytes intermediários
+        block = bytearray(self.block_bytes)
+        view = memoryview(block)
+        filled = 0
+        block_duration = self.block_bytes / (self.sample_rate * BYTES_PER_SAMPLE)
+        while not self.stopped:
+            ready, _, _ = select.select([fd], [], [], STALL_TIMEOUT_S)
+            if not ready:
+                log.warning(f"[{self.station_name}] Sem áudio há {STALL_TIMEOUT_S}s — stream travado")
+                return f"sem áudio há {STALL_TIMEOUT_S}s"
+            n = os.readv(fd, [view[filled:]])
+            if not n:
+                return "stream encerrado"  # EOF: ffmpeg saiu (stream caiu)
+            filled += n
+            self.bytes_received += n
+            if filled == self.block_bytes:
+                # Uma única cópia imutável por bloco, compartilhada por todos os consumidores
+                self.on_pcm(bytes(block), time.time() - block_duration)
+                filled = 0
+        return "parado"
+
+    def _kill_proc(self):
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            proc.terminate()
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        except Exception:
+            pass
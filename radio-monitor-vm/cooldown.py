@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Cooldown e agrupamento de detecções
+=========================================================
+
+Uma keyword repetida pelo locutor, um comercial que volta a cada poucos
+minutos ou uma menção que cai em duas capturas sobrepostas virariam, cada
+uma, um evento no SAAS (uma linha no banco e uma mensagem no Telegram).
+
+Por estação e keyword, a primeira detecção sai na hora como evento normal,
+com um `eventKey`, e abre uma janela. As repetições seguintes só contam
+ocorrências enquanto chegarem a menos de `cooldown_s` da anterior (e a
+janela tiver menos de `max_span_s`). Quando a janela fecha, se houve
+repetição, sai uma única atualização do mesmo `eventKey` com o total de
+ocorrências e o intervalo (primeira/última). Um evento com várias keywords
+abre uma janela por keyword, todas com o mesmo `eventKey`; cada atualização
+leva só a sua keyword em `detectedKeywords` e o SAAS guarda a contagem por
+keyword. O SAAS faz upsert pelo `eventKey` e não notifica de novo.
+
+Detecções a menos de SAME_OCCURRENCE_S uma da outra (no horário do ar) são
+a mesma menção — capturas sobrepostas, parcial + final — e não contam.
+
+As janelas abertas ficam em SQLite: reiniciar o monitor não abre eventos
+novos para o que já estava em cooldown.
+
+Uso:
+  coalescer = DetectionCoalescer(Path("coalesce.db"), cooldown_s=600)
+  payload = coalescer.admit(payload, [("promoção", epoch_no_ar), ...])  # None = tudo em cooldown
+  for update in coalescer.due(): outbox.put("event", update)
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from metrics import REGISTRY
+
+log = logging.getLogger("radio-monitor")
+
+# ── Configuração ───────────────────────────────────────────────────────────
+
+COOLDOWN_S = 600              # Repetição a menos disso da anterior entra no mesmo evento
+MAX_SPAN_S = 3600             # Janela mais longa que isso fecha (o SAAS recebe a contagem)
+SAME_OCCURRENCE_S = 2.0       # Detecções mais próximas que isso são a mesma menção
+
+BRASILIA_TZ = timezone(timedelta(hours=-3))
+
+# Campos do evento que não vão para a atualização (áudio e detalhes por ocorrência)
+UPDATE_DROP = ("audioSnippet", "audioMimeType", "audioStartedAt", "audioDurationS", "matches")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS windows (
+    station_id  TEXT    NOT NULL,
+    keyword     TEXT    NOT NULL,
+    event_key   TEXT    NOT NULL,
+    first_at    REAL    NOT NULL,
+    last_at     REAL    NOT NULL,
+    count       INTEGER NOT NULL,
+    base        TEXT    NOT NULL,
+    PRIMARY KEY (station_id, keyword)
+);
+"""
+
+# ── Métricas ───────────────────────────────────────────────────────────────
+
+SUPPRESSED = REGISTRY.counter(
+    "radio_monitor_detections_coalesced_total", "Detecções agrupadas num evento já enviado (cooldown)"
+)
+OPEN_WINDOWS = REGISTRY.gauge("radio_monitor_cooldown_windows", "Janelas de cooldown abertas")
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=BRASILIA_TZ).isoformat()
+
+
+class _Window:
+    __slots__ = ("event_key", "first_at", "last_at", "count", "base")
+
+    def __init__(self, event_key: str, first_at: float, last_at: float, count: int, base: dict):
+        self.event_key = event_key
+        self.first_at = first_at
+        self.last_at = last_at
+        self.count = count
+        self.base = base
+
+
+class DetectionCoalescer:
+    """
+    Janelas de cooldown por (estação, keyword). Thread-safe: o estágio de
+    match chama `admit`, o loop principal chama `due`. `db_path=None` guarda
+    só em memória (replay).
+    """
+
+    def __init__(
+        self,
+        db_path: Path | None,
+        cooldown_s: float = COOLDOWN_S,
+        max_span_s: float = MAX_SPAN_S,
+        logger: logging.Logger = log,
+    ):
+        self.cooldown_s = cooldown_s
+        self.max_span_s = max_span_s
+        self.log = logger
+        self._lock = threading.Lock()
+        self._windows: dict[tuple[str, str], _Window] = {}
+        self._closed: list[dict] = []  # atualizações de janelas fechadas dentro do admit
+        self._db = None
+        if db_path is not None:
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            for row in self._db.execute(
+                "SELECT station_id, keyword, event_key, first_at, last_at, count, base FROM windows"
+            ):
+                self._windows[(row[0], row[1])] = _Window(row[2], row[3], row[4], row[5], json.loads(row[6]))
+            if self._windows:
+                self.log.info(f"Cooldown: {len(self._windows)} janela(s) aberta(s) de execuções anteriores")
+
+    def start(self):
+        OPEN_WINDOWS.track(lambda: len(self._windows))
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ── API ───────────────────────────────────────────────────────────────
+
+    def admit(self, payload: dict, hits: list[tuple[str, float]]) -> dict | None:
+        """
+        Passa as detecções de um evento (keyword, horário no ar) pelo cooldown.
+        Retorna o evento só com as keywords que abriram janela (com `eventKey`
+        e `occurrences`), ou None se todas caíram em janelas já abertas.
+        """
+        station_id = payload["stationId"]
+        event_key = uuid.uuid4().hex
+        fresh, suppressed = [], 0
+        base = {k: v for k, v in payload.items() if k not in UPDATE_DROP}
+        with self._lock:
+            for keyword, at in sorted(hits, key=lambda h: h[1]):
+                key = (station_id, keyword)
+                window = self._windows.get(key)
+                # Janela aberta neste mesmo trecho não fecha nele (o eventKey é o deste evento)
+                if window is not None and keyword not in fresh and self._expired(window, at):
+                    self._close(key)
+                    window = None
+                if window is None:
+                    base_kw = {**base, "detectedKeywords": [keyword], "detectedAt": _iso(at)}
+                    window = self._windows[key] = _Window(event_key, at, at, 1, base_kw)
+                    if keyword not in fresh:
+                        fresh.append(keyword)
+                else:
+                    # Fora de ordem (arquivos em paralelo no replay) também conta
+                    if abs(at - window.last_at) > SAME_OCCURRENCE_S:
+                        window.count += 1
+                        window.first_at = min(window.first_at, at)
+                        window.last_at = max(window.last_at, at)
+                    # Repetir no mesmo trecho uma keyword que abriu janela agora não suprime nada
+                    if keyword not in fresh:
+                        suppressed += 1
+                self._save(key, window)
+
+        if suppressed:
+            SUPPRESSED.inc(suppressed)
+        if not fresh:
+            return None
+        event = dict(payload)
+        event["detectedKeywords"] = [k for k in payload["detectedKeywords"] if k in fresh]
+        if "matches" in event:
+            event["matches"] = [m for m in event["matches"] if m["keyword"] in fresh]
+        event["eventKey"] = event_key
+        event["occurrences"] = 1
+        return event
+
+    def due(self, now: float | None = None) -> list[dict]:
+        """Fecha as janelas vencidas; devolve as atualizações a enviar (janelas com repetição)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            for key, window in list(self._windows.items()):
+                if self._expired(window, now):
+                    self._close(key)
+            updates, self._closed = self._closed, []
+        return updates
+
+    def flush(self) -> list[dict]:
+        """Fecha todas as janelas (fim do replay)."""
+        with self._lock:
+            for key in list(self._windows):
+                self._close(key)
+            updates, self._closed = self._closed, []
+        return updates
+
+    # ── Internos ──────────────────────────────────────────────────────────
+
+    def _expired(self, window: _Window, now: float) -> bool:
+        return now - window.last_at > self.cooldown_s or now - window.first_at > self.max_span_s
+
+    def _close(self, key: tuple[str, str]):
+        window = self._windows.pop(key)
+        if self._db is not None:
+            self._db.execute("DELETE FROM windows WHERE station_id = ? AND keyword = ?", key)
+        if window.count > 1:
+            self._closed.append({
+                **window.base,
+                "eventKey": window.event_key,
+                "occurrences": window.count,
+                "detectedAt": _iso(window.first_at),
+                "lastDetectedAt": _iso(window.last_at),
+            })
+
+    def _save(self, key: tuple[str, str], window: _Window):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO windows (station_id, keyword, event_key, first_at, last_at, count, base) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*key, window.event_key, window.first_at, window.last_at, window.count,
+             json.dumps(window.base, ensure_ascii=False)),
+        )
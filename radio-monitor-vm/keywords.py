@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Matcher de palavras-chave
+===============================================
+
+Matcher multi-padrão pré-compilado (Aho-Corasick sobre tokens).
+
+As keywords são normalizadas (minúsculas, sem acentos) e quebradas em
+tokens uma única vez, quando a config do SAAS muda. A transcrição é
+tokenizada do mesmo jeito e percorrida uma vez só: o custo do match é
+proporcional ao número de palavras transcritas, não ao de keywords.
+
+Como o autômato trabalha com palavras inteiras, "ouro" não casa dentro de
+"tesouro" — diferente da antiga checagem por substring.
+
+Para o modo de keyword spotting, `KeywordIndex.grammar(station_id)` monta
+a gramática do VOSK (lista JSON de frases + "[unk]") com as keywords que
+valem para a estação.
+
+Match aproximado (opcional, `fuzzy=True`): o modelo pequeno erra nomes de
+marca e nomes próprios ("lojas renner" → "lojas rener", "promoção" →
+"promossão"). O FuzzyMatcher compara a chave fonética PT-BR da keyword
+com trechos da transcrição por distância de edição limitada; um BK-tree
+dos tokens das keywords escolhe os candidatos, então o custo não cresce
+com keywords × palavras. A similaridade mínima vem por keyword do SAAS (`fuzzyThreshold`,
+0-1; 1 = só exato) ou do padrão da VM.
+
+Uso:
+  index = KeywordIndex(keywords)          # uma vez por atualização de config
+  found = index.match(station_id, texto)  # para cada transcrição
+  grammar = index.grammar(station_id)     # KaldiRecognizer(model, 16000, grammar)
+  index = KeywordIndex(keywords, fuzzy=True, fuzzy_threshold=0.85)
+"""
+
+import json
+import re
+import unicodedata
+from functools import lru_cache
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+WORD_RE = re.compile(r"\w+")
+UNK = "[unk]"                 # Filler da gramática: tudo que não é keyword
+FUZZY_THRESHOLD = 0.85        # Similaridade mínima padrão (1 - distância/tamanho)
+FUZZY_MIN_CHARS = 5           # Chaves fonéticas menores só casam exato ("ouro" ≠ "outro")
+
+# Regras fonéticas PT-BR, aplicadas em ordem sobre o token já sem acentos.
+# Juntam grafias que soam igual e os erros típicos do VOSK em nomes.
+PHONETIC_RULES = [(re.compile(p), r) for p, r in (
+    (r"ph", "f"),
+    (r"[cs]h", "x"),
+    (r"lh", "l"),
+    (r"nh", "n"),
+    (r"h", ""),
+    (r"c(?=oes|ao)", "s"),          # -ção/-ções chegam sem cedilha
+    (r"sc(?=[eiy])", "s"),
+    (r"c(?=[eiy])", "s"),
+    (r"qu(?=[eiy])", "k"),
+    (r"g(?=[eiy])", "j"),
+    (r"gu(?=[eiy])", "g"),
+    (r"[cq]", "k"),
+    (r"z", "s"),
+    (r"w", "v"),
+    (r"y", "i"),
+    (r"(.)\1+", r"\1"),             # rr, ss, ll, nn...
+    (r"m(?=[^aeiou]|$)", "n"),      # nasal: "bem" ~ "ben", "campo" ~ "canpo"
+    (r"l(?=[^aeiou]|$)", "u"),      # "brasil" ~ "brasiu", "alto" ~ "auto"
+    (r"e(?=s?$)", "i"),             # vogais finais átonas
+    (r"o(?=s?$)", "u"),
+)]
+
+
+def fold(s: str) -> str:
+    """Minúsculas e sem acentos ("Promoção" → "promocao")."""
+    s = unicodedata.normalize("NFD", s.lower())
+    return "".join(c for c in s if unicodedata.category(c) != "Mn")
+
+
+def tokenize(text: str) -> list[str]:
+    """Quebra o texto normalizado em palavras (letras e dígitos)."""
+    return TOKEN_RE.findall(fold(text))
+
+
+@lru_cache(maxsize=65536)
+def phonetic(token: str) -> str:
+    """Chave fonética de um token já normalizado ("promossao" e "promocao" → "promosau")."""
+    for pattern, repl in PHONETIC_RULES:
+        token = pattern.sub(repl, token)
+    return token
+
+
+def bounded_distance(a: str, b: str, limit: int) -> int:
+    """Distância de Levenshtein, ou `limit + 1` assim que passar de `limit`."""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # Prefixo e sufixo comuns não mudam a distância (e são o caso comum: "rener"/"renner")
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return len(a) + len(b) if len(a) + len(b) <= limit else limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        left = i
+        for j, cb in enumerate(b, 1):
+            if ca == cb:
+                left = previous[j - 1]
+            else:
+                left = min(previous[j - 1], previous[j], left) + 1
+            current.append(left)
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class KeywordMatcher:
+    """
+    Autômato Aho-Corasick cujo alfabeto são tokens (palavras), não letras.
+
+    Cada keyword vira uma sequência de tokens; o casamento só acontece em
+    fronteiras de palavra. Keywords que normalizam para a mesma sequência
+    (ex.: "Promoção" e "promocao") compartilham o mesmo estado final.
+    """
+
+    def __init__(self, keywords: list[dict]):
+        self.keywords = list(keywords)
+        # Estado 0 = raiz. goto[s][token] → próximo estado
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        self._kw_len: list[int] = []  # nº de tokens de cada keyword
+
+        for idx, kw in enumerate(self.keywords):
+            tokens = tokenize(kw["keyword"])
+            self._kw_len.append(len(tokens))
+            self._add(tokens, idx)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    # ── Construção ────────────────────────────────────────────────────────
+
+    def _add(self, tokens: list[str], idx: int):
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][token] = nxt
+            state = nxt
+        self._out[state].append(idx)
+
+    def _build_failure_links(self):
+        # BFS: o fail de cada estado é o maior sufixo próprio que também é prefixo
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and token not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(token, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Herda as saídas do estado de falha (keywords que são sufixo)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    # ── Busca ─────────────────────────────────────────────────────────────
+
+    def find(self, tokens: list[str]) -> list[tuple[int, int, int]]:
+        """
+        Retorna todas as ocorrências como (índice_keyword, token_inicial, token_final),
+        com token_final exclusivo, na ordem em que terminam no texto.
+        """
+        goto, fail, out, kw_len = self._goto, self._fail, self._out, self._kw_len
+        hits = []
+        state = 0
+        for pos, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if out[state]:
+                end = pos + 1
+                for idx in out[state]:
+                    hits.append((idx, end - kw_len[idx], end))
+        return hits
+
+    def match(self, text: str) -> list[dict]:
+        """Keywords presentes no texto (sem repetição, na ordem da config)."""
+        return self.match_tokens(tokenize(text))
+
+    def match_tokens(self, tokens: list[str]) -> list[dict]:
+        """Como `match`, para um texto já tokenizado."""
+        found = {idx for idx, _, _ in self.find(tokens)}
+        return [self.keywords[idx] for idx in sorted(found)]
+
+
+class _BKTree:
+    """BK-tree de tokens fonéticos: busca por raio de edição sem varrer o vocabulário."""
+
+    def __init__(self, radius: int):
+        self.radius = radius
+        self._root: list | None = None  # [token, {distância: filho}]
+
+    def add(self, token: str):
+        if self._root is None:
+            self._root = [token, {}]
+            return
+        node = self._root
+        while True:
+            distance = bounded_distance(token, node[0], len(token) + len(node[0]))
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [token, {}]
+                return
+            node = child
+
+    def search(self, token: str) -> list[tuple[str, int]]:
+        """Tokens a até `radius` edições, com a distância."""
+        found = []
+        radius = self.radius
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            word, children = stack.pop()
+            distance = bounded_distance(token, word, len(token) + len(word))
+            if distance <= radius:
+                found.append((word, distance))
+            for d, child in children.items():
+                if distance - radius <= d <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+class FuzzyMatcher:
+    """
+    Match aproximado de frases sobre tokens fonéticos.
+
+    Os tokens distintos das keywords vão para um BK-tree; cada token da
+    transcrição é procurado nele uma vez (com cache — o vocabulário de uma
+    rádio se repete muito) e vira um conjunto de tokens de keyword
+    possíveis. A frase casa quando cada token dela está na posição certa e a
+    soma das distâncias cabe no limite da keyword. O custo por palavra
+    transcrita depende do nº de tokens parecidos, não do nº de keywords.
+    Como o VOSK só emite palavras do léxico, o erro fica dentro dos tokens:
+    a frase é comparada token a token, sem juntar nem quebrar palavras.
+    """
+
+    CACHE_MAX = 50000
+
+    def __init__(self, keywords: list[dict], threshold: float = FUZZY_THRESHOLD):
+        self.keywords = list(keywords)
+        self.threshold = threshold
+        self._phrases: list[list[str]] = []
+        self._limits: list[int] = []               # edições toleradas na frase (somando os tokens)
+        # 1º token → 2º token (None = keyword de um token só) → keywords
+        self._by_prefix: dict[str, dict[str | None, list[int]]] = {}
+        self._radius: dict[str, int] = {}          # maior limite de cada token indexado
+        self._cache: dict[str, dict[str, int]] = {}
+
+        for idx, kw in enumerate(self.keywords):
+            phrase = [phonetic(t) for t in tokenize(kw["keyword"])]
+            similarity = kw.get("fuzzyThreshold")
+            similarity = threshold if similarity is None else float(similarity)
+            if similarity >= 1:
+                phrase = []  # 1 = só o match exato
+            limit = _edit_limit("".join(phrase), similarity)
+            self._phrases.append(phrase)
+            self._limits.append(limit)
+            if not phrase:
+                continue
+            second = phrase[1] if len(phrase) > 1 else None
+            self._by_prefix.setdefault(phrase[0], {}).setdefault(second, []).append(idx)
+            for token in phrase:
+                # O limite vale para a frase, mas cada token tolera no máximo a sua parte
+                # (mínimo 1: em "carro zero" o erro pode estar no token curto, "carros")
+                share = max(1, int((1 - similarity) * len(token) + 1e-9)) if limit else 0
+                self._radius[token] = max(min(limit, share), self._radius.get(token, 0))
+        # Um BK-tree por raio: tokens com raio 1 não pagam a busca larga dos mais longos
+        self._trees: dict[int, _BKTree] = {}
+        for token, radius in self._radius.items():
+            if radius:
+                self._trees.setdefault(radius, _BKTree(radius)).add(token)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _lookup(self, token: str) -> dict[str, int]:
+        """Tokens de keyword que podem ser este token da transcrição → distância."""
+        found = self._cache.get(token)
+        if found is None:
+            if len(self._cache) >= self.CACHE_MAX:
+                self._cache.clear()
+            found = {token: 0} if token in self._radius else {}
+            for tree in self._trees.values():
+                for word, distance in tree.search(token):
+                    found[word] = distance
+            self._cache[token] = found
+        return found
+
+    def _phrase_distance(self, idx: int, options: list[dict[str, int]], pos: int, total: int) -> int | None:
+        """Distância da keyword a partir de `pos` (os 2 primeiros tokens já somados em `total`)."""
+        phrase, limit = self._phrases[idx], self._limits[idx]
+        if total > limit or pos + len(phrase) >= len(options):
+            return None
+        for offset in range(2, len(phrase)):
+            d = options[pos + offset].get(phrase[offset])
+            if d is None:
+                return None
+            total += d
+        return total if total <= limit else None
+
+    def find(self, tokens: list[str]) -> list[tuple[int, int, int]]:
+        """
+        Ocorrências como (índice_keyword, token_inicial, token_final), mesmo
+        formato do KeywordMatcher. Inclui casamentos exatos (o KeywordIndex
+        descarta os que o matcher exato já achou).
+        """
+        if not self._radius:
+            return []
+        options = [self._lookup(phonetic(t)) for t in tokens]
+        options.append({})
+        hits = []
+        for pos, found in enumerate(options[:-1]):
+            following = options[pos + 1]
+            for word, distance in found.items():
+                groups = self._by_prefix.get(word)
+                if groups:
+                    for idx in groups.get(None, ()):
+                        if distance <= self._limits[idx]:
+                            hits.append((idx, pos, pos + 1))
+                    # Só as keywords cujo 2º token também pode estar na transcrição
+                    if len(following) < len(groups):
+                        seconds = [(w, d) for w, d in following.items() if w in groups]
+                    else:
+                        seconds = [(w, following[w]) for w in groups if w in following]
+                    for second, d2 in seconds:
+                        for idx in groups[second]:
+                            total = self._phrase_distance(idx, options, pos, distance + d2)
+                            if total is not None:
+                                hits.append((idx, pos, pos + len(self._phrases[idx])))
+        return sorted(set(hits), key=lambda h: (h[2], h[1], h[0]))
+
+
+def _edit_limit(key: str, similarity: float) -> int:
+    """Edições toleradas para a chave com a similaridade mínima dada."""
+    if len(key) < FUZZY_MIN_CHARS:
+        return 0
+    return int((1 - similarity) * len(key) + 1e-9)
+
+
+def grammar_phrase(keyword: str) -> str:
+    """
+    Keyword → frase da gramática do VOSK: minúsculas e sem pontuação, mas
+    com acentos — o léxico do modelo PT-BR é acentuado ("promoção").
+    """
+    return " ".join(WORD_RE.findall(keyword.lower()))
+
+
+def _reuse_or_build(matcher: KeywordMatcher | None, keywords: list[dict]) -> KeywordMatcher:
+    if matcher is not None and matcher.keywords == keywords:
+        return matcher
+    return KeywordMatcher(keywords)
+
+
+def _reuse_or_build_fuzzy(matcher: FuzzyMatcher | None, keywords: list[dict], threshold: float) -> FuzzyMatcher:
+    if matcher is not None and matcher.keywords == keywords and matcher.threshold == threshold:
+        return matcher
+    return FuzzyMatcher(keywords, threshold)
+
+
+class KeywordIndex:
+    """
+    Índice estação → keywords, montado a cada atualização de config.
+
+    Keywords sem `stationId` são globais e valem para todas as estações;
+    as com `stationId` só são checadas na própria estação. O matcher global
+    é compartilhado, e cada estação com keywords próprias ganha um matcher
+    pequeno só com elas — evita copiar o autômato global por estação.
+
+    Com `fuzzy`, cada matcher exato ganha um FuzzyMatcher com as mesmas
+    keywords; o exato tem prioridade e o aproximado só acrescenta menções
+    em trechos onde o exato não achou aquela keyword.
+    """
+
+    def __init__(
+        self,
+        keywords: list[dict],
+        previous: "KeywordIndex | None" = None,
+        fuzzy: bool = False,
+        fuzzy_threshold: float = FUZZY_THRESHOLD,
+    ):
+        self.keywords = list(keywords)
+        self.fuzzy = fuzzy
+        by_station: dict[str, list[dict]] = {}
+        global_kws = []
+        for kw in self.keywords:
+            station_id = kw.get("stationId")
+            if station_id:
+                by_station.setdefault(station_id, []).append(kw)
+            else:
+                global_kws.append(kw)
+
+        # Com `previous`, matchers cujas keywords não mudaram são reaproveitados:
+        # mudar a keyword de uma estação só recompila o matcher daquela estação
+        old_global = previous.global_matcher if previous else None
+        old_stations = previous.station_matchers if previous else {}
+        self.global_matcher = _reuse_or_build(old_global, global_kws)
+        self.station_matchers = {
+            sid: _reuse_or_build(old_stations.get(sid), kws) for sid, kws in by_station.items()
+        }
+        self.global_fuzzy: FuzzyMatcher | None = None
+        self.station_fuzzy: dict[str, FuzzyMatcher] = {}
+        if fuzzy:
+            old_global_fuzzy = previous.global_fuzzy if previous else None
+            old_station_fuzzy = previous.station_fuzzy if previous else {}
+            self.global_fuzzy = _reuse_or_build_fuzzy(old_global_fuzzy, global_kws, fuzzy_threshold)
+            self.station_fuzzy = {
+                sid: _reuse_or_build_fuzzy(old_station_fuzzy.get(sid), kws, fuzzy_threshold)
+                for sid, kws in by_station.items()
+            }
+        self._grammars: dict[str, str] = {}
+
+    def count_for(self, station_id: str) -> int:
+        """Nº de keywords checadas na estação (globais + próprias)."""
+        own = self.station_matchers.get(station_id)
+        return len(self.global_matcher) + (len(own) if own else 0)
+
+    def find(self, station_id: str, tokens: list[str]) -> list[tuple[dict, int, int]]:
+        """Ocorrências na estação como (keyword, token_inicial, token_final)."""
+        hits = [
+            (self.global_matcher.keywords[idx], start, end)
+            for idx, start, end in self.global_matcher.find(tokens)
+        ]
+        own = self.station_matchers.get(station_id)
+        if own is not None:
+            hits += [(own.keywords[idx], start, end) for idx, start, end in own.find(tokens)]
+        if self.fuzzy:
+            hits += self._find_fuzzy(station_id, tokens, hits)
+        return hits
+
+    def _find_fuzzy(
+        self, station_id: str, tokens: list[str], exact: list[tuple[dict, int, int]]
+    ) -> list[tuple[dict, int, int]]:
+        """Ocorrências aproximadas que não se sobrepõem a um match exato da mesma keyword."""
+        hits = []
+        for matcher in (self.global_fuzzy, self.station_fuzzy.get(station_id)):
+            if matcher is None:
+                continue
+            for idx, start, end in matcher.find(tokens):
+                kw = matcher.keywords[idx]
+                if not any(k is kw and start < e and s < end for k, s, e in exact):
+                    hits.append((kw, start, end))
+        return hits
+
+    def find_words(self, station_id: str, words: list[dict]) -> list[tuple[dict, int, int]]:
+        """
+        Ocorrências sobre as palavras do VOSK (`{"word", "start", "end", "conf"}`),
+        como (keyword, primeira_palavra, última_palavra) — índices inclusivos.
+        """
+        tokens = []
+        token_word = []  # índice da palavra de origem de cada token
+        for i, w in enumerate(words):
+            for token in tokenize(w["word"]):
+                tokens.append(token)
+                token_word.append(i)
+        return [
+            (kw, token_word[start], token_word[end - 1])
+            for kw, start, end in self.find(station_id, tokens)
+        ]
+
+    def match(self, station_id: str, text: str) -> list[dict]:
+        """Keywords da estação presentes no texto (globais primeiro, sem repetição)."""
+        tokens = tokenize(text)
+        if self.fuzzy:
+            found = []
+            for kw, _, _ in self.find(station_id, tokens):
+                if not any(f is kw for f in found):
+                    found.append(kw)
+            return found
+        found = self.global_matcher.match_tokens(tokens)
+        own = self.station_matchers.get(station_id)
+        if own is not None:
+            found += own.match_tokens(tokens)
+        return found
+
+    def grammar(self, station_id: str) -> str:
+        """
+        Gramática de keyword spotting da estação (JSON): frases das keywords
+        globais e próprias + "[unk]". Mesmo texto para as mesmas keywords —
+        os workers reaproveitam o recognizer enquanto a config não muda.
+        """
+        grammar = self._grammars.get(station_id)
+        if grammar is None:
+            keywords = list(self.global_matcher.keywords)
+            own = self.station_matchers.get(station_id)
+            if own is not None:
+                keywords += own.keywords
+            phrases = sorted({grammar_phrase(kw["keyword"]) for kw in keywords} - {""})
+            grammar = self._grammars[station_id] = json.dumps(phrases + [UNK], ensure_ascii=False)
+        return grammar
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Logging não bloqueante, estruturado e com rotação
+=======================================================================
+
+O monitor.py e o musicas.py gravam log no caminho quente (cada transcrição,
+cada captura). Com um FileHandler síncrono, um disco lento segurava a
+captura, e o arquivo crescia sem limite.
+
+Aqui:
+  - quem loga só põe o registro numa fila (QueueHandler); uma thread
+    (QueueListener) grava no disco e no console. Fila cheia (disco travado)
+    descarta o registro em vez de bloquear — o total descartado vai no
+    próximo registro gravado (campo "dropped");
+  - arquivo com rotação por tamanho (RotatingFileHandler);
+  - no arquivo, um JSON por linha: ts, level, logger, msg e, quando o
+    código informa (`extra=fields(...)`), station, stage e duration_s;
+  - no console, o texto de sempre — desligado se o stdout já for um
+    arquivo (unit com StandardOutput=append:), para não duplicar o log;
+  - registros de transcrição (stage "transcribe") são amostrados: no máximo
+    um por estação a cada `log_transcripts_every_s`, com o nº de omitidos
+    no seguinte (campo "sampled_out"). Em DEBUG, passam todos.
+
+Configuração (config.json):
+  "log_level": "INFO"              DEBUG, INFO, WARNING, ERROR
+  "log_format": "json"             "text" grava no arquivo o formato do console
+  "log_max_mb": 20                 tamanho de cada arquivo antes de rotacionar
+  "log_backups": 5                 arquivos antigos mantidos (.1 … .5)
+  "log_console": "auto"            true/false força o console
+  "log_transcripts_every_s": 60    0 = loga toda transcrição
+
+Uso:
+  listener = setup_logging(Path("monitor.log"), CONFIG_FILE)
+  log.info("...", extra=fields(station="Rádio X", stage="transcribe", duration=1.2))
+  with listener.paused():                 # em volta de um fork (pool de processos)
+      pool = ProcessPoolExecutor(...)
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import stat
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# ── Configuração ───────────────────────────────────────────────────────────
+
+LOG_LEVEL = "INFO"
+LOG_MAX_MB = 20
+LOG_BACKUPS = 5
+TRANSCRIPTS_EVERY_S = 60      # Uma transcrição por estação no log a cada 60s
+QUEUE_SIZE = 10000            # Registros em espera antes de descartar
+STOP_TIMEOUT_S = 5            # No encerramento, espera a fila esvaziar até isso
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+FIELDS = ("station", "stage", "duration_s", "sampled_out", "dropped")
+
+BRASILIA_TZ = timezone(timedelta(hours=-3))
+
+
+def fields(station: str | None = None, stage: str | None = None, duration: float | None = None) -> dict:
+    """Campos estruturados do registro, para o `extra=` do logging."""
+    extra = {}
+    if station is not None:
+        extra["station"] = station
+    if stage is not None:
+        extra["stage"] = stage
+    if duration is not None:
+        extra["duration_s"] = round(duration, 3)
+    return extra
+
+
+# ── Handlers ───────────────────────────────────────────────────────────────
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=BRASILIA_TZ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que nunca bloqueia: com a fila cheia, descarta e conta."""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        # Chamado com o lock do handler: `dropped` não precisa de outro
+        dropped = self.dropped
+        if dropped:
+            record.dropped = dropped
+        try:
+            self.queue.put_nowait(record)
+            self.dropped -= dropped
+        except queue.Full:
+            self.dropped += 1
+
+
+class TranscriptSampler(logging.Filter):
+    """Deixa passar um registro de transcrição por estação a cada `every_s`."""
+
+    def __init__(self, every_s: float):
+        super().__init__()
+        self.every_s = every_s
+        self._lock = threading.Lock()
+        self._last: dict[str | None, float] = {}
+        self._skipped: dict[str | None, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "stage", None) != "transcribe" or record.levelno > logging.INFO:
+            return True
+        station = getattr(record, "station", None)
+        with self._lock:
+            if record.created - self._last.get(station, 0.0) < self.every_s:
+                self._skipped[station] = self._skipped.get(station, 0) + 1
+                return False
+            self._last[station] = record.created
+            skipped = self._skipped.pop(station, 0)
+        if skipped:
+            record.sampled_out = skipped
+        return True
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener cujo stop não trava nem falha com a fila cheia (disco parado)."""
+
+    def stop(self):
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(self._sentinel, timeout=STOP_TIMEOUT_S)
+        except queue.Full:
+            return  # a thread é daemon: o que ficou na fila se perde
+        self._thread.join(STOP_TIMEOUT_S)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:  # stop() que desistiu deixa a thread rodando
+            super().start()
+
+    @contextlib.contextmanager
+    def paused(self):
+        """
+        Para a thread de escrita durante um fork: o filho só herda a thread
+        que chamou o fork, e um lock que ela estivesse segurando (handler,
+        arquivo) ficaria preso no filho. Os registros do intervalo esperam
+        na fila.
+        """
+        self.stop()
+        try:
+            yield
+        finally:
+            self.start()
+
+
+def _stdout_is_file() -> bool:
+    try:
+        return stat.S_ISREG(os.fstat(sys.stdout.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def _read_config(config_path: Path | None) -> dict:
+    """Só as chaves de log; config ausente ou inválido fica com os padrões."""
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (TypeError, OSError, ValueError):
+        return {}
+
+
+# ── Setup ──────────────────────────────────────────────────────────────────
+
+def setup_logging(log_file: Path, config_path: Path | None = None) -> "_Listener":
+    """
+    Troca os handlers do logger raiz por um QueueHandler e sobe a thread que
+    grava arquivo (com rotação) e console. Para no atexit (esvazia a fila).
+    """
+    config = _read_config(config_path)
+    level = logging.getLevelName(str(config.get("log_level", LOG_LEVEL)).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+    text = logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=int(float(config.get("log_max_mb", LOG_MAX_MB)) * 1024 * 1024),
+        backupCount=int(config.get("log_backups", LOG_BACKUPS)),
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(JsonFormatter() if config.get("log_format", "json") == "json" else text)
+    handlers: list[logging.Handler] = [file_handler]
+
+    console = config.get("log_console", "auto")
+    if console is True or (console == "auto" and not _stdout_is_file()):
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(text)
+        handlers.append(stream)
+
+    log_queue: queue.Queue = queue.Queue(QUEUE_SIZE)
+    queue_handler = _DroppingQueueHandler(log_queue)
+    every_s = float(config.get("log_transcripts_every_s", TRANSCRIPTS_EVERY_S))
+    if every_s > 0 and level > logging.DEBUG:
+        queue_handler.addFilter(TranscriptSampler(every_s))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = _Listener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def worker_logging():
+    """
+    Processos filhos (fork) não herdam a thread do listener: registros
+    postos na fila herdada nunca seriam gravados. O worker loga direto no
+    stderr (o journal, sob systemd), só avisos e erros.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+    root.addHandler(stream)
+    root.setLevel(logging.WARNING)
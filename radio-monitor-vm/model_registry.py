@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Registro dos modelos VOSK
+===============================================
+
+Antes, a primeira pasta de modelo encontrada valia para todas as estações.
+Agora cada estação tem um tier ("modelTier" na config do SAAS; vazio =
+"default_model_tier") e cada tier aponta para uma pasta:
+
+  "vosk_models": {"small": "vosk-model-small-pt-0.3",
+                  "large": "vosk-model-pt-fb-v0.1.1-20220516_2113"}
+
+Sem "vosk_models", os tiers saem das pastas vosk-model* ao lado do script
+("small" no nome → "small"; as demais → "large"). O tier padrão é "small",
+se existir — o mesmo modelo que era escolhido antes.
+
+  - Carga sob demanda: um modelo só é carregado quando uma estação ativa
+    precisa dele. A partida não espera o modelo grande se nenhuma estação
+    usa.
+  - Compartilhado: no modo janela o processo principal carrega os tiers das
+    estações ativas antes de criar o pool (fork); os workers herdam o
+    modelo e as páginas ficam compartilhadas (copy-on-write), em vez de uma
+    cópia por worker. Tier que só aparece depois é carregado no worker que
+    precisar dele (cópia própria — o log avisa). No streaming, as threads
+    das estações já dividem um modelo por tier.
+  - Memória: cada carga mede o RSS do processo antes e depois (gauge
+    radio_monitor_vosk_model_bytes{tier}).
+  - Descarga: tier sem uso há "model_idle_unload_s" (padrão 1800s) é
+    solto; o VOSK libera o modelo quando o último recognizer dele some.
+
+Uso:
+  models = ModelRegistry.from_config(config, Path(__file__).parent)
+  model = models.get(models.tier(station))   # carrega na primeira vez
+  models.release_idle(in_use={"small"})      # de tempos em tempos
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from vosk import Model
+
+from metrics import REGISTRY
+
+log = logging.getLogger("radio-monitor")
+
+# ── Configuração ───────────────────────────────────────────────────────────
+
+DEFAULT_TIER = "small"
+IDLE_UNLOAD_S = 1800          # Tier sem uso há mais que isso é descarregado
+
+# Ordem de preferência das pastas conhecidas, por tier
+KNOWN_MODELS = {
+    "small": ["vosk-model-small-pt-0.3", "vosk-model-small-pt"],
+    "large": ["vosk-model-pt-fb-v0.1.1-20220516_2113", "vosk-model-pt"],
+}
+
+# ── Métricas ───────────────────────────────────────────────────────────────
+
+MODEL_BYTES = REGISTRY.gauge(
+    "radio_monitor_vosk_model_bytes", "Memória de cada modelo VOSK carregado (RSS medido na carga)", ("tier",)
+)
+MODEL_LOADS = REGISTRY.counter("radio_monitor_vosk_model_loads_total", "Cargas de modelo VOSK", ("tier",))
+
+
+def _rss_bytes() -> int:
+    """RSS do processo (Linux); 0 onde /proc não existe."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def discover_models(base_dir: Path) -> dict[str, str]:
+    """Tiers a partir das pastas vosk-model* em `base_dir`."""
+    found: dict[str, str] = {}
+    for tier, names in KNOWN_MODELS.items():
+        for name in names:
+            if (base_dir / name).is_dir():
+                found[tier] = str(base_dir / name)
+                break
+    for p in sorted(base_dir.iterdir()):
+        if p.is_dir() and p.name.startswith("vosk-model"):
+            found.setdefault("small" if "small" in p.name else "large", str(p))
+    return found
+
+
+class ModelRegistry:
+    """
+    Modelos VOSK por tier, carregados na primeira vez que são pedidos.
+    Thread-safe; cada processo (principal e workers) usa a sua instância
+    (os workers herdam a do principal no fork, com os modelos já carregados).
+    """
+
+    def __init__(
+        self,
+        paths: dict[str, str],
+        default_tier: str = DEFAULT_TIER,
+        idle_unload_s: float = IDLE_UNLOAD_S,
+        logger: logging.Logger = log,
+    ):
+        self.paths = dict(paths)
+        self.default_tier = default_tier if default_tier in self.paths else next(iter(self.paths), default_tier)
+        self.idle_unload_s = idle_unload_s
+        self.log = logger
+        self.in_worker = False
+        self._models: dict[str, Model] = {}
+        self._bytes: dict[str, int] = {}
+        self._used_at: dict[str, float] = {}
+        self._warned: set[str] = set()
+        self._lock = threading.Lock()
+        self._loading: dict[str, threading.Lock] = {}
+
+    @classmethod
+    def from_config(cls, config: dict, base_dir: Path, logger: logging.Logger = log) -> "ModelRegistry":
+        """Tiers do "vosk_models" (caminhos relativos à pasta do script) ou das pastas encontradas."""
+        configured = config.get("vosk_models")
+        if configured:
+            paths = {tier: str(base_dir / path) for tier, path in configured.items()}
+            for tier, path in paths.items():
+                if not Path(path).is_dir():
+                    logger.warning(f"Modelo VOSK do tier '{tier}' não encontrado: {path}")
+        else:
+            paths = discover_models(base_dir)
+        paths = {tier: path for tier, path in paths.items() if Path(path).is_dir()}
+        return cls(
+            paths,
+            default_tier=config.get("default_model_tier", DEFAULT_TIER),
+            idle_unload_s=float(config.get("model_idle_unload_s", IDLE_UNLOAD_S)),
+            logger=logger,
+        )
+
+    def start(self):
+        MODEL_BYTES.track(lambda: {(tier,): size for tier, size in list(self._bytes.items())})
+
+    def after_fork(self):
+        """No worker recém-criado: locks novos (os herdados podem ter ficado presos no fork)."""
+        self.in_worker = True
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def describe(self) -> str:
+        return ", ".join(
+            f"{tier}{' (padrão)' if tier == self.default_tier else ''}: {Path(path).name}"
+            for tier, path in self.paths.items()
+        )
+
+    # ── Tiers ─────────────────────────────────────────────────────────────
+
+    def tier(self, station: dict | None) -> str:
+        """Tier da estação; tier desconhecido nesta VM cai no padrão (avisa uma vez)."""
+        wanted = (station or {}).get("modelTier") or self.default_tier
+        if wanted in self.paths:
+            return wanted
+        if wanted not in self._warned:
+            self._warned.add(wanted)
+            self.log.warning(
+                f"Modelo VOSK do tier '{wanted}' não existe nesta VM — usando '{self.default_tier}'"
+            )
+        return self.default_tier
+
+    # ── Carga e descarga ──────────────────────────────────────────────────
+
+    def get(self, tier: str) -> Model:
+        """Modelo do tier, carregando na primeira vez (uma carga por tier, mesmo com várias threads)."""
+        with self._lock:
+            self._used_at[tier] = time.time()
+            model = self._models.get(tier)
+            if model is not None:
+                return model
+            loading = self._loading.setdefault(tier, threading.Lock())
+        with loading:
+            with self._lock:
+                model = self._models.get(tier)
+            if model is None:
+                model = self._load(tier)
+        return model
+
+    def preload(self, tiers: set[str]):
+        for tier in sorted(tiers):
+            self.get(tier)
+
+    def _load(self, tier: str) -> Model:
+        path = self.paths[tier]
+        where = f"no worker {os.getpid()} (não compartilhado)" if self.in_worker else ""
+        log_fn = self.log.warning if self.in_worker else self.log.info
+        log_fn(f"Carregando modelo VOSK '{tier}' de {path} {where}".rstrip() + "...")
+        rss_before, t0 = _rss_bytes(), time.time()
+        model = Model(path)
+        size = max(0, _rss_bytes() - rss_before)
+        with self._lock:
+            self._models[tier] = model
+            self._bytes[tier] = size
+            self._used_at[tier] = time.time()
+        MODEL_LOADS.inc(tier=tier)
+        log_fn(f"Modelo VOSK '{tier}' carregado em {time.time() - t0:.1f}s (~{size / 2**20:.0f} MB)")
+        return model
+
+    def release_idle(self, in_use: set[str] = frozenset(), now: float | None = None) -> list[str]:
+        """
+        Descarrega os tiers sem uso há idle_unload_s. `in_use` conta como uso
+        agora (tiers das estações ativas). Retorna os tiers descarregados.
+        """
+        now = time.time() if now is None else now
+        released = []
+        with self._lock:
+            for tier in in_use:
+                if tier in self._models:
+                    self._used_at[tier] = now
+            for tier in list(self._models):
+                if now - self._used_at.get(tier, now) > self.idle_unload_s:
+                    del self._models[tier]
+                    released.append((tier, self._bytes.pop(tier, 0)))
+        for tier, size in released:
+            if self.in_worker:
+                self.log.debug(f"Modelo VOSK '{tier}' descarregado no worker {os.getpid()}")
+            else:
+                self.log.info(f"Modelo VOSK '{tier}' sem uso — descarregado (~{size / 2**20:.0f} MB)")
+        return [tier for tier, _ in released]
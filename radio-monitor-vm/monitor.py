@@ -9,7 +9,7 @@ Quando detecta uma keyword, envia o evento de volta ao SAAS
 que notifica via Telegram (@lhfex_openclaw_bot).
 
 Requisitos:
-  pip3 install vosk requests
+  pip3 install vosk requests numpy
 
 Instalar VOSK PT-BR:
   wget https://alphacephei.com/vosk/models/vosk-model-small-pt-0.3.zip
@@ -19,15 +19,89 @@ Instalar VOSK PT-BR:
   wget https://alphacephei.com/vosk/models/vosk-model-pt-fb-v0.1.1-20220516_2113.zip
   unzip vosk-model-pt-fb-v0.1.1-20220516_2113.zip
 
+  Os dois podem conviver: cada estação usa o tier do "modelTier" dela no
+  SAAS ("small"/"large"; vazio = "default_model_tier", padrão "small"), e
+  cada modelo só é carregado quando alguma estação ativa precisa dele
+  ("vosk_models", "model_idle_unload_s" — ver model_registry.py).
+
 ffmpeg deve estar instalado:
   sudo apt install ffmpeg -y
 
 Configuração (config.json):
   Veja config.example.json — preencha SAAS_URL e RADIO_MONITOR_SECRET.
+  "capture_mode": "continuous" (padrão) mantém um ffmpeg por estação 24/7;
+  "chunked" volta ao modo antigo (um ffmpeg de 30s por estação por ciclo).
+  "transcribe_workers": N processos de transcrição (padrão: nº de CPUs).
+  "recognition_mode": "window" (padrão) transcreve janelas de 30s no pool;
+  "streaming" alimenta um KaldiRecognizer por estação em tempo real e checa
+  cada resultado finalizado na hora (requer captura contínua).
+  "partial_alerts": true também checa PartialResult() (alerta em ~1-2s).
+  "audio_snippets": true (padrão) anexa ao evento o áudio de SNIPPET_BEFORE_S
+  antes a SNIPPET_AFTER_S depois do trecho; "ring_seconds" define quanto
+  áudio recente fica em memória por estação (padrão 120s).
+  "speech_filter": "silence" (padrão) só descarta silêncio; "music" só manda
+  trechos de fala ao VOSK (ligar só depois que o benchmark da estação mostrar
+  que não perde keyword); "off" decodifica tudo (ver speech_filter.py).
+  "kws_mode": keyword spotting com gramática restrita (keywords + "[unk]",
+  refeita quando as keywords mudam). "only" troca a transcrição completa
+  pelo spotting (bem mais barato; não há texto completo para o arquivo de
+  transcrições); "verify" (só janelas) roda o spotting em toda janela e a
+  transcrição completa só onde ele achou keyword, para confirmar. "off"
+  (padrão) é só a transcrição completa. "kws_min_conf" (padrão 0.6).
+  "cooldown_s": repetições da mesma keyword na mesma estação a menos disso
+  da anterior (padrão 600s; 0 desliga) viram um evento só — o primeiro sai
+  na hora e, quando a janela fecha, uma atualização leva o nº de ocorrências
+  e o intervalo (ver cooldown.py). "coalesce_max_s" limita a janela (3600s).
+  "fuzzy_matching": true liga o match aproximado (fonético PT-BR + distância
+  de edição, ver keywords.py) para pegar nomes que o VOSK erra; a
+  similaridade mínima é o "fuzzyThreshold" de cada keyword no SAAS ou
+  "fuzzy_threshold" (padrão 0.85). Desligado (padrão), só o match exato.
+  "pcm_socket": socket Unix onde o áudio já decodificado de cada estação fica
+  disponível para o musicas.py (padrão: pcm.sock na pasta do script; "" desliga).
+  "outbox_dir": pasta do outbox-monitor.db, a fila em disco dos eventos
+  ainda não confirmados pelo SAAS (padrão: pasta do script).
+  "metrics_port": porta do endpoint /metrics (Prometheus) — latência por
+  estágio e por estação, real-time factor, filas, ffmpeg (ver metrics.py).
+  "transcript_archive": true (padrão) guarda toda transcrição finalizada,
+  com tempos por palavra, num SQLite FTS5 por dia ("archive_dir",
+  "archive_retention_days"); "archive_api_port" liga a busca local
+  (ver transcript_archive.py).
+  "log_level" (padrão "INFO"), "log_format" ("json" por linha ou "text"),
+  "log_max_mb"/"log_backups" (rotação) e "log_transcripts_every_s" (uma
+  transcrição por estação no log a cada N s; padrão 60) — ver logsetup.py.
+  "sharding": true divide as estações entre várias VMs — cada uma com seu
+  "node_id" (padrão: hostname) e "node_weight" (padrão 1), com lease de
+  "node_lease_s" (padrão 30s) renovado no SAAS; VM que cai tem as estações
+  assumidas pelas outras em até ~1,3 lease (ver sharding.py).
+  Outro arquivo de config: RADIO_MONITOR_CONFIG=/caminho/config.json
+  (usado pelo bench/run_bench.py).
+
+Saúde das estações (station_health.py): falhas seguidas abrem um circuit
+breaker com backoff exponencial (stream morto sai das capturas), estações
+com keywords de prioridade alta ou que mais rendem keywords são capturadas
+e transcritas primeiro, e o estado é enviado ao SAAS a cada HEALTH_REPORT_S.
+
+Replay/backfill (replay.py): `--replay` roda o mesmo pipeline sobre áudio
+gravado, mais rápido que o tempo real e em paralelo entre arquivos, com
+checkpoint para retomar; os eventos saem com o horário original (pasta =
+estação, nome do arquivo = horário, ex.: gravacoes/radio-um/20260131-140000.mp3).
+
+Uso:
+  python3 monitor.py             # modo definido em config.json
+  python3 monitor.py --chunked   # força o modo antigo por blocos
+  python3 monitor.py --replay gravacoes/ --keyword "loja central" --output eventos.jsonl
+  python3 monitor.py --replay gravacoes/radio-um/   # eventos para o SAAS (sem Telegram)
 """
 
+import argparse
+import base64
+import bisect
+import heapq
+import itertools
 import json
 import os
+import multiprocessing
+import struct
 import subprocess
 import time
 import threading
@@ -35,16 +109,33 @@ import queue
 import signal
 import sys
 import logging
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
-import requests
 from vosk import Model, KaldiRecognizer
 
+from capture import StationStream
+from cooldown import COOLDOWN_S, MAX_SPAN_S, DetectionCoalescer
+from keywords import FUZZY_THRESHOLD, UNK, KeywordIndex, KeywordMatcher, tokenize
+from logsetup import fields, setup_logging, worker_logging
+from metrics import REGISTRY, RTF_BUCKETS, start_metrics_server
+from model_registry import ModelRegistry
+from outbox import Outbox
+from pcm_share import PcmShareServer
+from replay import EventFileSink, ReplayCheckpoint, decode_windows, discover_audio_files, parse_air_time, parse_start
+from ringbuffer import PcmRingBuffer
+from saas_config import ConfigDiff, SaasConfigClient
+from sharding import LEASE_S, ShardMembership, default_node_id
+from speech_filter import MODES as SPEECH_FILTER_MODES, SpeechGate, speech_segments
+from station_health import HealthTracker, business_priorities
+from transcript_archive import ARCHIVE_DIR, RETENTION_DAYS, TranscriptArchive, start_archive_api
+
 # ── Configuração ───────────────────────────────────────────────────────────
 
-CONFIG_FILE = Path(__file__).parent / "config.json"
-VOSK_MODEL_DIR = None  # Detectado automaticamente (ver find_vosk_model())
+CONFIG_FILE = Path(os.environ.get("RADIO_MONITOR_CONFIG") or Path(__file__).parent / "config.json")
 
 SAMPLE_RATE = 16000          # Hz — padrão VOSK
 CHUNK_DURATION_S = 30        # Segundos de áudio capturado por ciclo
@@ -53,20 +144,77 @@ CHECK_INTERVAL_S = 15        # Intervalo entre checagens por estação
 CONFIG_REFRESH_S = 300       # Atualiza config do SAAS a cada 5 minutos
 SNIPPET_BEFORE_S = 10        # Segundos de contexto antes da keyword
 SNIPPET_AFTER_S = 10         # Segundos de contexto depois da keyword
+CAPTURE_MODE = "continuous"  # "continuous" (24/7) ou "chunked" (fallback antigo)
+WINDOW_QUEUE_MAX = 32        # Janelas de áudio aguardando transcrição
+STAGE_QUEUE_MAX = 64         # Itens entre os estágios match/post do pipeline
+MAX_CAPTURE_WORKERS = 16     # Capturas simultâneas no modo por blocos (I/O)
+RECOGNITION_MODE = "window"  # "window" (janelas de 30s) ou "streaming"
+PARTIAL_CHECK_S = 1.0        # Intervalo mínimo entre checagens de PartialResult()
+STREAM_GAP_S = 2.0           # Salto no áudio (reconexão) que encerra o enunciado
+STREAM_QUEUE_BLOCKS = 60     # Blocos de 0,5s aguardando o recognizer (30s)
+RECOGNIZER_STOP_S = 10       # Espera pelo enunciado final de um recognizer substituído
+RING_SECONDS = 120           # Áudio recente mantido por estação (para os recortes)
+CONTEXT_WORDS = 15           # Palavras de contexto em volta da keyword no evento
+SNIPPET_WAIT_MAX_S = 30      # Espera máxima pelo áudio "depois" antes de recortar
+SPEECH_FILTER = "silence"    # Pré-filtro antes do VOSK: "silence", "music" ou "off"
+KWS_MODE = "off"             # Keyword spotting: "off", "only" ou "verify"
+KWS_MODES = ("off", "only", "verify")
+KWS_MIN_CONF = 0.6           # Confiança mínima de uma keyword achada pela gramática
+WORKER_GRAMMARS_MAX = 64     # Recognizers com gramática mantidos por worker
+SPEECH_STATS_LOG_S = 600     # Intervalo do relatório de % de fala por estação
+PCM_SOCKET = Path(__file__).parent / "pcm.sock"  # Áudio compartilhado com o musicas.py
+MODEL_RELEASE_CHECK_S = 60   # Intervalo da checagem de modelos VOSK sem uso
+POOL_RESTART_MAX = 3         # Pool quebrado mais vezes que isso em POOL_RESTART_WINDOW_S: encerra com erro
+POOL_RESTART_WINDOW_S = 600
+HEALTH_REPORT_S = 60         # Intervalo do envio da saúde das estações ao SAAS
+HEALTH_ENDPOINT = "/api/radio-monitor-health"
+REPLAY_FLUSH_S = 300         # Espera máxima pelo envio dos eventos do replay ao SAAS
+METRICS_HOST = "127.0.0.1"   # /metrics só local (ligado por "metrics_port")
 
 # Fuso de Brasília
 BRASILIA_TZ = timezone(timedelta(hours=-3))
 
-# Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("monitor.log", encoding="utf-8"),
-    ],
+# ── Métricas ───────────────────────────────────────────────────────────────
+
+CAPTURE_SECONDS = REGISTRY.histogram(
+    "radio_monitor_capture_seconds", "Tempo de captura de um bloco (modo por blocos)", ("station",)
+)
+TRANSCRIBE_SECONDS = REGISTRY.histogram(
+    "radio_monitor_transcribe_seconds",
+    "Tempo de transcrição por janela (modo janela) ou por bloco de 0,5s (streaming)",
+    ("station",),
+)
+TRANSCRIBE_RTF = REGISTRY.histogram(
+    "radio_monitor_rtf", "Real-time factor: tempo de transcrição / duração do áudio", ("station",),
+    buckets=RTF_BUCKETS,
+)
+MATCH_SECONDS = REGISTRY.histogram(
+    "radio_monitor_match_seconds", "Tempo de detecção de keywords por transcrição", ("station",)
+)
+QUEUE_DEPTH = REGISTRY.gauge("radio_monitor_queue_depth", "Itens aguardando em cada fila do pipeline", ("queue",))
+DECODED_BYTES = REGISTRY.counter(
+    "radio_monitor_decoded_bytes_total", "Bytes de PCM 16kHz recebidos do ffmpeg", ("station",)
 )
+VOSK_AUDIO_SECONDS = REGISTRY.counter(
+    "radio_monitor_vosk_audio_seconds_total", "Segundos de áudio decodificados pelo VOSK (após o pré-filtro)",
+    ("station",),
+)
+POOL_RESTARTS = REGISTRY.counter(
+    "radio_monitor_pool_restarts_total", "Pools de transcrição recriados depois que um worker morreu"
+)
+FFMPEG_FAILURES = REGISTRY.counter(
+    "radio_monitor_ffmpeg_failures_total", "Capturas que falharam ou streams que caíram", ("station",)
+)
+WINDOWS_DROPPED = REGISTRY.counter(
+    "radio_monitor_windows_dropped_total", "Janelas descartadas com a fila de transcrição cheia", ("station",)
+)
+KEYWORD_HITS = REGISTRY.counter("radio_monitor_keyword_hits_total", "Keywords detectadas", ("station",))
+STATION_UP = REGISTRY.gauge(
+    "radio_monitor_station_up", "1 = estação recebendo áudio, 0 = fora do ar ou instável", ("station",)
+)
+
+# Logging (fila + thread de escrita, JSON com rotação — ver logsetup.py)
+LOG_LISTENER = setup_logging(Path("monitor.log"), CONFIG_FILE)
 log = logging.getLogger("radio-monitor")
 
 # ── Funções auxiliares ─────────────────────────────────────────────────────
@@ -80,76 +228,18 @@ def load_config() -> dict:
         return json.load(f)
 
 
-def find_vosk_model() -> str:
-    """Procura automaticamente a pasta do modelo VOSK PT-BR."""
-    candidates = [
-        "vosk-model-small-pt-0.3",
-        "vosk-model-pt-fb-v0.1.1-20220516_2113",
-        "vosk-model-pt",
-        "vosk-model-small-pt",
-    ]
-    base = Path(__file__).parent
-    for name in candidates:
-        p = base / name
-        if p.exists() and p.is_dir():
-            log.info(f"Modelo VOSK encontrado: {p}")
-            return str(p)
-    # Tenta qualquer pasta começando com vosk-model
-    for p in base.iterdir():
-        if p.is_dir() and p.name.startswith("vosk-model"):
-            log.info(f"Modelo VOSK encontrado: {p}")
-            return str(p)
+def load_model_registry(config: dict) -> ModelRegistry:
+    """Modelos VOSK PT-BR por tier (config "vosk_models" ou pastas vosk-model* ao lado do script)."""
+    models = ModelRegistry.from_config(config, Path(__file__).parent, logger=log)
+    if models.paths:
+        log.info(f"Modelos VOSK: {models.describe()}")
+        return models
     log.error("Modelo VOSK PT-BR não encontrado. Baixe em:")
     log.error("  wget https://alphacephei.com/vosk/models/vosk-model-small-pt-0.3.zip")
     log.error("  unzip vosk-model-small-pt-0.3.zip")
     sys.exit(1)
 
 
-def fetch_saas_config(saas_url: str, secret: str) -> dict:
-    """
-    Busca estações e palavras-chave ativas do LHFEX SAAS.
-    Retorna: { stations: [...], keywords: [...] }
-    """
-    try:
-        resp = requests.get(
-            f"{saas_url}/api/radio-monitor-config",
-            headers={"x-radio-monitor-key": secret},
-            timeout=15,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        log.info(
-            f"Config SAAS: {len(data.get('stations', []))} estações, "
-            f"{len(data.get('keywords', []))} keywords"
-        )
-        return data
-    except Exception as e:
-        log.warning(f"Erro ao buscar config do SAAS: {e}")
-        return {}
-
-
-def post_event(saas_url: str, secret: str, payload: dict) -> bool:
-    """
-    Envia evento de detecção para o SAAS (que notifica o Telegram).
-    """
-    try:
-        resp = requests.post(
-            f"{saas_url}/api/radio-monitor-event",
-            headers={
-                "x-radio-monitor-key": secret,
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=15,
-        )
-        resp.raise_for_status()
-        log.info(f"Evento enviado ao SAAS: {payload.get('detectedKeywords')}")
-        return True
-    except Exception as e:
-        log.warning(f"Erro ao enviar evento ao SAAS: {e}")
-        return False
-
-
 def capture_stream_wav(stream_url: str, duration_s: int = CHUNK_DURATION_S) -> bytes | None:
     """
     Captura `duration_s` segundos do stream de rádio via ffmpeg.
@@ -188,55 +278,112 @@ def capture_stream_wav(stream_url: str, duration_s: int = CHUNK_DURATION_S) -> b
         return None
 
 
+def wav_pcm_view(wav_bytes: bytes) -> memoryview:
+    """
+    Memoryview (sem cópia) do PCM dentro de um WAV.
+    Percorre os chunks RIFF até achar "data" — o header nem sempre tem 44
+    bytes (ffmpeg pode incluir LIST/INFO antes dos dados).
+    """
+    view = memoryview(wav_bytes)
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        return view  # sem header: assume PCM cru
+    pos = 12
+    while pos + 8 <= len(view):
+        chunk_id = view[pos:pos + 4]
+        (size,) = struct.unpack_from("<I", view, pos + 4)
+        if chunk_id == b"data":
+            # Em pipe o ffmpeg não sabe o tamanho final e grava 0xFFFFFFFF
+            end = len(view) if size in (0, 0xFFFFFFFF) else min(len(view), pos + 8 + size)
+            return view[pos + 8:end]
+        pos += 8 + size + (size & 1)
+    return view[44:]
+
+
+def build_wav(pcm, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Monta um WAV (PCM 16-bit mono) a partir de PCM cru."""
+    header = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    header += b"data" + struct.pack("<I", len(pcm))
+    return header + bytes(pcm)
+
+
+def encode_snippet(pcm: bytes, sample_rate: int = SAMPLE_RATE) -> tuple[bytes, str]:
+    """
+    Codifica um recorte de PCM para anexar ao evento.
+    Tenta MP3 32 kbps via ffmpeg (~4 KB/s); se falhar, devolve WAV.
+    """
+    cmd = [
+        "ffmpeg", "-loglevel", "quiet",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+        "-b:a", "32k", "-f", "mp3", "pipe:1",
+    ]
+    try:
+        result = subprocess.run(cmd, input=pcm, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=30)
+        if result.returncode == 0 and result.stdout:
+            return result.stdout, "audio/mpeg"
+    except Exception as e:
+        log.warning(f"Falha ao codificar recorte em MP3: {e}")
+    return build_wav(pcm, sample_rate), "audio/wav"
+
+
 def transcribe_wav(wav_bytes: bytes, recognizer: KaldiRecognizer) -> str:
     """
     Transcreve bytes WAV usando VOSK.
     Retorna texto transcrito (minúsculas).
     """
-    # VOSK espera PCM raw sem header — pula os primeiros 44 bytes (header WAV)
-    pcm_data = wav_bytes[44:]
+    # VOSK espera PCM raw sem header
+    return transcribe_pcm(wav_pcm_view(wav_bytes), recognizer)
+
+
+def transcribe_pcm(pcm_data, recognizer: KaldiRecognizer) -> str:
+    """
+    Transcreve PCM cru (16kHz, mono, 16-bit) usando VOSK.
+    Retorna texto transcrito (minúsculas).
+    """
+    return recognize_pcm(pcm_data, recognizer)[0]
 
+
+def recognize_pcm(pcm_data, recognizer: KaldiRecognizer) -> tuple[str, list[dict]]:
+    """
+    Transcreve PCM cru e devolve (texto, palavras).
+    Com SetWords(True), cada palavra vem com `start`/`end` (segundos) e
+    `conf` (0-1) do VOSK. Aceita bytes ou memoryview; os chunks são fatias
+    do mesmo buffer e só viram `bytes` na fronteira com o VOSK (o binding
+    cffi não aceita views).
+    """
+    view = memoryview(pcm_data)
     chunk_size = 4000  # bytes por chunk
     text_parts = []
+    words = []
 
-    for i in range(0, len(pcm_data), chunk_size):
-        chunk = pcm_data[i : i + chunk_size]
+    for i in range(0, len(view), chunk_size):
+        chunk = view[i : i + chunk_size].tobytes()
         if recognizer.AcceptWaveform(chunk):
             result = json.loads(recognizer.Result())
             if result.get("text"):
                 text_parts.append(result["text"])
+                words += result.get("result", [])
 
-    # Captura resultado final
+    # Captura resultado final e deixa o recognizer pronto para reuso
     final = json.loads(recognizer.FinalResult())
     if final.get("text"):
         text_parts.append(final["text"])
+        words += final.get("result", [])
+    recognizer.Reset()
 
-    return " ".join(text_parts).lower().strip()
+    return " ".join(text_parts).lower().strip(), words
 
 
 def detect_keywords(text: str, keywords: list[dict]) -> list[dict]:
     """
     Procura palavras-chave no texto transcrito.
     Retorna lista de keywords encontradas (com metadados).
-    Normaliza acentos e maiúsculas para comparação.
-    """
-    import unicodedata
-
-    def normalize(s: str) -> str:
-        s = s.lower()
-        # Remove acentos
-        s = unicodedata.normalize("NFD", s)
-        s = "".join(c for c in s if unicodedata.category(c) != "Mn")
-        return s
-
-    text_norm = normalize(text)
-    found = []
-    for kw in keywords:
-        kw_norm = normalize(kw["keyword"])
-        if kw_norm in text_norm:
-            found.append(kw)
+    Normaliza acentos e maiúsculas e só casa palavras inteiras.
 
-    return found
+    Compila um KeywordMatcher a cada chamada — no loop principal use o
+    KeywordIndex cacheado do RadioMonitor (recompilado só quando a config muda).
+    """
+    return KeywordMatcher(keywords).match(text)
 
 
 def brasilia_now() -> datetime:
@@ -249,95 +396,1255 @@ def brasilia_iso() -> str:
     return brasilia_now().isoformat()
 
 
+def epoch_to_brasilia_iso(ts: float) -> str:
+    """Converte um epoch (ex.: horário de uma palavra no ar) para ISO 8601 de Brasília."""
+    return datetime.fromtimestamp(ts, tz=BRASILIA_TZ).isoformat()
+
+
+def hit_times(item: dict, hits: list[tuple]) -> list[tuple[str, float]]:
+    """(keyword, horário no ar) de cada ocorrência — sem tempos por palavra, o início do trecho."""
+    words = item["words"]
+    return [
+        (kw["keyword"], words[i]["start"] if i is not None else item["started_at"])
+        for kw, i, _ in hits
+    ]
+
+
+def build_event_payload(station: dict, item: dict, hits: list[tuple]) -> tuple[dict, float, float]:
+    """
+    Monta o evento de detecção a partir das ocorrências de um trecho transcrito.
+
+    `hits` vem de KeywordIndex.find_words: (keyword, primeira_palavra, última_palavra).
+    Com os tempos por palavra do VOSK, o evento leva o horário real em que a
+    keyword foi ao ar, a confiança do ASR nas palavras casadas e só a janela
+    de CONTEXT_WORDS palavras em volta. Sem palavras (resultados parciais),
+    cai no trecho inteiro e na heurística antiga de confiança.
+
+    Retorna (payload, início_no_ar, fim_no_ar) — epochs do trecho casado.
+    """
+    words = item["words"]
+    names = list(dict.fromkeys(kw["keyword"] for kw, _, _ in hits))
+    timed = [(kw, i, j) for kw, i, j in hits if i is not None]
+
+    if timed:
+        first = min(i for _, i, _ in timed)
+        last = max(j for _, _, j in timed)
+        air_start = words[first]["start"]
+        air_end = words[last]["end"]
+        matches = []
+        for kw, i, j in timed:
+            confs = [w.get("conf", 1.0) for w in words[i:j + 1]]
+            matches.append({
+                "keyword": kw["keyword"],
+                "startedAt": epoch_to_brasilia_iso(words[i]["start"]),
+                "endedAt": epoch_to_brasilia_iso(words[j]["end"]),
+                "confidence": round(100 * sum(confs) / len(confs), 1),
+            })
+        confidence = round(sum(m["confidence"] for m in matches) / len(matches), 1)
+        lo = max(0, first - CONTEXT_WORDS)
+        text = " ".join(w["word"] for w in words[lo:last + CONTEXT_WORDS + 1])
+    else:
+        air_start, air_end = item["started_at"], item["ended_at"]
+        confidence = min(100, len(names) * 30 + 40)  # heurística (sem tempos por palavra)
+        matches = []
+        text = item["text"]
+
+    payload = {
+        "stationId": station["id"],
+        "stationName": station["name"],
+        "transcriptionText": text,
+        "detectedKeywords": names,
+        "confidence": confidence,
+        "detectedAt": epoch_to_brasilia_iso(air_start),
+    }
+    if matches:
+        payload["matches"] = matches
+    return payload, air_start, air_end
+
+
+# ── Workers de transcrição (processos) ─────────────────────────────────────
+#
+# Cada processo do pool herda do principal o registro de modelos, com os
+# tiers das estações ativas já carregados (memória compartilhada pelo fork),
+# e transcreve janelas de PCM enviadas pelo estágio de transcrição.
+
+_worker_models: ModelRegistry | None = None
+# (tier, gramática — None = vocabulário completo) → [recognizer, segundos já passados por ele]
+_worker_recognizers: dict[tuple[str, str | None], list] = {}
+_worker_released_at = 0.0
+
+
+def _worker_init(models: ModelRegistry):
+    """Initializer do pool: adota o registro de modelos herdado do processo principal."""
+    global _worker_models
+    # Ctrl+C/SIGTERM são tratados pelo processo principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    worker_logging()
+    models.after_fork()
+    _worker_models = models
+
+
+def _worker_ping() -> int:
+    """No-op usado para aquecer o pool (força o fork de todos os workers)."""
+    return os.getpid()
+
+
+def new_recognizer(model: Model, grammar: str | None = None) -> KaldiRecognizer:
+    """KaldiRecognizer com tempos por palavra; com `grammar`, restrito às frases dela (KWS)."""
+    if grammar is None:
+        recognizer = KaldiRecognizer(model, SAMPLE_RATE)
+    else:
+        recognizer = KaldiRecognizer(model, SAMPLE_RATE, grammar)
+    recognizer.SetWords(True)
+    return recognizer
+
+
+def _worker_recognizer(grammar: str | None, tier: str) -> list:
+    """Recognizer do worker para o tier e a gramática (criado uma vez e reutilizado)."""
+    global _worker_released_at
+    now = time.time()
+    if now - _worker_released_at >= MODEL_RELEASE_CHECK_S:
+        _worker_released_at = now
+        # Tier sem janelas há muito tempo: solta o modelo e os recognizers dele
+        for released in _worker_models.release_idle():
+            for key in [k for k in _worker_recognizers if k[0] == released]:
+                del _worker_recognizers[key]
+    entry = _worker_recognizers.get((tier, grammar))
+    if entry is None:
+        if len(_worker_recognizers) >= WORKER_GRAMMARS_MAX:
+            # Keywords mudaram bastante: descarta as gramáticas antigas
+            for key in [k for k in _worker_recognizers if k[1] is not None]:
+                del _worker_recognizers[key]
+        model = _worker_models.get(tier)
+        entry = _worker_recognizers[(tier, grammar)] = [new_recognizer(model, grammar), 0.0]
+    else:
+        _worker_models.get(tier)  # marca o uso (a descarga olha o último uso)
+    return entry
+
+
+def strip_unk(text: str, words: list[dict], min_conf: float = 0.0) -> tuple[str, list[dict]]:
+    """Resultado da gramática de KWS sem o filler "[unk]" e sem keywords de confiança baixa."""
+    if not words:
+        return " ".join(t for t in text.split() if t != UNK), []
+    words = [w for w in words if w["word"] != UNK and w.get("conf", 1.0) >= min_conf]
+    return " ".join(w["word"] for w in words), words
+
+
+def _worker_transcribe(
+    audio: bytes, speech_filter: str = "off", grammar: str | None = None, tier: str | None = None
+) -> tuple[str, list[dict], float]:
+    """
+    Transcreve uma janela (PCM cru ou WAV) no processo worker (recognizer
+    reutilizado), com o modelo do `tier` (None = padrão). Com o pré-filtro
+    ligado, só os trechos de fala vão ao VOSK. Com `grammar`, decodifica só
+    contra as frases da gramática (KWS).
+    Retorna (texto, palavras, segundos_decodificados); os tempos das palavras
+    voltam relativos ao início da janela.
+    """
+    entry = _worker_recognizer(grammar, tier or _worker_models.default_tier)
+    recognizer = entry[0]
+    pcm = wav_pcm_view(audio)
+    bytes_per_s = SAMPLE_RATE * 2
+    if speech_filter == "off":
+        segments = [(0, len(pcm))]
+    else:
+        segments = speech_segments(pcm, SAMPLE_RATE, speech_filter)
+
+    texts, words, decoded_s = [], [], 0.0
+    for start, end in segments:
+        # O VOSK conta o tempo desde a criação do recognizer (Reset não zera)
+        base = entry[1] - start / bytes_per_s
+        entry[1] += (end - start) / bytes_per_s
+        decoded_s += (end - start) / bytes_per_s
+        text, seg_words = recognize_pcm(pcm[start:end], recognizer)
+        for w in seg_words:
+            w["start"] -= base
+            w["end"] -= base
+        if text:
+            texts.append(text)
+        words += seg_words
+    return " ".join(texts), words, decoded_s
+
+
+def _worker_spot(
+    audio: bytes, speech_filter: str, grammar: str, kws_mode: str, min_conf: float = KWS_MIN_CONF,
+    tier: str | None = None,
+) -> tuple[str, list[dict], float]:
+    """
+    Keyword spotting de uma janela no worker. "only": devolve as keywords
+    achadas pela gramática. "verify": se a gramática achou alguma keyword,
+    transcreve a janela completa (que é o que vai para o match); senão,
+    para por aí. Mesmo retorno de _worker_transcribe.
+    """
+    text, words, decoded_s = _worker_transcribe(audio, speech_filter, grammar, tier)
+    text, words = strip_unk(text, words, min_conf)
+    if not text or kws_mode == "only":
+        return text, words, decoded_s
+    full_text, full_words, full_s = _worker_transcribe(audio, speech_filter, None, tier)
+    return full_text, full_words, decoded_s + full_s
+
+
+# ── Reconhecimento em streaming (threads) ──────────────────────────────────
+
+class StationRecognizer(threading.Thread):
+    """
+    KaldiRecognizer de longa duração para uma estação no modo streaming.
+
+    Recebe blocos de PCM da captura contínua assim que chegam e publica cada
+    resultado finalizado (e, opcionalmente, parciais) em `on_text`. O VOSK
+    libera o GIL durante o decode, então uma thread por estação usa todos
+    os núcleos sem precisar de processos.
+
+    O modelo do tier da estação vem do registro na própria thread (a
+    primeira estação de um tier espera a carga sem travar o loop principal).
+    Com `grammar` (kws_mode "only"), o recognizer só reconhece as keywords;
+    `set_grammar()` troca a gramática quando as keywords mudam — aplicada
+    pela própria thread no próximo bloco, entre enunciados. `stop()` fecha o
+    enunciado em andamento antes de a thread sair; `utterance` é o número do
+    primeiro enunciado (o substituto de um recognizer continua a contagem).
+    """
+
+    def __init__(
+        self,
+        station_id: str,
+        name: str,
+        models: ModelRegistry,
+        tier: str,
+        on_text,
+        partial_alerts: bool = False,
+        speech_filter: str = "off",
+        grammar: str | None = None,
+        kws_min_conf: float = KWS_MIN_CONF,
+        utterance: int = 0,
+    ):
+        super().__init__(name=f"recognizer-{name}", daemon=True)
+        self.station_id = station_id
+        self.station_name = name
+        self.on_text = on_text
+        self.partial_alerts = partial_alerts
+        self.blocks: queue.Queue = queue.Queue(maxsize=STREAM_QUEUE_BLOCKS)
+        self.models = models
+        self.tier = tier
+        self.model: Model | None = None
+        self.grammar = grammar
+        self.kws_min_conf = kws_min_conf
+        self._pending_grammar = grammar
+        self.recognizer: KaldiRecognizer | None = None
+        self._stop_event = threading.Event()
+        self.utterance = utterance
+        # Pré-filtro: só blocos de fala (com pré-roll/hangover) chegam ao Kaldi
+        self.gate = SpeechGate(SAMPLE_RATE, mode=speech_filter) if speech_filter != "off" else None
+        self.total_s = 0.0    # áudio recebido
+        self.decoded_s = 0.0  # áudio efetivamente decodificado
+
+        # Tempo do VOSK (segundos de áudio desde a criação do recognizer) → epoch:
+        # uma marca por bloco alimentado, como (fed_s_no_início, captured_at)
+        self.fed_s = 0.0
+        self._marks: deque[tuple[float, float]] = deque(maxlen=600)
+
+    def feed(self, block: bytes, captured_at: float):
+        """Chamado pela thread de captura — nunca bloqueia."""
+        try:
+            self.blocks.put_nowait((block, captured_at))
+        except queue.Full:
+            # Decode mais lento que o tempo real: descarta o bloco mais antigo
+            try:
+                self.blocks.get_nowait()
+            except queue.Empty:
+                pass
+            self.blocks.put_nowait((block, captured_at))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def set_grammar(self, grammar: str | None):
+        """Chamado na troca de keywords; a thread do recognizer aplica."""
+        self._pending_grammar = grammar
+
+    def _apply_grammar(self):
+        self._finish_utterance()
+        self.grammar = self._pending_grammar
+        self.recognizer = new_recognizer(self.model, self.grammar)
+        # Recognizer novo conta o tempo do zero
+        self.fed_s = 0.0
+        self._marks.clear()
+        log.info(f"[{self.station_name}] Gramática de keyword spotting atualizada")
+
+    def run(self):
+        self._expected_at = None
+        self._utterance_start = None
+        self._last_partial = 0.0
+        self.model = self.models.get(self.tier)
+        self.recognizer = new_recognizer(self.model, self.grammar)
+        while not self._stop_event.is_set():
+            try:
+                block, captured_at = self.blocks.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            if self._pending_grammar != self.grammar:
+                self._apply_grammar()
+            block_s = len(block) / (SAMPLE_RATE * 2)
+            self.total_s += block_s
+            t0 = time.time()
+            if self.gate is None:
+                self._decode(block, captured_at)
+            else:
+                was_open = self.gate.open
+                for speech_block, speech_at in self.gate.push(block, captured_at):
+                    self._decode(speech_block, speech_at)
+                if was_open and not self.gate.open:
+                    # Fim do trecho de fala: fecha o enunciado em vez de esperar a próxima fala
+                    self._finish_utterance()
+            elapsed = time.time() - t0
+            TRANSCRIBE_SECONDS.observe(elapsed, station=self.station_name)
+            TRANSCRIBE_RTF.observe(elapsed / block_s, station=self.station_name)
+        # Parado (troca de tier, estação removida): o enunciado em andamento não se perde
+        self._finish_utterance()
+
+    def _decode(self, block: bytes, captured_at: float):
+        bytes_per_s = SAMPLE_RATE * 2
+        # Reconexão/descarte: fecha o enunciado em vez de colar áudio sem relação
+        if self._expected_at is not None and abs(captured_at - self._expected_at) > STREAM_GAP_S:
+            self._finish_utterance()
+        self._expected_at = captured_at + len(block) / bytes_per_s
+        if self._utterance_start is None:
+            self._utterance_start = captured_at
+        self._marks.append((self.fed_s, captured_at))
+        self.fed_s += len(block) / bytes_per_s
+        self.decoded_s += len(block) / bytes_per_s
+        VOSK_AUDIO_SECONDS.inc(len(block) / bytes_per_s, station=self.station_name)
+
+        if self.recognizer.AcceptWaveform(block):
+            self._emit(json.loads(self.recognizer.Result()), self._utterance_start, self._expected_at)
+            self._utterance_start = None
+        elif self.partial_alerts and time.time() - self._last_partial >= PARTIAL_CHECK_S:
+            self._last_partial = time.time()
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+            if self.grammar is not None:
+                partial = strip_unk(partial, [])[0]
+            if partial:
+                self.on_text(
+                    self.station_id, partial.lower(), [], self._utterance_start, self._expected_at,
+                    self.utterance, True,
+                )
+
+    def _finish_utterance(self):
+        if self._utterance_start is None and self._expected_at is None:
+            return
+        self._emit(json.loads(self.recognizer.FinalResult()), self._utterance_start, self._expected_at)
+        self.recognizer.Reset()
+        self._utterance_start = None
+        self._expected_at = None
+
+    def _to_epoch(self, t: float) -> float:
+        """Converte o tempo do VOSK no horário em que o áudio foi ao ar."""
+        i = max(0, bisect.bisect_right([fed for fed, _ in self._marks], t) - 1)
+        fed, captured_at = self._marks[i]
+        return captured_at + (t - fed)
+
+    def _emit(self, result: dict, started_at: float | None, ended_at: float | None):
+        text = (result.get("text") or "").lower().strip()
+        words = [
+            {**w, "start": self._to_epoch(w["start"]), "end": self._to_epoch(w["end"])}
+            for w in result.get("result", [])
+        ]
+        if self.grammar is not None:
+            text, words = strip_unk(text, words, self.kws_min_conf)
+        if text:
+            now = time.time()
+            self.on_text(
+                self.station_id, text, words, started_at or now, ended_at or now, self.utterance, False
+            )
+        self.utterance += 1
+
+
 # ── Loop de monitoramento ──────────────────────────────────────────────────
 
 class RadioMonitor:
-    def __init__(self):
+    """
+    Pipeline em estágios com filas limitadas (backpressure):
+
+      captura (threads, I/O) → ring buffer → windows → transcrição (pool de processos)
+        → transcripts → match (thread) → snippets → recorte de áudio (thread)
+        → events → post (thread)
+
+    O tempo de um ciclo passa a ser o da estação mais lenta, e não a soma.
+    """
+
+    def __init__(self, capture_mode: str | None = None):
         self.config = load_config()
         self.saas_url = self.config["saas_url"].rstrip("/")
         self.secret = self.config["radio_monitor_secret"]
+        self.capture_mode = capture_mode or self.config.get("capture_mode", CAPTURE_MODE)
+        self.transcribe_workers = int(
+            self.config.get("transcribe_workers") or os.cpu_count() or 1
+        )
+        self.recognition_mode = self.config.get("recognition_mode", RECOGNITION_MODE)
+        self.partial_alerts = bool(self.config.get("partial_alerts", False))
+        self.speech_filter = self.config.get("speech_filter", SPEECH_FILTER)
+        if self.speech_filter not in SPEECH_FILTER_MODES:
+            log.warning(f"speech_filter inválido ({self.speech_filter!r}) — usando '{SPEECH_FILTER}'")
+            self.speech_filter = SPEECH_FILTER
+        # station_id → [segundos decodificados, segundos recebidos] (modo janela)
+        self.speech_stats: dict[str, list[float]] = {}
+        self.speech_stats_logged_at = time.time()
+        if self.recognition_mode == "streaming" and self.capture_mode == "chunked":
+            log.warning("recognition_mode=streaming requer captura contínua — usando janelas")
+            self.recognition_mode = "window"
+        self.fuzzy_matching = bool(self.config.get("fuzzy_matching", False))
+        self.fuzzy_threshold = float(self.config.get("fuzzy_threshold", FUZZY_THRESHOLD))
+        self.kws_mode = self.config.get("kws_mode", KWS_MODE)
+        self.kws_min_conf = float(self.config.get("kws_min_conf", KWS_MIN_CONF))
+        if self.kws_mode not in KWS_MODES:
+            log.warning(f"kws_mode inválido ({self.kws_mode!r}) — usando '{KWS_MODE}'")
+            self.kws_mode = KWS_MODE
+        if self.kws_mode == "verify" and self.recognition_mode == "streaming":
+            log.warning("kws_mode=verify só existe no modo janela — usando transcrição completa")
+            self.kws_mode = "off"
+        self.config_client = SaasConfigClient(self.saas_url, self.secret, logger=log)
         self.saas_data = {}
         self.last_config_fetch = 0
+        self.config_version = 0  # incrementa a cada config com mudança
         self.running = True
+        self.stations_by_id: dict[str, dict] = {}
+        self.keyword_index = KeywordIndex([])
+
+        # Saúde/circuit breaker por estação e prioridade comercial (das keywords)
+        self.health = HealthTracker()
+        self.business_priority: dict[str, int] = {}
+        self.capture_credit: dict[str, float] = {}
+        self.health_reported_at = 0.0
+
+        # Modo contínuo: um StationStream por estação escreve no ring buffer
+        # da estação; as janelas de transcrição são recortadas do próprio anel
+        self.streams: dict[str, StationStream] = {}
+        self.rings: dict[str, PcmRingBuffer] = {}
+        self.window_offsets: dict[str, int] = {}
+        self.ring_seconds = float(self.config.get("ring_seconds", RING_SECONDS))
+        self.audio_snippets = bool(self.config.get("audio_snippets", True))
+
+        # Filas entre estágios do pipeline; janelas saem por prioridade da estação
+        self.windows: queue.PriorityQueue = queue.PriorityQueue(maxsize=WINDOW_QUEUE_MAX)
+        self._window_seq = itertools.count()
+        self.transcripts: queue.Queue = queue.Queue(maxsize=STAGE_QUEUE_MAX)
+        self.snippets: queue.Queue = queue.Queue(maxsize=STAGE_QUEUE_MAX)
+        self.events: queue.Queue = queue.Queue(maxsize=STAGE_QUEUE_MAX)
+        self.pool: ProcessPoolExecutor | None = None
+        self.pool_tiers: set[str] = set()
+        self.pool_lock = threading.Lock()
+        self.pool_restarts: deque = deque()
+        self.replaying = False
+        self.exit_code = 0
+        self.stage_threads: list[threading.Thread] = []
+
+        # Modo streaming: um StationRecognizer por estação, modelo compartilhado
+        self.recognizers: dict[str, StationRecognizer] = {}
+        self.partial_hits: dict[tuple[str, int], set[str]] = {}
+
+        # Eventos vão para uma fila em disco; uma thread própria envia ao SAAS
+        self.outbox_dir = Path(self.config.get("outbox_dir") or Path(__file__).parent)
+        self.outbox = Outbox(self.outbox_dir / "outbox-monitor.db", self.saas_url, self.secret, logger=log)
+
+        # Repetições da mesma keyword viram um evento só (janelas persistidas)
+        self.cooldown_s = float(self.config.get("cooldown_s", COOLDOWN_S))
+        self.coalesce_max_s = float(self.config.get("coalesce_max_s", MAX_SPAN_S))
+        self.coalescer: DetectionCoalescer | None = None
+        if self.cooldown_s > 0:
+            self.coalescer = DetectionCoalescer(
+                self.outbox_dir / "coalesce.db", self.cooldown_s, self.coalesce_max_s, logger=log
+            )
 
-        # Carrega modelo VOSK
-        model_path = find_vosk_model()
-        log.info(f"Carregando modelo VOSK de {model_path}...")
-        self.model = Model(model_path)
-        log.info("Modelo VOSK carregado.")
+        # Toda transcrição finalizada vai para o arquivo local (busca retroativa)
+        self.archive: TranscriptArchive | None = None
+        if self.config.get("transcript_archive", True):
+            self.archive = TranscriptArchive(
+                Path(self.config.get("archive_dir") or ARCHIVE_DIR),
+                int(self.config.get("archive_retention_days", RETENTION_DAYS)),
+            )
+
+        # Várias VMs: cada uma fica só com as estações que o rendezvous hashing lhe dá
+        self.shard: ShardMembership | None = None
+        if self.config.get("sharding", False):
+            self.shard = ShardMembership(
+                self.saas_url,
+                self.secret,
+                str(self.config.get("node_id") or default_node_id()),
+                role="monitor",
+                lease_s=float(self.config.get("node_lease_s", LEASE_S)),
+                weight=float(self.config.get("node_weight", 1.0)),
+                logger=log,
+            )
+
+        # Modelos VOSK por tier, carregados só quando uma estação ativa precisa
+        self.models = load_model_registry(self.config)
+        self.models_checked_at = time.time()
 
     def refresh_config(self, force: bool = False):
         """Atualiza config do SAAS se passaram CONFIG_REFRESH_S segundos."""
         now = time.time()
         if force or (now - self.last_config_fetch) >= CONFIG_REFRESH_S:
-            self.saas_data = fetch_saas_config(self.saas_url, self.secret)
             self.last_config_fetch = now
+            # None = 304, corpo igual ou falha do SAAS: mantém tudo como está
+            diff = self.config_client.fetch()
+            if diff is not None:
+                self.apply_config(diff)
+
+    def apply_config(self, diff: ConfigDiff):
+        """Troca a config em uso sem parar o pipeline; só recompila o que mudou."""
+        self.saas_data = self.config_client.data
+        self.stations_by_id = {s["id"]: s for s in self.saas_data.get("stations", [])}
+
+        if diff.keywords:
+            # Troca atômica: o estágio de match pega o índice novo no próximo item
+            self.keyword_index = self.build_keyword_index(self.saas_data.get("keywords", []))
+            log.info(
+                f"Índice de keywords atualizado: {len(self.keyword_index.global_matcher)} global(is), "
+                f"{len(self.keyword_index.station_matchers)} estação(ões) com keywords próprias"
+            )
+            # Janelas pegam a gramática nova no próximo envio ao pool; streaming troca aqui
+            for station_id, recognizer in list(self.recognizers.items()):
+                recognizer.set_grammar(self.station_grammar(station_id))
+        if diff.keywords or diff.stations:
+            self.business_priority = business_priorities(
+                self.saas_data.get("stations", []), self.saas_data.get("keywords", [])
+            )
+        self.config_version += 1
 
-    def monitor_station(self, station: dict, keywords: list[dict]):
-        """Monitora uma estação: captura → transcreve → detecta → notifica."""
-        name = station["name"]
-        url = station.get("streamUrl")
-        if not url:
-            log.warning(f"[{name}] Sem streamUrl — pulando")
-            return
+    def build_keyword_index(self, keywords: list[dict]) -> KeywordIndex:
+        """Índice novo reaproveitando os matchers que não mudaram."""
+        return KeywordIndex(
+            keywords, previous=self.keyword_index,
+            fuzzy=self.fuzzy_matching, fuzzy_threshold=self.fuzzy_threshold,
+        )
 
-        log.info(f"[{name}] Capturando {CHUNK_DURATION_S}s do stream...")
-        wav_bytes = capture_stream_wav(url, CHUNK_DURATION_S)
-        if not wav_bytes:
-            log.warning(f"[{name}] Falha ao capturar áudio")
+    def my_stations(self) -> list[dict]:
+        """Estações do SAAS que este nó monitora (todas, sem sharding)."""
+        stations = self.saas_data.get("stations", [])
+        return self.shard.assign(stations) if self.shard is not None else stations
+
+    def station_tier(self, station_id: str) -> str:
+        return self.models.tier(self.stations_by_id.get(station_id))
+
+    def active_tiers(self) -> set[str]:
+        """Tiers das estações deste nó; sem config ainda, o padrão (pronto para a primeira)."""
+        stations = self.my_stations()
+        if not stations:
+            return {self.models.default_tier}
+        return {self.models.tier(s) for s in stations}
+
+    def release_models(self):
+        """Solta os modelos que nenhuma estação usa há model_idle_unload_s."""
+        if time.time() - self.models_checked_at < MODEL_RELEASE_CHECK_S:
             return
+        self.models_checked_at = time.time()
+        if self.recognition_mode == "streaming":
+            in_use = {r.tier for r in list(self.recognizers.values())}
+        else:
+            in_use = self.active_tiers()
+        self.models.release_idle(in_use)
+
+    def assignment_version(self) -> tuple[int, int]:
+        """Muda quando a config ou a lista de nós vivos muda (hora de refazer as capturas)."""
+        return self.config_version, self.shard.version if self.shard is not None else 0
+
+    # ── Keyword spotting ──────────────────────────────────────────────────
+
+    def station_grammar(self, station_id: str) -> str | None:
+        """Gramática do recognizer de streaming da estação (None = vocabulário completo)."""
+        return self.keyword_index.grammar(station_id) if self.kws_mode == "only" else None
+
+    def submit_window(self, station_id: str, audio: bytes) -> Future:
+        """
+        Manda uma janela ao pool conforme o kws_mode. O resultado é sempre
+        (texto, palavras, segundos_decodificados).
+        """
+        tier = self.station_tier(station_id)
+        if self.kws_mode == "off":
+            return self.pool.submit(_worker_transcribe, audio, self.speech_filter, None, tier)
+        return self.pool.submit(
+            _worker_spot, audio, self.speech_filter, self.keyword_index.grammar(station_id),
+            self.kws_mode, self.kws_min_conf, tier,
+        )
 
-        # Cria novo recognizer para cada captura (VOSK é stateful)
-        recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
-        recognizer.SetWords(True)
+    # ── Saúde e prioridade ────────────────────────────────────────────────
 
-        log.info(f"[{name}] Transcrevendo...")
-        text = transcribe_wav(wav_bytes, recognizer)
+    def station_priority(self, station_id: str) -> float:
+        return self.health.priority(station_id, self.business_priority.get(station_id, 1))
 
-        if not text:
-            log.info(f"[{name}] Transcrição vazia")
+    def _window_entry(self, item: tuple) -> tuple:
+        """(prioridade, ordem de chegada, janela) — a PriorityQueue tira o menor primeiro."""
+        return (-self.station_priority(item[0]), next(self._window_seq), item)
+
+    def _offer_window(self, item: tuple):
+        """Enfileira sem bloquear; fila cheia descarta a janela de menor prioridade."""
+        entry = self._window_entry(item)
+        try:
+            self.windows.put_nowait(entry)
+            return
+        except queue.Full:
+            pass
+
+        # Áudio ao vivo não espera: sai a janela da estação menos prioritária (a mais antiga entre elas)
+        with self.windows.mutex:
+            heap = self.windows.queue
+            worst = max(heap, key=lambda e: (e[0], -e[1])) if heap else None
+            if worst is not None and worst[0] >= entry[0]:
+                heap.remove(worst)
+                heapq.heapify(heap)
+                dropped = worst[2]
+            else:
+                dropped = item
+        if dropped is not item:
+            self.windows.task_done()
+            try:
+                self.windows.put_nowait(entry)
+            except queue.Full:
+                dropped = item
+        name = self.stations_by_id.get(dropped[0], {}).get("name", dropped[0])
+        WINDOWS_DROPPED.inc(station=name)
+        log.warning(f"[{name}] Fila cheia — janela descartada")
+
+    def select_for_cycle(self, stations: list[dict]) -> list[dict]:
+        """
+        Estações capturadas neste ciclo (modo por blocos), em ordem de
+        prioridade: circuito aberto fica de fora; rendimento baixo acumula
+        crédito e só entra quando o crédito chega a 1.
+        """
+        selected, tripped = [], []
+        for station in stations:
+            station_id = station["id"]
+            if not self.health.allow(station_id):
+                tripped.append(station["name"])
+                continue
+            weight = self.health.weight(station_id, self.business_priority.get(station_id, 1))
+            credit = self.capture_credit.get(station_id, 0.0) + weight
+            if credit < 1:
+                self.capture_credit[station_id] = credit
+                continue
+            self.capture_credit[station_id] = credit - 1
+            selected.append(station)
+        if tripped:
+            log.info(f"Circuito aberto (fora deste ciclo): {', '.join(tripped)}")
+        selected.sort(key=lambda s: self.station_priority(s["id"]), reverse=True)
+        return selected
+
+    def start_metrics(self):
+        """Endpoint /metrics (Prometheus), se "metrics_port" estiver no config.json."""
+        port = self.config.get("metrics_port")
+        if not port:
+            return None
+        QUEUE_DEPTH.track(lambda: {
+            ("windows",): self.windows.qsize(),
+            ("transcripts",): self.transcripts.qsize(),
+            ("snippets",): self.snippets.qsize(),
+            ("events",): self.events.qsize(),
+            ("streaming",): sum(r.blocks.qsize() for r in list(self.recognizers.values())),
+        })
+        STATION_UP.track(lambda: {
+            (self.stations_by_id.get(r["stationId"], {}).get("name", r["stationId"]),): int(r["status"] == "ok")
+            for r in self.health.snapshot([s["id"] for s in self.my_stations()])
+        })
+        return start_metrics_server(int(port), self.config.get("metrics_host", METRICS_HOST))
+
+    def report_health(self, force: bool = False):
+        """Envia ao SAAS o estado de cada estação (status, falhas, último áudio)."""
+        if not force and time.time() - self.health_reported_at < HEALTH_REPORT_S:
+            return
+        self.health_reported_at = time.time()
+        # Com sharding, só as estações deste nó (as outras são reportadas pelo dono)
+        report = self.health.snapshot([s["id"] for s in self.my_stations()])
+        if not report:
             return
+        if self.shard is not None:
+            for entry in report:
+                entry["nodeId"] = self.shard.node_id
+        try:
+            resp = self.config_client.session.post(
+                f"{self.saas_url}{HEALTH_ENDPOINT}",
+                json={"stations": report},
+                timeout=15,
+            )
+            resp.raise_for_status()
+        except Exception as e:
+            log.debug(f"Falha ao enviar saúde das estações: {e}")
+        down = [self.stations_by_id[r["stationId"]]["name"] for r in report if r["status"] == "down"]
+        if down:
+            log.warning(f"Estações fora do ar: {', '.join(down)}")
+
+    def flush_coalesced(self, sink=None):
+        """Manda ao SAAS (ou ao `sink` do replay) a contagem das janelas de cooldown que fecharam."""
+        if self.coalescer is None:
+            return
+        updates = self.coalescer.due() if sink is None else self.coalescer.flush()
+        for update in updates:
+            log.info(
+                f"[{update['stationName']}] {update['detectedKeywords'][0]}: {update['occurrences']} "
+                f"ocorrência(s) agrupada(s) até {update['lastDetectedAt'][11:19]}"
+            )
+            (sink or self.outbox).put("event", update)
+
+    # ── Pipeline ──────────────────────────────────────────────────────────
+
+    def start_pipeline(self):
+        """Sobe o pool de transcrição e as threads dos estágios."""
+        if self.recognition_mode == "streaming":
+            # Recognizers por estação rodam em threads (cada um pega o modelo
+            # do seu tier no registro, sob demanda); match/post seguem iguais
+            self._start_stages([
+                ("match", self._match_stage),
+                ("snippet", self._snippet_stage),
+                ("post", self._post_stage),
+            ])
+            return
+
+        self._start_pool(self.active_tiers())
+        stages = [(f"transcribe-{n}", self._transcribe_stage) for n in range(self.transcribe_workers)]
+        stages += [
+            ("match", self._match_stage),
+            ("snippet", self._snippet_stage),
+            ("post", self._post_stage),
+        ]
+        self._start_stages(stages)
+
+    def _start_pool(self, tiers: set[str]):
+        """
+        Pool de processos de transcrição. Os modelos dos `tiers` são carregados
+        aqui, antes do fork: os workers herdam as mesmas páginas de memória.
+        """
+        self.models.preload(tiers)
+        self.pool_tiers = set(tiers)
+        # O fork só leva a thread que o chama, e aqui a thread de escrita do
+        # log já existe: ela fica parada durante o fork para não deixar lock
+        # preso no worker. Outras threads que existam (as de captura e do
+        # pipeline, quando o pool é recriado) não tocam no que o worker usa
+        # — o registro de modelos ganha locks novos em after_fork e o log do
+        # worker é refeito em worker_logging. Com fork, o aquecimento cria
+        # todos os workers de uma vez, aqui dentro.
+        with LOG_LISTENER.paused():
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.transcribe_workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_worker_init,
+                initargs=(self.models,),
+            )
+            self.pool.submit(_worker_ping).result()
+        log.info(
+            f"{self.transcribe_workers} worker(s) de transcrição prontos "
+            f"(modelo(s) compartilhado(s): {', '.join(sorted(tiers))})"
+        )
+
+    def _restart_pool(self) -> bool:
+        """
+        Recria o pool depois que um worker morreu (falta de memória, crash do
+        Kaldi): o ProcessPoolExecutor quebrado recusa tudo dali em diante.
+        Várias threads chegam aqui pelo mesmo pool — só a primeira recria.
+        Se o pool quebra POOL_RESTART_MAX vezes em POOL_RESTART_WINDOW_S,
+        desiste e encerra com erro (o systemd reinicia o serviço). Retorna
+        True se há um pool funcionando.
+        """
+        with self.pool_lock:
+            if not self.running:
+                return False
+            try:
+                self.pool.submit(_worker_ping).result()
+                return True  # outra thread já recriou
+            except BrokenProcessPool:
+                pass
+            now = time.time()
+            while self.pool_restarts and now - self.pool_restarts[0] > POOL_RESTART_WINDOW_S:
+                self.pool_restarts.popleft()
+            if len(self.pool_restarts) >= POOL_RESTART_MAX:
+                log.critical(
+                    f"Pool de transcrição quebrou {len(self.pool_restarts) + 1}x em "
+                    f"{POOL_RESTART_WINDOW_S // 60} min — encerrando com erro"
+                )
+                self.exit_code = 1
+                self.stop()
+                return False
+            self.pool_restarts.append(now)
+            POOL_RESTARTS.inc()
+            log.error("Pool de transcrição quebrado (um worker morreu) — recriando")
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            try:
+                self._start_pool(self.pool_tiers if self.replaying else self.active_tiers())
+            except Exception as e:
+                log.critical(f"Falha ao recriar o pool de transcrição: {e} — encerrando com erro")
+                self.exit_code = 1
+                self.stop()
+                return False
+            return True
+
+    def _start_stages(self, stages: list[tuple]):
+        for name, target in stages:
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self.stage_threads.append(t)
+
+    def stop_pipeline(self):
+        for t in self.stage_threads:
+            t.join(timeout=5)
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """put bloqueante (backpressure) que desiste quando o monitor para."""
+        while self.running:
+            try:
+                q.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
 
-        log.info(f"[{name}] Transcrição: {text[:120]}...")
+    def _wait_drained(self, q: queue.Queue):
+        """Espera até todos os itens da fila terem sido processados."""
+        with q.all_tasks_done:
+            while q.unfinished_tasks and self.running:
+                q.all_tasks_done.wait(1)
 
-        # Detecta keywords
-        found = detect_keywords(text, keywords)
-        if not found:
+    def _transcribe_stage(self):
+        """Estágio 2: envia janelas ao pool de processos (uma por vez por thread)."""
+        while self.running:
+            try:
+                _, _, (station_id, audio, started_at, ended_at) = self.windows.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                station = self.stations_by_id.get(station_id)
+                if station is None:
+                    continue
+                name = station["name"]
+                t0 = time.time()
+                text, words, decoded_s = self.submit_window(station_id, audio).result()
+                elapsed = time.time() - t0
+                TRANSCRIBE_SECONDS.observe(elapsed, station=name)
+                TRANSCRIBE_RTF.observe(elapsed / max(ended_at - started_at, 1e-3), station=name)
+                VOSK_AUDIO_SECONDS.inc(decoded_s, station=name)
+                stats = self.speech_stats.setdefault(station_id, [0.0, 0.0])
+                stats[0] += decoded_s
+                stats[1] += ended_at - started_at
+                if not decoded_s:
+                    log.debug(f"[{name}] Janela sem fala — VOSK não chamado")
+                    continue
+                if not text:
+                    if self.kws_mode == "off":
+                        log.info(f"[{name}] Transcrição vazia", extra=fields(name, "transcribe", elapsed))
+                    continue
+                log.info(
+                    f"[{name}] Transcrição ({elapsed:.1f}s): {text[:120]}...",
+                    extra=fields(name, "transcribe", elapsed),
+                )
+                for w in words:
+                    w["start"] += started_at
+                    w["end"] += started_at
+                self._put(self.transcripts, {
+                    "station": station,
+                    "text": text,
+                    "words": words,
+                    "started_at": started_at,
+                    "ended_at": ended_at,
+                    "utterance": None,
+                    "partial": False,
+                })
+            except BrokenProcessPool:
+                log.error(f"[{station_id}] Janela perdida: o worker de transcrição morreu")
+                self._restart_pool()
+            except Exception as e:
+                log.error(f"[{station_id}] Erro na transcrição: {e}")
+            finally:
+                self.windows.task_done()
+
+    def _match_stage(self):
+        """Estágio 3: detecta keywords e monta o evento."""
+        while self.running:
+            try:
+                item = self.transcripts.get(timeout=1)
+            except queue.Empty:
+                continue
+            station = item["station"]
+            try:
+                if "partials_before" in item:
+                    # Recognizer substituído (ver _replace_recognizer): parciais dele que sobraram
+                    for key in [k for k in self.partial_hits if k[0] == station["id"]]:
+                        if key[1] < item["partials_before"]:
+                            del self.partial_hits[key]
+                    continue
+                # Saída do KWS "only" não é transcrição completa: não vai ao arquivo
+                if not item["partial"] and self.kws_mode != "only":
+                    self._archive(station["id"], item["text"], item["words"], item["started_at"], item["ended_at"])
+                t0 = time.time()
+                if item["words"]:
+                    hits = self.keyword_index.find_words(station["id"], item["words"])
+                else:
+                    hits = [(kw, None, None) for kw in self.keyword_index.match(station["id"], item["text"])]
+                MATCH_SECONDS.observe(time.time() - t0, station=station["name"])
+
+                # Streaming: não repete no resultado final o que já alertou no parcial
+                if item["utterance"] is not None:
+                    key = (station["id"], item["utterance"])
+                    if item["partial"]:
+                        alerted = self.partial_hits.setdefault(key, set())
+                    else:
+                        alerted = self.partial_hits.pop(key, set())
+                    hits = [h for h in hits if h[0]["keyword"] not in alerted]
+                    if item["partial"]:
+                        alerted.update(h[0]["keyword"] for h in hits)
+                if not hits:
+                    continue
+                self.health.record_hits(station["id"], len(hits))
+                KEYWORD_HITS.inc(len(hits), station=station["name"])
+
+                payload, air_start, air_end = build_event_payload(station, item, hits)
+                log.info(
+                    f"[{station['name']}] 🔑 KEYWORDS DETECTADAS: {payload['detectedKeywords']} "
+                    f"(confiança {payload['confidence']}%)",
+                    extra=fields(station["name"], "match", time.time() - t0),
+                )
+                if self.coalescer is not None:
+                    detected = payload["detectedKeywords"]
+                    payload = self.coalescer.admit(payload, hit_times(item, hits))
+                    if payload is None:
+                        log.info(f"[{station['name']}] {detected} em cooldown — somado ao evento anterior")
+                        continue
+
+                if self.audio_snippets:
+                    # Recorte de SNIPPET_BEFORE_S antes a SNIPPET_AFTER_S depois da keyword
+                    cut = (
+                        station["id"],
+                        air_start - SNIPPET_BEFORE_S,
+                        air_end + SNIPPET_AFTER_S,
+                    )
+                    self._put(self.snippets, (payload, cut, time.time()))
+                else:
+                    self._put(self.events, payload)
+            except Exception as e:
+                log.error(f"[{station['name']}] Erro no match: {e}")
+            finally:
+                self.transcripts.task_done()
+
+    def _archive(self, station_id: str, text: str, words: list[dict], started_at: float, ended_at: float):
+        if self.archive is None:
+            return
+        try:
+            self.archive.add(station_id, text, words, started_at, ended_at)
+        except Exception as e:
+            log.warning(f"Falha ao gravar transcrição no arquivo: {e}")
+
+    def _snippet_stage(self):
+        """
+        Estágio 3b: anexa o áudio ao redor da keyword. Espera (sem bloquear
+        os demais eventos) até o ring buffer ter o áudio "depois" do trecho.
+        """
+        pending = []
+        while self.running:
+            try:
+                pending.append(self.snippets.get(timeout=0.5))
+                self.snippets.task_done()
+            except queue.Empty:
+                pass
+
+            waiting = []
+            for payload, cut, queued_at in pending:
+                station_id, cut_start, cut_end = cut
+                ring = self.rings.get(station_id)
+                latest = ring.latest_time if ring is not None else None
+                if latest is not None and latest < cut_end and time.time() - queued_at < SNIPPET_WAIT_MAX_S:
+                    waiting.append((payload, cut, queued_at))
+                    continue
+                try:
+                    if ring is not None:
+                        self._attach_snippet(payload, ring, cut_start, cut_end)
+                except Exception as e:
+                    log.warning(f"[{payload['stationName']}] Falha ao recortar áudio: {e}")
+                self._put(self.events, payload)
+            pending = waiting
+
+    def _attach_snippet(self, payload: dict, ring: PcmRingBuffer, cut_start: float, cut_end: float):
+        start = ring.offset_at(cut_start)
+        end = ring.offset_at(cut_end)
+        pcm = ring.read(start, end)
+        if not pcm:
+            return
+        audio, mime = encode_snippet(pcm)
+        payload["audioSnippet"] = base64.b64encode(audio).decode("ascii")
+        payload["audioMimeType"] = mime
+        payload["audioStartedAt"] = datetime.fromtimestamp(ring.time_at(start), tz=BRASILIA_TZ).isoformat()
+        payload["audioDurationS"] = round(len(pcm) / (SAMPLE_RATE * 2), 1)
+
+    def _post_stage(self):
+        """
+        Estágio 4: grava eventos no outbox. O envio ao SAAS (que salva no banco
+        e notifica o Telegram) é feito em lote pela thread do outbox, com retry.
+        """
+        while self.running:
+            try:
+                payload = self.events.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self.outbox.put("event", payload)
+            except Exception as e:
+                log.error(f"Erro ao gravar evento no outbox: {e}")
+            finally:
+                self.events.task_done()
+
+    # ── Modo contínuo ─────────────────────────────────────────────────────
+
+    def sync_streams(self, stations: list[dict]):
+        """Abre/fecha capturas contínuas conforme a lista de estações do SAAS."""
+        wanted = {s["id"]: s for s in stations if s.get("streamUrl")}
+
+        for station_id in list(self.streams):
+            stream = self.streams[station_id]
+            station = wanted.get(station_id)
+            if station is None or station["streamUrl"] != stream.stream_url:
+                log.info(f"[{stream.station_name}] Encerrando captura contínua")
+                stream.stop()
+                del self.streams[station_id]
+                recognizer = self.recognizers.pop(station_id, None)
+                if recognizer is not None:
+                    recognizer.stop()
+                self.rings.pop(station_id, None)
+                self.window_offsets.pop(station_id, None)
+                self.health.forget(station_id)
+
+        for station_id, station in wanted.items():
+            recognizer = self.recognizers.get(station_id)
+            if recognizer is not None and recognizer.tier != self.models.tier(station):
+                # Tier trocado no SAAS: recognizer novo com o outro modelo, mesma captura
+                log.info(f"[{station['name']}] Modelo VOSK: {recognizer.tier} → {self.models.tier(station)}")
+                self._replace_recognizer(station_id, station, recognizer)
+            if station_id in self.streams:
+                # Mesma URL: a captura segue rodando, só o nome pode ter mudado
+                self.streams[station_id].station_name = station["name"]
+                continue
+            if self.recognition_mode == "streaming":
+                self.recognizers[station_id] = self._new_recognizer(station_id, station)
+            self.rings[station_id] = PcmRingBuffer(self.ring_seconds, SAMPLE_RATE)
+            self.window_offsets[station_id] = 0
+            stream = StationStream(
+                station_id,
+                station["name"],
+                station["streamUrl"],
+                on_pcm=lambda block, at, sid=station_id: self._on_pcm(sid, block, at),
+                on_failure=lambda reason, retry_s, sid=station_id: self._on_stream_failure(sid, reason, retry_s),
+            )
+            self.streams[station_id] = stream
+            stream.start()
+            log.info(f"[{station['name']}] Captura contínua iniciada")
+
+    def _replace_recognizer(self, station_id: str, station: dict, old: StationRecognizer):
+        """
+        Troca o recognizer da estação sem perder nem repetir alerta: o antigo
+        fecha o enunciado em andamento, o novo continua a numeração (as
+        chaves de partial_hits não colidem) e o que sobrou do antigo em
+        partial_hits é descartado depois que o match vê o último resultado
+        dele (mesma fila, mesmo estágio).
+        """
+        old.stop()
+        old.join(RECOGNIZER_STOP_S)
+        # Antigo ainda decodificando: no máximo mais um resultado e o final
+        utterance = old.utterance + (2 if old.is_alive() else 0)
+        self.recognizers[station_id] = self._new_recognizer(station_id, station, utterance)
+        self._put(self.transcripts, {"station": station, "partials_before": utterance})
+
+    def _new_recognizer(self, station_id: str, station: dict, utterance: int = 0) -> StationRecognizer:
+        recognizer = StationRecognizer(
+            station_id,
+            station["name"],
+            self.models,
+            self.models.tier(station),
+            on_text=self._on_text,
+            partial_alerts=self.partial_alerts,
+            speech_filter=self.speech_filter,
+            grammar=self.station_grammar(station_id),
+            kws_min_conf=self.kws_min_conf,
+            utterance=utterance,
+        )
+        recognizer.start()
+        return recognizer
+
+    def stop_streams(self):
+        for stream in self.streams.values():
+            stream.stop()
+        self.streams.clear()
+        for recognizer in self.recognizers.values():
+            recognizer.stop()
+        self.recognizers.clear()
+
+    def _on_text(
+        self,
+        station_id: str,
+        text: str,
+        words: list[dict],
+        started_at: float,
+        ended_at: float,
+        utterance: int,
+        partial: bool,
+    ):
+        """Callback do StationRecognizer: manda o texto direto ao estágio de match."""
+        station = self.stations_by_id.get(station_id)
+        if station is None:
+            return
+        if not partial:
+            log.info(
+                f"[{station['name']}] Transcrição: {text[:120]}",
+                extra=fields(station["name"], "transcribe"),
+            )
+        if len(self.partial_hits) > 1000:
+            self.partial_hits.clear()  # enunciados que nunca finalizaram
+        self._put(self.transcripts, {
+            "station": station,
+            "text": text,
+            "words": words,
+            "started_at": started_at,
+            "ended_at": ended_at,
+            "utterance": utterance,
+            "partial": partial,
+        })
+
+    def speech_ratio(self, station_id: str) -> float | None:
+        """Fração do áudio da estação que passou pelo pré-filtro e foi ao VOSK."""
+        recognizer = self.recognizers.get(station_id)
+        if recognizer is not None:
+            decoded_s, total_s = recognizer.decoded_s, recognizer.total_s
+        else:
+            decoded_s, total_s = self.speech_stats.get(station_id, (0.0, 0.0))
+        return decoded_s / total_s if total_s else None
+
+    def log_speech_stats(self, force: bool = False):
+        """Relatório periódico de % de fala por estação (quanto o filtro economiza)."""
+        if self.speech_filter == "off":
+            return
+        if not force and time.time() - self.speech_stats_logged_at < SPEECH_STATS_LOG_S:
+            return
+        self.speech_stats_logged_at = time.time()
+        for station_id, station in self.stations_by_id.items():
+            ratio = self.speech_ratio(station_id)
+            if ratio is not None:
+                log.info(
+                    f"[{station['name']}] Pré-filtro ({self.speech_filter}): {ratio:.0%} do áudio "
+                    f"foi ao VOSK"
+                )
+
+    def _on_stream_failure(self, station_id: str, reason: str, retry_s: float):
+        """Callback da captura contínua quando o stream cai."""
+        self.health.record_failure(station_id, reason, retry_in_s=retry_s)
+        FFMPEG_FAILURES.inc(station=self.stations_by_id.get(station_id, {}).get("name", station_id))
+
+    def _on_pcm(self, station_id: str, block: bytes, captured_at: float):
+        """Callback da captura: grava no ring buffer e repassa ao reconhecimento."""
+        ring = self.rings.get(station_id)
+        if ring is None:
+            return
+        ring.write(block, captured_at)
+        self.health.record_success(station_id, len(block))
+        DECODED_BYTES.inc(len(block), station=self.stations_by_id.get(station_id, {}).get("name", station_id))
+
+        if self.recognition_mode == "streaming":
+            recognizer = self.recognizers.get(station_id)
+            if recognizer is not None:
+                recognizer.feed(block, captured_at)
             return
 
-        found_names = [k["keyword"] for k in found]
-        confidence = min(100, len(found) * 30 + 40)  # heurística simples
-        detected_at = brasilia_iso()
+        # Modo janela: a cada CHUNK_BYTES no anel, recorta uma janela para o pool
+        start = max(self.window_offsets.get(station_id, 0), ring.oldest)
+        if ring.total - start < CHUNK_BYTES:
+            return
+        self.window_offsets[station_id] = start + CHUNK_BYTES
+        started_at = ring.time_at(start)
+        item = (station_id, ring.read(start, start + CHUNK_BYTES), started_at, started_at + CHUNK_DURATION_S)
+        self._offer_window(item)
+
+    def start_pcm_share(self) -> PcmShareServer | None:
+        """Publica os ring buffers no socket local (musicas.py não abre outro ffmpeg)."""
+        socket_path = self.config.get("pcm_socket", str(PCM_SOCKET))
+        if not socket_path:
+            return None
+        try:
+            server = PcmShareServer(socket_path, get_ring=self.rings.get)
+        except OSError as e:
+            log.warning(f"Não foi possível abrir o socket de áudio {socket_path}: {e}")
+            return None
+        server.start()
+        return server
+
+    def run_continuous(self):
+        """Mantém as capturas contínuas em sincronia com a config do SAAS."""
+        pcm_share = self.start_pcm_share()
+        synced_at = None
+        while self.running:
+            if synced_at != self.assignment_version():
+                synced_at = self.assignment_version()
+                stations = self.my_stations()
+                keywords = self.saas_data.get("keywords", [])
+                self.sync_streams(stations)
+                log.info(
+                    f"Monitorando {len(self.streams)} estação(ões) em tempo integral"
+                    + (f" (de {len(self.stations_by_id)}, nó {self.shard.node_id})" if self.shard else "")
+                    + f" | {len(keywords)} keyword(s)"
+                )
+            time.sleep(1)
+            self.refresh_config()
+            self.log_speech_stats()
+            self.report_health()
+            self.flush_coalesced()
+            self.release_models()
 
-        log.info(f"[{name}] 🔑 KEYWORDS DETECTADAS: {found_names}")
+        self.log_speech_stats(force=True)
+        if pcm_share is not None:
+            pcm_share.stop()
+        self.stop_streams()
 
-        # Envia para o SAAS (que salva no banco e notifica Telegram)
-        payload = {
-            "stationId": station["id"],
-            "stationName": name,
-            "transcriptionText": text,
-            "detectedKeywords": found_names,
-            "confidence": confidence,
-            "detectedAt": detected_at,
-        }
-        post_event(self.saas_url, self.secret, payload)
+    # ── Modo por blocos (fallback) ────────────────────────────────────────
 
-    def run(self):
-        """Loop principal — monitora todas as estações em paralelo."""
-        log.info("=" * 60)
-        log.info("LHFEX Radio Monitor iniciado")
-        log.info(f"SAAS: {self.saas_url}")
-        log.info("=" * 60)
+    def capture_station(self, station: dict):
+        """Estágio 1 (modo por blocos): captura 30s de uma estação e enfileira."""
+        name = station["name"]
+        url = station.get("streamUrl")
+        if not url:
+            log.warning(f"[{name}] Sem streamUrl — pulando")
+            return
 
-        # Busca config inicial
-        self.refresh_config(force=True)
+        log.info(f"[{name}] Capturando {CHUNK_DURATION_S}s do stream...")
+        started_at = time.time()
+        wav_bytes = capture_stream_wav(url, CHUNK_DURATION_S)
+        CAPTURE_SECONDS.observe(time.time() - started_at, station=name)
+        if not wav_bytes:
+            FFMPEG_FAILURES.inc(station=name)
+            open_s = self.health.record_failure(station["id"], "falha ao capturar áudio")
+            if open_s:
+                log.warning(f"[{name}] Falha ao capturar áudio — circuito aberto por {open_s:.0f}s")
+            else:
+                log.warning(f"[{name}] Falha ao capturar áudio")
+            return
 
+        # O WAV vai inteiro ao worker (que pula o header); o anel guarda o PCM
+        # da captura para os recortes de áudio dos eventos
+        pcm = wav_pcm_view(wav_bytes)
+        ring = self.rings.get(station["id"])
+        if ring is None:
+            ring = self.rings[station["id"]] = PcmRingBuffer(self.ring_seconds, SAMPLE_RATE)
+        ring.write(pcm, started_at)
+        ended_at = started_at + len(pcm) / (SAMPLE_RATE * 2)
+        self.health.record_success(station["id"], len(pcm))
+        DECODED_BYTES.inc(len(pcm), station=name)
+        self._put(self.windows, self._window_entry((station["id"], wav_bytes, started_at, ended_at)))
+
+    def run_chunked(self):
+        """Ciclos de 30s: captura todas as estações em paralelo e espera o pipeline esvaziar."""
+        capture_pool = ThreadPoolExecutor(max_workers=MAX_CAPTURE_WORKERS, thread_name_prefix="capture")
         while self.running:
-            stations = self.saas_data.get("stations", [])
+            stations = self.my_stations()
             keywords = self.saas_data.get("keywords", [])
 
             if not stations:
-                log.warning("Nenhuma estação ativa. Aguardando...")
+                if self.shard is not None and self.stations_by_id:
+                    log.info("Nenhuma estação atribuída a este nó. Aguardando...")
+                else:
+                    log.warning("Nenhuma estação ativa. Aguardando...")
                 time.sleep(CHECK_INTERVAL_S)
                 self.refresh_config()
                 continue
@@ -353,21 +1660,273 @@ class RadioMonitor:
                 f"{len(keywords)} keyword(s): {[k['keyword'] for k in keywords]}"
             )
 
-            # Processa cada estação sequencialmente
-            # (em VMs com 1 CPU, sequencial é mais estável)
-            for station in stations:
-                if not self.running:
-                    break
-                try:
-                    self.monitor_station(station, keywords)
-                except Exception as e:
-                    log.error(f"[{station['name']}] Erro inesperado: {e}")
+            cycle_start = time.time()
+            selected = self.select_for_cycle(stations)
+            wait([capture_pool.submit(self.capture_station, station) for station in selected])
+            self._wait_drained(self.windows)
+            log.info(
+                f"Ciclo concluído em {time.time() - cycle_start:.1f}s "
+                f"({len(selected)}/{len(stations)} estação(ões) capturada(s))"
+            )
+            self.log_speech_stats()
+            self.report_health()
+            self.flush_coalesced()
+            self.release_models()
 
             # Aguarda intervalo e atualiza config
             log.info(f"Aguardando {CHECK_INTERVAL_S}s antes do próximo ciclo...")
             time.sleep(CHECK_INTERVAL_S)
             self.refresh_config()
 
+        capture_pool.shutdown(wait=False, cancel_futures=True)
+
+    # ── Replay (backfill) ─────────────────────────────────────────────────
+
+    def replay_station(self, path: Path, station: str | None, offline: bool) -> dict | None:
+        """Estação de um arquivo: --station ou a pasta dele, casada por id ou nome no SAAS."""
+        wanted = station or path.parent.name
+        for s in self.stations_by_id.values():
+            if wanted == s["id"] or tokenize(wanted) == tokenize(s["name"]):
+                return s
+        # Saída em arquivo não precisa de estação cadastrada
+        return {"id": wanted, "name": wanted} if offline else None
+
+    def run_replay(
+        self,
+        paths: list[str],
+        output: Path | None = None,
+        checkpoint_path: Path | None = None,
+        station: str | None = None,
+        start: float | None = None,
+        keywords: list[str] | None = None,
+    ):
+        """
+        Roda decodificação → transcrição → match sobre áudio gravado, sem
+        esperar o tempo real: vários arquivos em paralelo (um ffmpeg por
+        arquivo) e as janelas de todos eles disputando o pool de workers.
+        Os eventos levam o horário em que o trecho foi ao ar e `backfill`
+        (o SAAS salva sem notificar o Telegram). Com `output`, vão para um
+        arquivo JSON Lines em vez do SAAS.
+        """
+        offline = output is not None
+        files = discover_audio_files(paths)
+        if not files:
+            log.error("Replay: nenhum arquivo de áudio encontrado")
+            return
+        if not (offline and keywords):
+            self.refresh_config(force=True)
+        if keywords:
+            self.keyword_index = self.build_keyword_index(
+                [{"id": None, "keyword": k, "stationId": None} for k in keywords]
+            )
+        if not self.keyword_index.keywords:
+            log.error("Replay: nenhuma keyword (SAAS fora do ar? use --keyword)")
+            return
+
+        checkpoint = ReplayCheckpoint(checkpoint_path or self.outbox_dir / "replay-checkpoint.json")
+        jobs = []
+        for path in files:
+            if checkpoint.is_complete(path):
+                continue
+            st = self.replay_station(path, station, offline)
+            air_start = parse_air_time(path) or start
+            if st is None:
+                log.warning(f"Replay: estação de {path} não encontrada no SAAS (use --station) — ignorado")
+            elif air_start is None:
+                log.warning(f"Replay: {path.name} sem horário no nome (use --start) — ignorado")
+            else:
+                jobs.append((path, st, air_start))
+        log.info(
+            f"Replay: {len(jobs)} arquivo(s) a processar ({len(files) - len(jobs)} concluído(s)/ignorado(s)) | "
+            f"{len(self.keyword_index.keywords)} keyword(s) | saída: {output or self.saas_url}"
+        )
+        if not jobs:
+            return
+
+        # Outbox próprio: não disputa o outbox-monitor.db com o monitor ao vivo
+        sink = EventFileSink(output) if offline else Outbox(
+            self.outbox_dir / "outbox-replay.db", self.saas_url, self.secret, logger=log
+        )
+        # Cooldown do replay só em memória: não mistura com as janelas do monitor ao vivo
+        if self.coalescer is not None:
+            self.coalescer.close()
+            self.coalescer = DetectionCoalescer(None, self.cooldown_s, self.coalesce_max_s, logger=log)
+        self.replaying = True
+        self._start_pool({self.models.tier(st) for _, st, _ in jobs})
+        sink.start()
+        self._replay_totals = {"audio_s": 0.0, "events": 0}
+        self._replay_lock = threading.Lock()
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self.transcribe_workers, thread_name_prefix="replay") as files_pool:
+            for job in jobs:
+                files_pool.submit(self._replay_file, *job, sink, checkpoint, offline)
+
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.flush_coalesced(sink)
+        sink.stop(flush_timeout=0 if offline else REPLAY_FLUSH_S)
+        elapsed = time.time() - started
+        audio_s = self._replay_totals["audio_s"]
+        log.info(
+            f"Replay concluído: {audio_s / 3600:.1f}h de áudio em {elapsed / 60:.1f} min "
+            f"({audio_s / max(elapsed, 1e-3):.0f}x tempo real), {self._replay_totals['events']} evento(s)"
+        )
+        if not offline and sink.pending():
+            log.warning(f"Replay: {sink.pending()} evento(s) ainda no outbox-replay.db — enviados no próximo --replay")
+
+    def _replay_file(
+        self, path: Path, station: dict, air_start: float, sink, checkpoint: ReplayCheckpoint, offline: bool
+    ):
+        """Um arquivo: janelas em ordem no pool; o checkpoint só avança pelo prefixo já casado."""
+        if not self.running:
+            return
+        done_s = checkpoint.offset(path)
+        if done_s:
+            log.info(f"[replay] {path.name}: retomando em {done_s / 60:.1f} min")
+        t0 = time.time()
+        audio_s, events = 0.0, 0
+        inflight: deque = deque()
+
+        def finish(future, offset, length_s, pcm):
+            nonlocal audio_s, events
+            text, words, _ = future.result()
+            window_start = air_start + offset
+            payload = self._replay_match(station, text, words, window_start, window_start + length_s, pcm, offline)
+            if payload is not None:
+                sink.put("event", payload)
+                events += 1
+            audio_s += length_s
+            checkpoint.advance(path, offset + length_s)
+
+        windows = decode_windows(path, CHUNK_DURATION_S, start_s=done_s)
+        broken = False
+        try:
+            for offset, pcm in windows:
+                if not self.running:
+                    break
+                future = self.submit_window(station["id"], pcm)
+                inflight.append((future, offset, len(pcm) / (SAMPLE_RATE * 2), pcm))
+                # Até `transcribe_workers` janelas por arquivo: um arquivo longo sozinho ocupa o pool
+                if len(inflight) >= self.transcribe_workers:
+                    finish(*inflight.popleft())
+            while inflight and self.running:
+                finish(*inflight.popleft())
+            if self.running:
+                checkpoint.advance(path, checkpoint.offset(path), complete=True)
+        except BrokenProcessPool:
+            broken = True
+        except Exception as e:
+            log.error(f"[replay] {path.name}: {e}")
+            return
+        finally:
+            windows.close()
+
+        if broken:
+            # Worker morreu: com o pool recriado, o arquivo recomeça do checkpoint
+            log.error(f"[replay] {path.name}: o worker de transcrição morreu")
+            if self._restart_pool():
+                self._replay_file(path, station, air_start, sink, checkpoint, offline)
+            return
+
+        elapsed = time.time() - t0
+        with self._replay_lock:
+            self._replay_totals["audio_s"] += audio_s
+            self._replay_totals["events"] += events
+        log.info(
+            f"[replay] {path.name} ({station['name']}): {audio_s / 60:.1f} min em {elapsed:.0f}s "
+            f"({audio_s / max(elapsed, 1e-3):.1f}x tempo real), {events} evento(s)"
+        )
+
+    def _replay_match(
+        self, station: dict, text: str, words: list[dict], started_at: float, ended_at: float, pcm: bytes,
+        offline: bool,
+    ) -> dict | None:
+        """Match de uma janela do replay; mesmo evento do modo ao vivo, no horário original."""
+        if not text:
+            return None
+        for w in words:
+            w["start"] += started_at
+            w["end"] += started_at
+        if self.kws_mode != "only":
+            self._archive(station["id"], text, words, started_at, ended_at)
+        if words:
+            hits = self.keyword_index.find_words(station["id"], words)
+        else:
+            hits = [(kw, None, None) for kw in self.keyword_index.match(station["id"], text)]
+        if not hits:
+            return None
+        item = {"text": text, "words": words, "started_at": started_at, "ended_at": ended_at}
+        payload, air_start, air_end = build_event_payload(station, item, hits)
+        payload["backfill"] = True
+        log.info(f"[replay] [{station['name']}] {payload['detectedAt']} 🔑 {payload['detectedKeywords']}")
+        if self.coalescer is not None:
+            payload = self.coalescer.admit(payload, hit_times(item, hits))
+            if payload is None:
+                return None
+
+        if self.audio_snippets and not offline:
+            # O recorte sai da própria janela (o arquivo não passa pelo ring buffer)
+            lo = max(0, int((air_start - SNIPPET_BEFORE_S - started_at) * SAMPLE_RATE)) * 2
+            hi = min(len(pcm), int((air_end + SNIPPET_AFTER_S - started_at) * SAMPLE_RATE) * 2)
+            if hi > lo:
+                audio, mime = encode_snippet(pcm[lo:hi])
+                payload["audioSnippet"] = base64.b64encode(audio).decode("ascii")
+                payload["audioMimeType"] = mime
+                payload["audioStartedAt"] = epoch_to_brasilia_iso(started_at + lo / (SAMPLE_RATE * 2))
+                payload["audioDurationS"] = round((hi - lo) / (SAMPLE_RATE * 2), 1)
+        return payload
+
+    def run(self):
+        """Loop principal — monitora todas as estações."""
+        log.info("=" * 60)
+        log.info("LHFEX Radio Monitor iniciado")
+        log.info(f"SAAS: {self.saas_url}")
+        if self.shard is not None:
+            log.info(f"Nó: {self.shard.node_id} (sharding ligado)")
+        log.info(
+            f"Modo de captura: {self.capture_mode} | reconhecimento: {self.recognition_mode} | "
+            f"keyword spotting: {self.kws_mode} | match aproximado: {'sim' if self.fuzzy_matching else 'não'}"
+        )
+        log.info("=" * 60)
+
+        # Config inicial (e nós vivos) antes do pool: só os modelos das estações
+        # ativas são carregados — e antes do fork, para os workers os herdarem
+        self.refresh_config(force=True)
+        if self.shard is not None:
+            self.shard.renew()
+
+        # Pool antes das threads de captura e do pipeline: no fork só a thread
+        # de escrita do log ainda existe (parada durante o fork, ver _start_pool)
+        self.start_pipeline()
+        self.models.start()
+        self.outbox.start()
+        if self.coalescer is not None:
+            self.coalescer.start()
+        metrics_server = self.start_metrics()
+        archive_api = None
+        if self.archive is not None and self.config.get("archive_api_port"):
+            archive_api = start_archive_api(self.archive, int(self.config["archive_api_port"]), logger=log)
+        if self.shard is not None:
+            self.shard.start()
+
+        if self.capture_mode == "chunked":
+            self.run_chunked()
+        else:
+            self.run_continuous()
+
+        # Libera o lease primeiro: os outros nós assumem enquanto este esvazia o pipeline
+        if self.shard is not None:
+            self.shard.stop()
+        self.stop_pipeline()
+        self.flush_coalesced()
+        self.outbox.stop()
+        if self.coalescer is not None:
+            self.coalescer.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if archive_api is not None:
+            archive_api.shutdown()
+        if self.archive is not None:
+            self.archive.close()
         log.info("Monitor encerrado.")
 
     def stop(self):
@@ -377,7 +1936,17 @@ class RadioMonitor:
 # ── Entrypoint ─────────────────────────────────────────────────────────────
 
 def main():
-    monitor = RadioMonitor()
+    parser = argparse.ArgumentParser(description="LHFEX Radio Monitor (VOSK PT-BR)")
+    parser.add_argument("--chunked", action="store_true", help="força o modo antigo por blocos")
+    parser.add_argument("--replay", nargs="+", metavar="ARQUIVO|PASTA", help="processa áudio gravado (backfill)")
+    parser.add_argument("--output", type=Path, help="replay: grava os eventos neste .jsonl em vez do SAAS")
+    parser.add_argument("--checkpoint", type=Path, help="replay: arquivo de progresso (retomada)")
+    parser.add_argument("--station", help="replay: id ou nome da estação de todos os arquivos")
+    parser.add_argument("--start", help="replay: horário de início (ISO, Brasília) se o nome não tiver")
+    parser.add_argument("--keyword", action="append", help="replay: só estas keywords (repetível)")
+    args = parser.parse_args()
+
+    monitor = RadioMonitor(capture_mode="chunked" if args.chunked else None)
 
     # Graceful shutdown com Ctrl+C ou SIGTERM
     def handle_signal(sig, frame):
@@ -387,7 +1956,19 @@ def main():
     signal.signal(signal.SIGINT, handle_signal)
     signal.signal(signal.SIGTERM, handle_signal)
 
-    monitor.run()
+    if args.replay:
+        monitor.run_replay(
+            args.replay,
+            output=args.output,
+            checkpoint_path=args.checkpoint,
+            station=args.station,
+            start=parse_start(args.start) if args.start else None,
+            keywords=args.keyword,
+        )
+    else:
+        monitor.run()
+    # Pool de transcrição que não se recupera: código de erro para o systemd reiniciar
+    sys.exit(monitor.exit_code)
 
 
 if __name__ == "__main__":
@@ -8,10 +8,16 @@ Identifica músicas tocadas nas rádios monitoradas usando a API ACRCloud
 
 Busca estações e credenciais ACRCloud do LHFEX SaaS via API.
 Quando identifica uma música com confiança >= 70, envia ao SAAS
-que salva no banco e exibe na UI do Radio Monitor.
+que salva no banco e exibe na UI do Radio Monitor. O envio passa pelo
+outbox (outbox-musicas.db): se o SAAS estiver fora, nada se perde.
+
+Com o monitor.py rodando em captura contínua, o áudio de cada estação é
+pego do socket local dele (pcm.sock) — sem segunda conexão com a rádio nem
+segundo decode; reamostrado para 8kHz e enviado como WAV. Sem o monitor,
+volta a capturar com um ffmpeg próprio.
 
 Requisitos:
-  pip3 install requests
+  pip3 install requests numpy
 
 ffmpeg deve estar instalado:
   sudo apt install ffmpeg -y
@@ -25,19 +31,47 @@ Variáveis de ambiente no SAAS (Coolify):
   ACRCLOUD_ACCESS_SECRET = <seu access secret>
 
 Free tier ACRCloud: 3 horas/dia de identificação (~720 chamadas de 15s/dia).
+O loop contínuo não varre mais todas as estações em intervalo fixo: o
+acr_scheduler.py reparte a cota ao longo do dia (balde de tokens), consulta
+mais as estações que mais tocam música e agenda a próxima consulta para o
+fim previsto da música atual. Estado em acr-schedule.json (ao lado do
+outbox), então reiniciar não zera a conta do dia. Ajustes no config.json:
+"acr_daily_budget" (chamadas/dia, padrão 720) e "acr_max_interval_s".
+
+Modo asyncio ("musicas_async": true no config.json, ou --async): as
+estações vencidas são capturadas ao mesmo tempo (ffmpeg como subprocessos
+asyncio, no máximo "musicas_max_captures") e identificadas em paralelo por
+um pool de conexões HTTP, respeitando "acr_concurrency" chamadas
+simultâneas e "acr_max_qps" por segundo (ver AcrRateLimiter). Um ciclo por
+todas as estações leva perto de uma captura (~15s), não 15s × estações.
+
+Com "sharding": true (várias VMs, ver sharding.py), o loop contínuo só
+consulta as estações deste nó — a mesma divisão do monitor.py, então o
+áudio continua vindo do pcm.sock local — e a cota "acr_daily_budget" (da
+conta ACRCloud) é dividida entre as VMs vivas pelo "node_weight".
+
+"musicas_metrics_port" no config.json liga um /metrics (Prometheus) local:
+latência de captura e do ACRCloud por estação, chamadas, cota restante e
+falhas do ffmpeg (ver metrics.py).
 
 Uso:
-  python3 musicas.py           # loop contínuo (padrão: 30min entre ciclos)
+  python3 musicas.py           # loop contínuo (agendado pela cota ACRCloud)
   python3 musicas.py --once    # roda apenas um ciclo e encerra
   python3 musicas.py --test    # testa sem salvar (só printa resultado)
+  python3 musicas.py --async   # capturas e identificações em paralelo (asyncio)
+
+Log: musicas.log em JSON por linha, com rotação e nível do config.json
+("log_level", "log_format", "log_max_mb", "log_backups" — ver logsetup.py).
 """
 
+import asyncio
 import json
 import sys
 import os
 import subprocess
 import time
 import signal
+import uuid
 import logging
 import base64
 import hmac
@@ -46,31 +80,51 @@ from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from acr_scheduler import ACR_CONCURRENCY, ACR_MAX_QPS, DAILY_BUDGET, AcrRateLimiter, AcrScheduler
+from logsetup import fields, setup_logging
+from metrics import REGISTRY, start_metrics_server
+from outbox import Outbox
+from pcm_share import fetch_pcm, pcm_to_wav, resample_pcm
+from song_cache import NowPlayingCache
+from saas_config import SaasConfigClient
+from sharding import LEASE_S, ShardMembership, default_node_id
 
 # ── Configuração ───────────────────────────────────────────────────────────
 
-CONFIG_FILE = Path(__file__).parent / "config.json"
+CONFIG_FILE = Path(os.environ.get("RADIO_MONITOR_CONFIG") or Path(__file__).parent / "config.json")
 
 CAPTURE_DURATION_S = 15       # Segundos de áudio por identificação
-INTERVAL_S = 1800             # 30 minutos entre ciclos completos
+INTERVAL_S = 1800             # Maior intervalo entre consultas de uma estação (sem música)
+SCHEDULE_LOG_S = 3600         # Resumo do agendador/cota no log a cada 1h
 MIN_CONFIDENCE = 70           # Score mínimo ACRCloud para salvar (0-100)
 CONFIG_REFRESH_S = 600        # Atualiza config do SAAS a cada 10 min
+ACR_SAMPLE_RATE = 8000        # ACRCloud aceita 8kHz
+PCM_SOCKET = Path(__file__).parent / "pcm.sock"  # Áudio já decodificado pelo monitor.py
+MAX_PARALLEL_CAPTURES = 20    # Modo asyncio: ffmpeg simultâneos
+ACR_QPS_LIMITED = 3015        # Status ACRCloud "QPS limit exceeded"
 
 BRASILIA_TZ = timezone(timedelta(hours=-3))
 
 # ── Logging ────────────────────────────────────────────────────────────────
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(Path(__file__).parent / "musicas.log", encoding="utf-8"),
-    ],
-)
+# Fila + thread de escrita, JSON com rotação (ver logsetup.py)
+setup_logging(Path(__file__).parent / "musicas.log", CONFIG_FILE)
 log = logging.getLogger("musicas")
 
+# ── Métricas ───────────────────────────────────────────────────────────────
+
+CAPTURE_SECONDS = REGISTRY.histogram(
+    "musicas_capture_seconds", "Tempo para obter o trecho de áudio", ("station", "source")
+)
+IDENTIFY_SECONDS = REGISTRY.histogram("musicas_acr_identify_seconds", "Latência da chamada ACRCloud", ("station",))
+ACR_CALLS = REGISTRY.counter("musicas_acr_calls_total", "Chamadas ao ACRCloud por resultado", ("result",))
+ACR_QUOTA_REMAINING = REGISTRY.gauge("musicas_acr_quota_remaining", "Chamadas ACRCloud restantes hoje (UTC)")
+ACR_TOKENS = REGISTRY.gauge("musicas_acr_tokens", "Tokens disponíveis no balde de cota")
+CACHE_HITS = REGISTRY.counter("musicas_cache_hits_total", "Consultas evitadas pelo cache \"tocando agora\"")
+FFMPEG_FAILURES = REGISTRY.counter("musicas_ffmpeg_failures_total", "Capturas ffmpeg sem áudio", ("station",))
+
 # ── Helpers ────────────────────────────────────────────────────────────────
 
 def load_config() -> dict:
@@ -83,21 +137,6 @@ def load_config() -> dict:
         return json.load(f)
 
 
-def fetch_saas_config(saas_url: str, secret: str) -> dict:
-    """Busca estações ativas e credenciais ACRCloud do SAAS."""
-    try:
-        resp = requests.get(
-            f"{saas_url}/api/radio-monitor-config",
-            headers={"x-radio-monitor-key": secret},
-            timeout=15,
-        )
-        resp.raise_for_status()
-        return resp.json()
-    except Exception as e:
-        log.error("Falha ao buscar config do SAAS: %s", e)
-        return {}
-
-
 def build_acrcloud_signature(access_key: str, access_secret: str) -> tuple[str, str, str]:
     """
     Gera timestamp e assinatura HMAC-SHA1 para autenticação ACRCloud.
@@ -125,34 +164,18 @@ def build_acrcloud_signature(access_key: str, access_secret: str) -> tuple[str,
 
 def capture_audio(stream_url: str, duration: int = CAPTURE_DURATION_S) -> bytes | None:
     """
-    Captura 'duration' segundos de áudio do stream e retorna como bytes MP3.
+    Captura 'duration' segundos de áudio do stream e retorna PCM 8kHz mono
+    16-bit cru (vira WAV no envio; o PCM também alimenta a impressão digital
+    do cache "tocando agora").
     Usa ffmpeg (mesmo padrão do monitor.py mas menor e para ACRCloud).
     """
-    cmd = [
-        "ffmpeg",
-        "-y",                        # sobrescreve sem perguntar
-        "-i", stream_url,
-        "-t", str(duration),         # duração máxima
-        "-ar", "8000",               # ACRCloud aceita 8kHz
-        "-ac", "1",                  # mono
-        "-f", "mp3",
-        "-loglevel", "error",
-        "pipe:1",                    # saída para stdout
-    ]
     try:
         result = subprocess.run(
-            cmd,
+            ffmpeg_command(stream_url, duration),
             capture_output=True,
             timeout=duration + 20,
         )
-        if result.returncode != 0:
-            log.warning("ffmpeg retornou código %d: %s", result.returncode, result.stderr.decode()[:200])
-            return None
-        audio_bytes = result.stdout
-        if len(audio_bytes) < 1024:
-            log.warning("Áudio muito curto (%d bytes) — stream offline?", len(audio_bytes))
-            return None
-        return audio_bytes
+        return _captured_pcm(result.returncode, result.stdout, result.stderr)
     except subprocess.TimeoutExpired:
         log.warning("Timeout ao capturar áudio de %s", stream_url)
         return None
@@ -164,38 +187,121 @@ def capture_audio(stream_url: str, duration: int = CAPTURE_DURATION_S) -> bytes
         return None
 
 
+async def capture_audio_async(stream_url: str, duration: int = CAPTURE_DURATION_S) -> bytes | None:
+    """capture_audio como subprocesso asyncio: várias estações capturam ao mesmo tempo."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *ffmpeg_command(stream_url, duration),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        log.error("ffmpeg não encontrado. Instale com: sudo apt install ffmpeg -y")
+        return None
+    except Exception as e:
+        log.error("Erro ao capturar áudio: %s", e)
+        return None
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=duration + 20)
+    except asyncio.TimeoutError:
+        log.warning("Timeout ao capturar áudio de %s", stream_url)
+        return None
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+    return _captured_pcm(proc.returncode, stdout, stderr)
+
+
+def ffmpeg_command(stream_url: str, duration: int) -> list[str]:
+    return [
+        "ffmpeg",
+        "-y",                        # sobrescreve sem perguntar
+        "-i", stream_url,
+        "-t", str(duration),         # duração máxima
+        "-ar", str(ACR_SAMPLE_RATE), # ACRCloud aceita 8kHz
+        "-ac", "1",                  # mono
+        "-f", "s16le",
+        "-loglevel", "error",
+        "pipe:1",                    # saída para stdout
+    ]
+
+
+def _captured_pcm(returncode: int, stdout: bytes, stderr: bytes) -> bytes | None:
+    if returncode != 0:
+        log.warning("ffmpeg retornou código %d: %s", returncode, stderr.decode(errors="replace")[:200])
+        return None
+    if len(stdout) < 1024:
+        log.warning("Áudio muito curto (%d bytes) — stream offline?", len(stdout))
+        return None
+    return stdout
+
+
+def shared_audio(socket_path: str, station_id: str, duration: int = CAPTURE_DURATION_S) -> bytes | None:
+    """
+    Pega os últimos `duration` segundos da estação da captura contínua do
+    monitor.py (socket local) e reamostra para PCM 8kHz.
+    None se o monitor não estiver rodando ou não tiver a estação.
+    """
+    shared = fetch_pcm(socket_path, station_id, duration)
+    if shared is None:
+        return None
+    pcm, sample_rate, _ = shared
+    if len(pcm) < sample_rate * 2 * duration // 2:
+        return None  # menos da metade do pedido: melhor capturar direto
+    return resample_pcm(pcm, sample_rate, ACR_SAMPLE_RATE)
+
+
+def acr_identify_request(
+    audio_bytes: bytes,
+    host: str,
+    access_key: str,
+    access_secret: str,
+    session: requests.Session | None = None,
+) -> dict:
+    """POST /v1/identify; devolve o JSON do ACRCloud (erros de rede/HTTP sobem)."""
+    timestamp, signature, _ = build_acrcloud_signature(access_key, access_secret)
+    # Host com esquema explícito (ex.: mock local do bench) é usado como está
+    base_url = host.rstrip("/") if host.startswith(("http://", "https://")) else f"https://{host}"
+
+    response = (session or requests).post(
+        f"{base_url}/v1/identify",
+        data={
+            "sample_bytes": str(len(audio_bytes)),
+            "access_key": access_key,
+            "data_type": "audio",
+            "signature_version": "1",
+            "signature": signature,
+            "timestamp": timestamp,
+        },
+        files={"sample": ("segment.wav", audio_bytes, "audio/wav")},
+        timeout=30,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
 def identify_song(
     audio_bytes: bytes,
     host: str,
     access_key: str,
     access_secret: str,
+    session: requests.Session | None = None,
 ) -> dict | None:
     """
     Envia áudio ao ACRCloud e retorna metadados da música identificada.
     Retorna None se não identificou ou se confiança < MIN_CONFIDENCE.
     """
-    timestamp, signature, _ = build_acrcloud_signature(access_key, access_secret)
-
     try:
-        response = requests.post(
-            f"https://{host}/v1/identify",
-            data={
-                "sample_bytes": str(len(audio_bytes)),
-                "access_key": access_key,
-                "data_type": "audio",
-                "signature_version": "1",
-                "signature": signature,
-                "timestamp": timestamp,
-            },
-            files={"sample": ("segment.mp3", audio_bytes, "audio/mpeg")},
-            timeout=30,
-        )
-        response.raise_for_status()
-        result = response.json()
+        result = acr_identify_request(audio_bytes, host, access_key, access_secret, session)
     except Exception as e:
         log.error("Erro na chamada ACRCloud: %s", e)
         return None
+    return parse_acr_result(result)
 
+
+def parse_acr_result(result: dict) -> dict | None:
+    """Metadados da música na resposta do ACRCloud (None: não identificou ou confiança baixa)."""
     # Verifica se identificou algo
     status_code = result.get("status", {}).get("code", -1)
     if status_code != 0:
@@ -237,18 +343,24 @@ def identify_song(
         "album": album,
         "releaseYear": release_year,
         "confidence": round(score, 2),
+        # Onde o trecho caiu na faixa e quanto ela dura: prevê o fim da música
+        "playOffsetMs": music.get("play_offset_ms"),
+        "durationMs": music.get("duration_ms"),
     }
 
 
 def post_song(
-    saas_url: str,
-    secret: str,
+    outbox: Outbox | None,
     station_id: str,
     song_info: dict,
     test_mode: bool = False,
 ) -> bool:
-    """Envia música identificada para o SAAS. Retorna True se sucesso."""
+    """
+    Grava a música identificada no outbox (enviada ao SAAS em segundo plano,
+    com retry). Retorna True se o item ficou salvo.
+    """
     payload = {
+        "songKey": uuid.uuid4().hex,  # Reenvio pelo outbox (ex.: timeout) não duplica a música no SAAS
         "stationId": station_id,
         "title": song_info["title"],
         "artist": song_info["artist"],
@@ -263,32 +375,65 @@ def post_song(
         return True
 
     try:
-        resp = requests.post(
-            f"{saas_url}/api/radio-monitor-song",
-            headers={
-                "x-radio-monitor-key": secret,
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=10,
-        )
-        resp.raise_for_status()
+        outbox.put("song", payload)
         return True
     except Exception as e:
-        log.error("Falha ao enviar música ao SAAS: %s", e)
+        log.error("Falha ao gravar música no outbox: %s", e)
         return False
 
 
 # ── Loop principal ─────────────────────────────────────────────────────────
 
 class MusicMonitor:
-    def __init__(self, once: bool = False, test_mode: bool = False):
+    def __init__(self, once: bool = False, test_mode: bool = False, async_mode: bool = False):
         self.once = once
         self.test_mode = test_mode
         self.running = True
-        self.config = {}
+        # config.json é lido uma vez; estações/credenciais vêm do SAAS (condicional)
+        self.config = load_config()
+        self.config_client = SaasConfigClient(
+            self.config.get("saas_url", ""),
+            self.config.get("radio_monitor_secret", ""),
+            logger=log,
+        )
         self.saas_data = {}
         self.last_config_fetch = 0
+        self.outbox: Outbox | None = None
+        # "" desliga o reaproveitamento e volta a abrir um ffmpeg por identificação
+        self.pcm_socket = self.config.get("pcm_socket", str(PCM_SOCKET))
+        self.now_playing = NowPlayingCache()
+        # Agenda e cota persistidas: reiniciar não zera a contagem do dia
+        state_dir = Path(self.config.get("outbox_dir") or Path(__file__).parent)
+        self.acr_daily_budget = int(self.config.get("acr_daily_budget", DAILY_BUDGET))
+        self.scheduler = AcrScheduler(
+            state_dir / "acr-schedule.json",
+            daily_budget=self.acr_daily_budget,
+            max_interval_s=int(self.config.get("acr_max_interval_s", INTERVAL_S)),
+        )
+        # Várias VMs: só as estações deste nó, com a parte dele da cota (só no loop contínuo)
+        self.shard: ShardMembership | None = None
+        self._shard_version = -1
+        if self.config.get("sharding", False) and not (once or test_mode):
+            self.shard = ShardMembership(
+                self.config.get("saas_url", ""),
+                self.config.get("radio_monitor_secret", ""),
+                str(self.config.get("node_id") or default_node_id()),
+                role="musicas",
+                lease_s=float(self.config.get("node_lease_s", LEASE_S)),
+                weight=float(self.config.get("node_weight", 1.0)),
+                logger=log,
+            )
+        self.saved = 0
+
+        # Modo asyncio: capturas e chamadas ACRCloud em paralelo
+        self.async_mode = async_mode or bool(self.config.get("musicas_async", False))
+        self.acr_concurrency = int(self.config.get("acr_concurrency", ACR_CONCURRENCY))
+        self.acr_max_qps = float(self.config.get("acr_max_qps", ACR_MAX_QPS))
+        self._captures = asyncio.Semaphore(int(self.config.get("musicas_max_captures", MAX_PARALLEL_CAPTURES)))
+        # Conexões reaproveitadas com o ACRCloud (uma por chamada simultânea)
+        self.http = requests.Session()
+        self.http.mount("https://", HTTPAdapter(pool_maxsize=max(1, self.acr_concurrency)))
+        self.http.mount("http://", HTTPAdapter(pool_maxsize=max(1, self.acr_concurrency)))
 
         signal.signal(signal.SIGINT, self._shutdown)
         signal.signal(signal.SIGTERM, self._shutdown)
@@ -301,12 +446,10 @@ class MusicMonitor:
         now = time.time()
         if now - self.last_config_fetch < CONFIG_REFRESH_S and self.saas_data:
             return
-        self.config = load_config()
-        self.saas_data = fetch_saas_config(
-            self.config.get("saas_url", ""),
-            self.config.get("radio_monitor_secret", ""),
-        )
         self.last_config_fetch = now
+        if self.config_client.fetch() is None and self.saas_data:
+            return  # 304 / sem mudanças / falha: segue com a config atual
+        self.saas_data = self.config_client.data
         stations = self.saas_data.get("stations", [])
         acrcloud = self.saas_data.get("acrcloud", {})
         log.info(
@@ -315,93 +458,368 @@ class MusicMonitor:
             acrcloud.get("host", "não configurado"),
         )
 
-    def run_cycle(self):
-        """Roda um ciclo completo: identifica músicas em todas as estações ativas."""
-        self._refresh_config()
-
-        stations = self.saas_data.get("stations", [])
+    def _acr_credentials(self) -> tuple[str, str, str] | None:
         acrcloud = self.saas_data.get("acrcloud", {})
-        saas_url = self.config.get("saas_url", "")
-        secret = self.config.get("radio_monitor_secret", "")
-
         host = acrcloud.get("host", "").strip()
         access_key = acrcloud.get("access_key", "").strip()
         access_secret = acrcloud.get("access_secret", "").strip()
-
         if not host or not access_key or not access_secret:
             log.warning(
                 "Credenciais ACRCloud não configuradas. "
                 "Configure ACRCLOUD_HOST, ACRCLOUD_ACCESS_KEY e ACRCLOUD_ACCESS_SECRET no SAAS (Coolify)."
             )
+            return None
+        return host, access_key, access_secret
+
+    def _active_stations(self) -> list[dict]:
+        stations = []
+        for station in self.saas_data.get("stations", []):
+            if station.get("streamUrl"):
+                stations.append(station)
+            else:
+                log.debug("Estação '%s' sem streamUrl — pulando.", station.get("name", "?"))
+        if self.shard is None:
+            return stations
+        if self._shard_version != self.shard.version:
+            # Nós entraram ou saíram: refaz a parte deste nó na cota da conta
+            self._shard_version = self.shard.version
+            self.scheduler.set_budget(max(1, round(self.acr_daily_budget * self.shard.share())))
+            log.info(
+                "Sharding: %d nó(s) vivo(s) — cota deste nó %d/%d chamadas/dia",
+                len(self.shard.nodes), self.scheduler.daily_budget, self.acr_daily_budget,
+            )
+        return self.shard.assign(stations)
+
+    def probe_station(self, station: dict, credentials: tuple[str, str, str]) -> tuple[str, float | None]:
+        """
+        Captura e identifica a música atual de uma estação.
+        Retorna (resultado, fim previsto da música) — resultado em
+        acr_scheduler.OUTCOMES; só "identified"/"miss" gastam cota.
+        """
+        station_name = station.get("name", station.get("id", "?"))
+        pcm = None
+        t0 = time.time()
+        if self.pcm_socket:
+            pcm = shared_audio(self.pcm_socket, station["id"], CAPTURE_DURATION_S)
+            self._observe_shared(station_name, pcm, t0)
+        if pcm is None:
+            self._log_capture(station)
+            t0 = time.time()
+            pcm = capture_audio(station["streamUrl"], CAPTURE_DURATION_S)
+            CAPTURE_SECONDS.observe(time.time() - t0, station=station_name, source="ffmpeg")
+        if pcm is None:
+            return self._no_audio(station_name)
+
+        cached = self._cached(station, pcm)
+        if cached is not None:
+            return cached
+
+        audio = pcm_to_wav(pcm, ACR_SAMPLE_RATE)
+        log.info("Identificando via ACRCloud (%d bytes)...", len(audio))
+        self.scheduler.consume()
+        t0 = time.time()
+        song = identify_song(audio, *credentials, session=self.http)
+        elapsed = time.time() - t0
+        IDENTIFY_SECONDS.observe(elapsed, station=station_name)
+        return self._identified(station, pcm, song, elapsed)
+
+    async def probe_station_async(
+        self, station: dict, credentials: tuple[str, str, str], limiter: AcrRateLimiter
+    ) -> tuple[str, float | None]:
+        """
+        probe_station no modo asyncio. A cota é conferida só na hora da
+        chamada: sem token, devolve "skipped" (não agenda nada).
+        """
+        station_name = station.get("name", station.get("id", "?"))
+        pcm = None
+        t0 = time.time()
+        if self.pcm_socket:
+            pcm = await asyncio.to_thread(shared_audio, self.pcm_socket, station["id"], CAPTURE_DURATION_S)
+            self._observe_shared(station_name, pcm, t0)
+        if pcm is None:
+            async with self._captures:
+                self._log_capture(station)
+                t0 = time.time()
+                pcm = await capture_audio_async(station["streamUrl"], CAPTURE_DURATION_S)
+                CAPTURE_SECONDS.observe(time.time() - t0, station=station_name, source="ffmpeg")
+        if pcm is None:
+            return self._no_audio(station_name)
+
+        cached = self._cached(station, pcm)
+        if cached is not None:
+            return cached
+
+        audio = pcm_to_wav(pcm, ACR_SAMPLE_RATE)
+        async with limiter:
+            if not self.scheduler.available():
+                log.info("'%s': sem cota ACRCloud agora — fica para a próxima.", station_name)
+                return "skipped", None
+            log.info("Identificando '%s' via ACRCloud (%d bytes)...", station_name, len(audio))
+            self.scheduler.consume()
+            t0 = time.time()
+            try:
+                result = await asyncio.to_thread(acr_identify_request, audio, *credentials, self.http)
+            except Exception as e:
+                log.error("Erro na chamada ACRCloud: %s", e)
+                result = None
+            elapsed = time.time() - t0
+            IDENTIFY_SECONDS.observe(elapsed, station=station_name)
+            if result is not None and result.get("status", {}).get("code") == ACR_QPS_LIMITED:
+                limiter.backoff()
+                ACR_CALLS.inc(result="rate_limited")
+                log.warning("'%s': ACRCloud recusou por QPS — segurando as próximas chamadas.", station_name)
+                return "error", None
+        return self._identified(station, pcm, parse_acr_result(result) if result is not None else None, elapsed)
+
+    def _observe_shared(self, station_name: str, pcm: bytes | None, t0: float):
+        if pcm is not None:
+            CAPTURE_SECONDS.observe(time.time() - t0, station=station_name, source="shared")
+            log.info(
+                "Áudio de '%s' reaproveitado da captura do monitor.py", station_name,
+                extra=fields(station_name, "capture", time.time() - t0),
+            )
+
+    def _log_capture(self, station: dict):
+        log.info(
+            "Capturando %ds de áudio: %s (%s)",
+            CAPTURE_DURATION_S, station.get("name", station.get("id", "?")), station["streamUrl"][:60],
+        )
+
+    def _no_audio(self, station_name: str) -> tuple[str, None]:
+        FFMPEG_FAILURES.inc(station=station_name)
+        log.warning("Sem áudio de '%s' — pulando.", station_name, extra=fields(station_name, "capture"))
+        return "error", None
+
+    def _cached(self, station: dict, pcm: bytes) -> tuple[str, float | None] | None:
+        """Mesma música ainda tocando (relógio + impressão digital): não gasta cota."""
+        cached = self.now_playing.lookup(station["id"], pcm, ACR_SAMPLE_RATE)
+        if cached is None:
+            return None
+        CACHE_HITS.inc()
+        station_name = station.get("name", station["id"])
+        log.info(
+            "'%s': ainda tocando %s — %s (consulta ACRCloud evitada)",
+            station_name, cached["title"], cached["artist"],
+            extra=fields(station_name, "identify"),
+        )
+        return "cached", self.now_playing.ends_at(station["id"])
+
+    def _identified(
+        self, station: dict, pcm: bytes, song: dict | None, elapsed: float
+    ) -> tuple[str, float | None]:
+        """Registra o resultado do ACRCloud: cache "tocando agora" e envio ao SAAS."""
+        station_name = station.get("name", station.get("id", "?"))
+        ACR_CALLS.inc(result="identified" if song else "miss")
+        if song is None:
+            log.info(
+                "'%s': música não identificada ou confiança insuficiente.", station_name,
+                extra=fields(station_name, "identify", elapsed),
+            )
+            self.now_playing.forget(station["id"])
+            return "miss", None
+
+        log.info(
+            "'%s': 🎵 %s — %s (%.0f%% confiança)",
+            station_name,
+            song["title"],
+            song["artist"],
+            song.get("confidence", 0),
+            extra=fields(station_name, "identify", elapsed),
+        )
+
+        repeated = self.now_playing.same_song(station["id"], song)
+        self.now_playing.store(station["id"], song, pcm, ACR_SAMPLE_RATE)
+        ends_at = self.now_playing.ends_at(station["id"])
+        if repeated:
+            # Reidentificação da mesma execução: já foi salva no SAAS
+            return "identified", ends_at
+
+        if post_song(self.outbox, station["id"], song, self.test_mode) and not self.test_mode:
+            self.saved += 1
+        return "identified", ends_at
+
+    async def _probe_many(self, stations: list[dict], credentials: tuple[str, str, str], limiter: AcrRateLimiter):
+        """Consulta as estações ao mesmo tempo e agenda a próxima de cada uma."""
+        results = await asyncio.gather(
+            *(self.probe_station_async(station, credentials, limiter) for station in stations),
+            return_exceptions=True,
+        )
+        for station, result in zip(stations, results):
+            if isinstance(result, BaseException):
+                log.error("Erro ao consultar '%s': %s", station.get("name", station["id"]), result)
+                result = ("error", None)
+            outcome, ends_at = result
+            if outcome != "skipped":
+                self.scheduler.record(station["id"], outcome, ends_at)
+
+    def run_cycle(self):
+        """Roda um ciclo completo (--once / --test): todas as estações ativas, uma vez."""
+        self._refresh_config()
+        credentials = self._acr_credentials()
+        if credentials is None:
             return
 
+        stations = self._active_stations()
         if not stations:
             log.info("Nenhuma estação ativa para monitorar.")
             return
 
-        identified = 0
+        saved_before = self.saved
+        t0 = time.time()
         for station in stations:
             if not self.running:
                 break
+            if not self.scheduler.available():
+                log.warning("Cota ACRCloud esgotada (%s) — ciclo interrompido.", self.scheduler.summary())
+                break
+            outcome, ends_at = self.probe_station(station, credentials)
+            self.scheduler.record(station["id"], outcome, ends_at)
 
-            stream_url = station.get("streamUrl")
-            if not stream_url:
-                log.debug("Estação '%s' sem streamUrl — pulando.", station.get("name", "?"))
-                continue
-
-            station_name = station.get("name", station.get("id", "?"))
-            log.info("Capturando %ds de áudio: %s (%s)", CAPTURE_DURATION_S, station_name, stream_url[:60])
-
-            audio = capture_audio(stream_url, CAPTURE_DURATION_S)
-            if audio is None:
-                log.warning("Sem áudio de '%s' — pulando.", station_name)
-                continue
+        log.info(
+            "Ciclo concluído em %.0fs: %d música(s) identificada(s) e salva(s).",
+            time.time() - t0, self.saved - saved_before,
+        )
 
-            log.info("Identificando via ACRCloud (%d bytes)...", len(audio))
-            song = identify_song(audio, host, access_key, access_secret)
+    async def run_cycle_async(self):
+        """run_cycle no modo asyncio: todas as estações ativas ao mesmo tempo."""
+        self._refresh_config()
+        credentials = self._acr_credentials()
+        if credentials is None:
+            return
 
-            if song is None:
-                log.info("'%s': música não identificada ou confiança insuficiente.", station_name)
-                continue
+        stations = self._active_stations()
+        if not stations:
+            log.info("Nenhuma estação ativa para monitorar.")
+            return
 
-            log.info(
-                "'%s': 🎵 %s — %s (%.0f%% confiança)",
-                station_name,
-                song["title"],
-                song["artist"],
-                song.get("confidence", 0),
-            )
+        saved_before = self.saved
+        t0 = time.time()
+        await self._probe_many(stations, credentials, AcrRateLimiter(self.acr_concurrency, self.acr_max_qps))
+        log.info(
+            "Ciclo concluído em %.0fs (%d estação(ões) em paralelo): %d música(s) identificada(s) e salva(s).",
+            time.time() - t0, len(stations), self.saved - saved_before,
+        )
 
-            ok = post_song(saas_url, secret, station["id"], song, self.test_mode)
-            if ok and not self.test_mode:
-                identified += 1
+    def run_scheduled(self):
+        """
+        Loop contínuo: consulta uma estação por vez, quando o agendador
+        liberar (estação vencida + token de cota disponível).
+        """
+        last_summary = time.time()
+        while self.running:
+            self._refresh_config()
+            credentials = self._acr_credentials()
+            stations = {s["id"]: s for s in self._active_stations()} if credentials else {}
+            self.scheduler.forget_missing(list(stations))
+
+            station_id = self.scheduler.next_due(list(stations)) if stations else None
+            if station_id is not None:
+                outcome, ends_at = self.probe_station(stations[station_id], credentials)
+                self.scheduler.record(station_id, outcome, ends_at)
+            else:
+                wait_s = self.scheduler.seconds_until_next(list(stations)) if stations else CONFIG_REFRESH_S
+                # Acorda pelo menos a cada CONFIG_REFRESH_S para pegar estações novas
+                wait_s = max(1, int(min(wait_s, CONFIG_REFRESH_S)))
+                log.debug("Próxima consulta em %ds (%s)", wait_s, self.scheduler.summary())
+                for _ in range(wait_s):
+                    if not self.running:
+                        break
+                    time.sleep(1)
 
-            # Pequena pausa entre estações para não sobrecarregar
-            time.sleep(2)
+            if time.time() - last_summary >= SCHEDULE_LOG_S:
+                last_summary = time.time()
+                log.info(
+                    "Agendador: %s | %d música(s) salva(s) | cache evitou %d consulta(s)",
+                    self.scheduler.summary(), self.saved, self.now_playing.hits,
+                )
+
+    async def run_scheduled_async(self):
+        """
+        run_scheduled no modo asyncio: a cada volta, todas as estações
+        vencidas (até os tokens disponíveis) são consultadas ao mesmo tempo.
+        """
+        limiter = AcrRateLimiter(self.acr_concurrency, self.acr_max_qps)
+        last_summary = time.time()
+        while self.running:
+            self._refresh_config()
+            credentials = self._acr_credentials()
+            stations = {s["id"]: s for s in self._active_stations()} if credentials else {}
+            self.scheduler.forget_missing(list(stations))
+
+            due = self.scheduler.due(list(stations)) if stations else []
+            if due:
+                t0 = time.time()
+                await self._probe_many([stations[sid] for sid in due], credentials, limiter)
+                log.info("%d estação(ões) consultada(s) em %.0fs", len(due), time.time() - t0)
+            else:
+                wait_s = self.scheduler.seconds_until_next(list(stations)) if stations else CONFIG_REFRESH_S
+                wait_s = max(1, int(min(wait_s, CONFIG_REFRESH_S)))
+                log.debug("Próxima consulta em %ds (%s)", wait_s, self.scheduler.summary())
+                for _ in range(wait_s):
+                    if not self.running:
+                        break
+                    await asyncio.sleep(1)
 
-        log.info("Ciclo concluído: %d música(s) identificada(s) e salva(s).", identified)
+            if time.time() - last_summary >= SCHEDULE_LOG_S:
+                last_summary = time.time()
+                log.info(
+                    "Agendador: %s | %d música(s) salva(s) | cache evitou %d consulta(s)",
+                    self.scheduler.summary(), self.saved, self.now_playing.hits,
+                )
 
     def run(self):
         log.info("=" * 60)
         log.info("LHFEX Musicas Monitor iniciando")
         log.info("Modo: %s", "TESTE" if self.test_mode else ("único ciclo" if self.once else "loop contínuo"))
-        log.info("Intervalo entre ciclos: %ds (%.0fmin)", INTERVAL_S, INTERVAL_S / 60)
+        if self.async_mode:
+            log.info(
+                "asyncio: até %d chamada(s) ACRCloud simultânea(s), %.1f/s",
+                self.acr_concurrency, self.acr_max_qps,
+            )
+        log.info("Orçamento ACRCloud: %s", self.scheduler.summary())
         log.info("Confiança mínima ACRCloud: %d%%", MIN_CONFIDENCE)
         log.info("=" * 60)
 
+        metrics_server = None
+        if self.config.get("musicas_metrics_port"):
+            ACR_QUOTA_REMAINING.track(lambda: self.scheduler.daily_budget - self.scheduler.used_today)
+            ACR_TOKENS.track(lambda: round(self.scheduler.tokens, 2))
+            metrics_server = start_metrics_server(
+                int(self.config["musicas_metrics_port"]),
+                self.config.get("metrics_host", "127.0.0.1"),
+                logger=log,
+            )
+
+        if not self.test_mode:
+            outbox_dir = Path(self.config.get("outbox_dir") or Path(__file__).parent)
+            self.outbox = Outbox(
+                outbox_dir / "outbox-musicas.db",
+                self.config.get("saas_url", ""),
+                self.config.get("radio_monitor_secret", ""),
+                logger=log,
+            )
+            self.outbox.start()
+
         if self.once or self.test_mode:
-            self.run_cycle()
+            if self.async_mode:
+                asyncio.run(self.run_cycle_async())
+            else:
+                self.run_cycle()
+            if self.outbox is not None:
+                self.outbox.stop(flush_timeout=30)
             return
 
-        while self.running:
-            self.run_cycle()
-            if self.running:
-                log.info("Aguardando %ds até o próximo ciclo...", INTERVAL_S)
-                for _ in range(INTERVAL_S):
-                    if not self.running:
-                        break
-                    time.sleep(1)
-
+        if self.shard is not None:
+            self.shard.start()
+        if self.async_mode:
+            asyncio.run(self.run_scheduled_async())
+        else:
+            self.run_scheduled()
+        if self.shard is not None:
+            self.shard.stop()
+        self.outbox.stop()
+        if metrics_server is not None:
+            metrics_server.shutdown()
         log.info("musicas.py encerrado.")
 
 
@@ -410,6 +828,7 @@ class MusicMonitor:
 if __name__ == "__main__":
     once = "--once" in sys.argv
     test_mode = "--test" in sys.argv
+    async_mode = "--async" in sys.argv
 
-    monitor = MusicMonitor(once=once, test_mode=test_mode)
+    monitor = MusicMonitor(once=once, test_mode=test_mode, async_mode=async_mode)
     monitor.run()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Outbox durável para o SAAS
+================================================
+
+Fila local em SQLite para tudo que os daemons enviam ao SAAS (eventos de
+keyword do monitor.py e músicas do musicas.py). `put()` só grava no disco
+e retorna na hora — capturar/transcrever nunca espera a rede. Uma thread
+em segundo plano drena a fila:
+
+  - agrupa até `batch_size` itens por requisição em /api/radio-monitor-batch;
+  - se o SAAS não tiver o endpoint de lote (404/405), cai para um POST por
+    item nos endpoints de sempre (/api/radio-monitor-event e -song); lote
+    recusado por inteiro (400/413) também vai item a item, só daquela vez,
+    para isolar o item ruim;
+  - usa uma requests.Session (conexões reaproveitadas);
+  - em falha, reagenda com backoff exponencial — nada se perde se o SAAS
+    ficar fora do ar, nem se o processo reiniciar.
+
+Itens rejeitados de forma definitiva (4xx que não seja 408/429, ou índice
+em `rejected` na resposta do lote) ficam marcados como `dead` na tabela
+para inspeção, em vez de serem reenviados para sempre. Índices em `failed`
+voltam para a fila com backoff.
+"""
+
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import REGISTRY
+
+log = logging.getLogger("radio-monitor")
+
+# ── Configuração ───────────────────────────────────────────────────────────
+
+BATCH_SIZE = 50               # Itens por requisição de lote
+BACKOFF_MIN_S = 2             # Primeira espera após falha
+BACKOFF_MAX_S = 300           # Espera máxima entre tentativas
+REQUEST_TIMEOUT_S = 15
+
+ENDPOINTS = {
+    "event": "/api/radio-monitor-event",
+    "song": "/api/radio-monitor-song",
+}
+BATCH_ENDPOINT = "/api/radio-monitor-batch"
+BATCH_KEYS = {"event": "events", "song": "songs"}
+BATCH_ITEM_FALLBACK = (400, 413)  # Lote recusado por inteiro: reenvia item a item
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind         TEXT    NOT NULL,
+    payload      TEXT    NOT NULL,
+    created_at   REAL    NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL    NOT NULL DEFAULT 0,
+    dead         INTEGER NOT NULL DEFAULT 0,
+    last_error   TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due_idx ON outbox (dead, next_attempt);
+"""
+
+# ── Métricas ───────────────────────────────────────────────────────────────
+
+POST_SECONDS = REGISTRY.histogram(
+    "radio_outbox_post_seconds", "Latência dos POSTs ao SAAS", ("endpoint", "status")
+)
+PENDING = REGISTRY.gauge("radio_outbox_pending", "Itens no outbox ainda não confirmados pelo SAAS")
+
+
+def backoff_s(attempts: int) -> float:
+    """Backoff exponencial com jitter: 2s, 4s, 8s... até BACKOFF_MAX_S."""
+    base = min(BACKOFF_MAX_S, BACKOFF_MIN_S * (2 ** max(0, attempts - 1)))
+    return base * random.uniform(0.8, 1.2)
+
+
+class PermanentError(Exception):
+    """O SAAS rejeitou o item (4xx) — reenviar não vai adiantar."""
+
+
+class Outbox:
+    def __init__(
+        self,
+        db_path: str | Path,
+        saas_url: str,
+        secret: str,
+        batch_size: int = BATCH_SIZE,
+        logger: logging.Logger = log,
+    ):
+        self.saas_url = saas_url.rstrip("/")
+        self.secret = secret
+        self.batch_size = batch_size
+        self.log = logger
+        self.batch_supported: bool | None = None  # descoberto no primeiro envio
+
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self.session.headers.update({
+            "x-radio-monitor-key": secret,
+            "Content-Type": "application/json",
+        })
+
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+
+    # ── API ───────────────────────────────────────────────────────────────
+
+    def start(self):
+        PENDING.track(self.pending)
+        pending = self.pending()
+        if pending:
+            self.log.info(f"Outbox: {pending} item(ns) pendente(s) de execuções anteriores")
+            # Processo novo: tenta já, sem herdar o backoff da execução anterior
+            with self._db_lock:
+                self._db.execute("UPDATE outbox SET next_attempt = 0 WHERE dead = 0")
+        self._thread.start()
+
+    def stop(self, flush_timeout: float = 10.0):
+        """Para a thread de envio; tenta esvaziar a fila por até `flush_timeout`s."""
+        deadline = time.time() + flush_timeout
+        while self.due() and time.time() < deadline:
+            self._wake.set()
+            time.sleep(0.2)
+        self._stop_event.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+
+    def put(self, kind: str, payload: dict):
+        """Grava o item no disco e acorda o sender. Não faz I/O de rede."""
+        if kind not in ENDPOINTS:
+            raise ValueError(f"Tipo de item desconhecido: {kind}")
+        with self._db_lock:
+            self._db.execute(
+                "INSERT INTO outbox (kind, payload, created_at) VALUES (?, ?, ?)",
+                (kind, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+        self._wake.set()
+
+    def pending(self) -> int:
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox WHERE dead = 0").fetchone()[0]
+
+    def due(self) -> int:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM outbox WHERE dead = 0 AND next_attempt <= ?", (time.time(),)
+            ).fetchone()[0]
+
+    # ── Sender ────────────────────────────────────────────────────────────
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            rows = self._next_batch()
+            if not rows:
+                self._wake.wait(timeout=self._idle_wait())
+                self._wake.clear()
+                continue
+            try:
+                self._send(rows)
+            except Exception as e:
+                self.log.warning(f"Outbox: erro inesperado no envio: {e}")
+                self._reschedule([r[0] for r in rows], rows[0][3] + 1, str(e))
+
+    def _idle_wait(self) -> float:
+        """Dorme até o próximo item agendado (ou 30s se a fila estiver vazia)."""
+        with self._db_lock:
+            row = self._db.execute("SELECT MIN(next_attempt) FROM outbox WHERE dead = 0").fetchone()
+        if row[0] is None:
+            return 30.0
+        return max(0.1, min(30.0, row[0] - time.time()))
+
+    def _next_batch(self) -> list[tuple]:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT id, kind, payload, attempts FROM outbox "
+                "WHERE dead = 0 AND next_attempt <= ? ORDER BY id LIMIT ?",
+                (time.time(), self.batch_size),
+            ).fetchall()
+
+    def _send(self, rows: list[tuple]):
+        if self.batch_supported is not False:
+            body = {"events": [], "songs": []}
+            for _, kind, payload, _ in rows:
+                body[BATCH_KEYS[kind]].append(json.loads(payload))
+            try:
+                resp = self._post(BATCH_ENDPOINT, json.dumps(body, ensure_ascii=False).encode("utf-8"))
+            except requests.RequestException as e:
+                self._fail(rows, str(e))
+                return
+            if resp.status_code in (404, 405):
+                self.log.info("Outbox: SAAS sem endpoint de lote — enviando item a item")
+                self.batch_supported = False
+            elif resp.ok:
+                self.batch_supported = True
+                self._apply_batch_report(rows, resp)
+                return
+            elif resp.status_code in BATCH_ITEM_FALLBACK:
+                # Lote recusado por inteiro (JSON inválido, grande demais): item a
+                # item, o ruim vira `dead` sozinho e o resto passa
+                self.log.warning(f"Outbox: lote recusado (HTTP {resp.status_code}) — reenviando item a item")
+            else:
+                self._fail(rows, f"HTTP {resp.status_code}")
+                return
+
+        for row in rows:
+            self._send_one(row)
+
+    def _post(self, endpoint: str, data: bytes) -> requests.Response:
+        t0 = time.time()
+        status = "error"
+        try:
+            resp = self.session.post(f"{self.saas_url}{endpoint}", data=data, timeout=REQUEST_TIMEOUT_S)
+            status = str(resp.status_code)
+            return resp
+        finally:
+            POST_SECONDS.observe(time.time() - t0, endpoint=endpoint, status=status)
+
+    def _apply_batch_report(self, rows: list[tuple], resp: requests.Response):
+        """
+        O SAAS responde, por tipo, os índices `rejected` (inválidos) e `failed`
+        (erro no servidor). Rejeitados viram `dead`, falhos são reagendados e o
+        resto sai da fila.
+        """
+        try:
+            report = resp.json()
+        except ValueError:
+            report = {}
+        if not isinstance(report, dict):
+            report = {}
+
+        by_kind: dict[str, list[tuple]] = {"event": [], "song": []}
+        for row in rows:
+            by_kind[row[1]].append(row)
+
+        rejected, failed = [], []
+        for kind, kind_rows in by_kind.items():
+            kind_report = report.get(BATCH_KEYS[kind])
+            if not isinstance(kind_report, dict):
+                kind_report = {}
+            for i in kind_report.get("rejected", []):
+                if 0 <= i < len(kind_rows):
+                    rejected.append(kind_rows[i])
+            for i in kind_report.get("failed", []):
+                if 0 <= i < len(kind_rows):
+                    failed.append(kind_rows[i])
+
+        done = {r[0] for r in rows} - {r[0] for r in rejected} - {r[0] for r in failed}
+        self._delete(sorted(done))
+        if rejected:
+            self.log.error(f"Outbox: SAAS rejeitou {len(rejected)} item(ns) do lote")
+            with self._db_lock:
+                self._db.executemany(
+                    "UPDATE outbox SET dead = 1, last_error = 'rejeitado no lote' WHERE id = ?",
+                    [(r[0],) for r in rejected],
+                )
+        if failed:
+            self._fail(failed, "falha no SAAS ao gravar item do lote")
+
+        self.log.info(
+            f"Outbox: lote enviado ao SAAS ({len(by_kind['event'])} evento(s), "
+            f"{len(by_kind['song'])} música(s), {len(done)} confirmado(s))"
+        )
+
+    def _send_one(self, row: tuple):
+        row_id, kind, payload, attempts = row
+        try:
+            resp = self._post(ENDPOINTS[kind], payload.encode("utf-8"))
+            if 400 <= resp.status_code < 500 and resp.status_code not in (408, 429):
+                raise PermanentError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+            resp.raise_for_status()
+        except PermanentError as e:
+            self.log.error(f"Outbox: SAAS rejeitou {kind} #{row_id} — {e}")
+            with self._db_lock:
+                self._db.execute("UPDATE outbox SET dead = 1, last_error = ? WHERE id = ?", (str(e), row_id))
+            return
+        except Exception as e:
+            self._fail([row], str(e))
+            return
+        self._delete([row_id])
+        if kind == "event":
+            self.log.info(f"Evento enviado ao SAAS: {json.loads(payload).get('detectedKeywords')}")
+
+    def _fail(self, rows: list[tuple], error: str):
+        attempts = max(r[3] for r in rows) + 1
+        wait_s = backoff_s(attempts)
+        self.log.warning(f"Outbox: falha ao enviar {len(rows)} item(ns) ({error}) — nova tentativa em {wait_s:.0f}s")
+        self._reschedule([r[0] for r in rows], attempts, error, wait_s)
+
+    def _reschedule(self, ids: list[int], attempts: int, error: str, wait_s: float | None = None):
+        next_attempt = time.time() + (wait_s if wait_s is not None else backoff_s(attempts))
+        with self._db_lock:
+            self._db.executemany(
+                "UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                [(attempts, next_attempt, error, i) for i in ids],
+            )
+
+    def _delete(self, ids: list[int]):
+        with self._db_lock:
+            self._db.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Áudio compartilhado entre monitor.py e musicas.py
+=======================================================================
+
+O monitor.py já mantém um ffmpeg por estação decodificando o stream para
+PCM 16 kHz num ring buffer. Este módulo publica esse anel num socket Unix
+local, para o musicas.py pegar os últimos N segundos de uma estação sem
+abrir uma segunda conexão com a rádio nem decodificar o stream de novo.
+
+Protocolo (uma requisição por conexão):
+  cliente → {"station_id": "...", "seconds": 15}\\n
+  servidor → {"ok": true, "sample_rate": 16000, "started_at": <epoch>, "bytes": N}\\n
+             + N bytes de PCM s16le mono
+          ou {"ok": false, "error": "..."}\\n
+
+Uso:
+  server = PcmShareServer(socket_path, get_ring=lambda sid: rings.get(sid))
+  server.start()                                   # no monitor.py
+  pcm, rate, started_at = fetch_pcm(socket_path, station_id, 15)  # no musicas.py
+  pcm_8k = resample_pcm(pcm, rate, 8000)
+"""
+
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from ringbuffer import PcmRingBuffer
+
+log = logging.getLogger("radio-monitor")
+
+MAX_SECONDS = 60              # Maior recorte servido por requisição
+FILL_WAIT_MAX_S = 20          # Espera o anel encher se a captura acabou de começar
+REQUEST_TIMEOUT_S = 30
+
+
+# ── Servidor (monitor.py) ──────────────────────────────────────────────────
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server: PcmShareServer = self.server  # type: ignore[assignment]
+        try:
+            request = json.loads(self.rfile.readline(4096) or b"{}")
+            station_id = str(request.get("station_id", ""))
+            seconds = min(float(request.get("seconds", 15)), MAX_SECONDS)
+        except (ValueError, TypeError):
+            self._reply({"ok": False, "error": "requisição inválida"})
+            return
+
+        ring = server.get_ring(station_id)
+        if ring is None:
+            self._reply({"ok": False, "error": "estação sem captura ativa"})
+            return
+
+        # Captura recém-aberta: espera até ter `seconds` de áudio (ou desiste)
+        wanted = int(seconds * ring.sample_rate) * 2
+        deadline = time.time() + FILL_WAIT_MAX_S
+        while ring.total - ring.oldest < wanted and time.time() < deadline:
+            time.sleep(0.5)
+
+        end = ring.total
+        start = max(ring.oldest, end - wanted)
+        pcm = ring.read(start, end)
+        if not pcm:
+            self._reply({"ok": False, "error": "sem áudio no buffer"})
+            return
+        server.served += 1
+        self._reply({
+            "ok": True,
+            "sample_rate": ring.sample_rate,
+            "started_at": ring.time_at(start),
+            "bytes": len(pcm),
+        }, pcm)
+
+    def _reply(self, header: dict, payload: bytes = b""):
+        self.wfile.write(json.dumps(header).encode("utf-8") + b"\n")
+        if payload:
+            self.wfile.write(payload)
+
+
+class PcmShareServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str | Path, get_ring: Callable[[str], PcmRingBuffer | None]):
+        self.socket_path = str(socket_path)
+        self.get_ring = get_ring
+        self.served = 0
+        # Socket velho de uma execução anterior que caiu
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        super().__init__(self.socket_path, _Handler)
+        os.chmod(self.socket_path, 0o660)
+        self._thread = threading.Thread(target=self.serve_forever, name="pcm-share", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        log.info(f"Áudio compartilhado em {self.socket_path} (musicas.py reaproveita a captura)")
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+# ── Cliente (musicas.py) ───────────────────────────────────────────────────
+
+def fetch_pcm(
+    socket_path: str | Path,
+    station_id: str,
+    seconds: float,
+    timeout: float = REQUEST_TIMEOUT_S,
+) -> tuple[bytes, int, float] | None:
+    """
+    Últimos `seconds` de PCM da estação, vindos da captura do monitor.py.
+    Retorna (pcm, sample_rate, started_at) ou None se o monitor não estiver
+    rodando ou não tiver essa estação (aí o chamador captura por conta própria).
+    """
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps({"station_id": station_id, "seconds": seconds}).encode("utf-8") + b"\n")
+            stream = sock.makefile("rb")
+            header = json.loads(stream.readline() or b"{}")
+            if not header.get("ok"):
+                return None
+            pcm = stream.read(header["bytes"])
+            if len(pcm) != header["bytes"]:
+                return None
+            return pcm, int(header["sample_rate"]), float(header["started_at"] or time.time())
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# ── Conversão ──────────────────────────────────────────────────────────────
+
+def resample_pcm(pcm: bytes, from_rate: int, to_rate: int) -> bytes:
+    """
+    Reamostra PCM s16le mono. Filtro passa-baixa (sinc janelado) antes de
+    reduzir a taxa, para não dobrar agudos no espectro (aliasing).
+    """
+    if from_rate == to_rate:
+        return pcm
+    x = np.frombuffer(pcm, dtype="<i2").astype(np.float32)
+    if to_rate < from_rate:
+        cutoff = 0.45 * to_rate / from_rate  # fração da taxa de origem
+        taps = np.arange(-32, 33)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        x = np.convolve(x, (kernel / kernel.sum()).astype(np.float32), mode="same")
+
+    if from_rate % to_rate == 0:
+        y = x[:: from_rate // to_rate]
+    else:
+        n_out = int(len(x) * to_rate / from_rate)
+        y = np.interp(np.arange(n_out) * (from_rate / to_rate), np.arange(len(x)), x)
+    return np.clip(np.round(y), -32768, 32767).astype("<i2").tobytes()
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Embrulha PCM s16le mono num WAV (sem reencodar)."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Replay / backfill de áudio gravado
+========================================================
+
+Peças do modo `monitor.py --replay`: acha os arquivos, descobre a estação
+e o horário em que cada um foi ao ar, decodifica em janelas com o ffmpeg
+(tão rápido quanto a CPU deixar) e guarda um checkpoint por arquivo para
+retomar de onde parou. A transcrição e o match são os mesmos do modo ao
+vivo (pool de workers VOSK + KeywordIndex) e ficam no monitor.py.
+
+Estação e horário vêm do caminho do arquivo:
+  gravacoes/<estação>/<AAAAMMDD-HHMMSS>.mp3   (também 2026-01-31_14-00-00, 20260131T1400…)
+  <estação> = id ou nome da estação no SAAS (ou --station para todos os arquivos)
+  o horário é de Brasília; sem horário no nome, use --start
+
+Uso (dentro do monitor.py):
+  files = discover_audio_files(["gravacoes/"])
+  checkpoint = ReplayCheckpoint(Path("replay-checkpoint.json"))
+  for offset_s, pcm in decode_windows(path, 30, start_s=checkpoint.offset(path)): ...
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from capture import BYTES_PER_SAMPLE, SAMPLE_RATE, build_ffmpeg_cmd
+
+log = logging.getLogger("radio-monitor")
+
+AUDIO_EXTENSIONS = {".mp3", ".aac", ".m4a", ".ogg", ".opus", ".flac", ".wav", ".ts", ".mka"}
+
+BRASILIA_TZ = timezone(timedelta(hours=-3))
+
+# 20260131-140000, 2026-01-31_14-00-00, 20260131T1400, 2026-01-31 14h00…
+AIR_TIME_RE = re.compile(
+    r"(?P<y>20\d{2})-?(?P<mo>\d{2})-?(?P<d>\d{2})[T_ -]?(?P<h>\d{2})[-:h]?(?P<mi>\d{2})(?:[-:m]?(?P<s>\d{2}))?"
+)
+
+
+def discover_audio_files(paths: list[str]) -> list[Path]:
+    """Arquivos de áudio dos caminhos dados (pastas são varridas recursivamente), ordenados."""
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files += [p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS]
+        elif path.is_file():
+            files.append(path)
+        else:
+            log.warning(f"Replay: {path} não existe — ignorado")
+    return sorted(set(files))
+
+
+def parse_air_time(path: Path) -> float | None:
+    """Horário (epoch) em que a gravação começou, lido do nome do arquivo (Brasília)."""
+    match = AIR_TIME_RE.search(path.stem)
+    if match is None:
+        return None
+    try:
+        dt = datetime(
+            int(match["y"]), int(match["mo"]), int(match["d"]),
+            int(match["h"]), int(match["mi"]), int(match["s"] or 0),
+            tzinfo=BRASILIA_TZ,
+        )
+    except ValueError:
+        return None
+    return dt.timestamp()
+
+
+def parse_start(value: str) -> float:
+    """--start: ISO 8601 (sem fuso = Brasília)."""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=BRASILIA_TZ)
+    return dt.timestamp()
+
+
+def decode_windows(path: Path, window_s: float, start_s: float = 0.0) -> Iterator[tuple[float, bytes]]:
+    """
+    Decodifica o arquivo para PCM 16 kHz mono e entrega (offset_s, pcm) em
+    janelas de `window_s` segundos, a partir de `start_s` (seek no ffmpeg).
+    A última janela pode ser menor.
+    """
+    cmd = build_ffmpeg_cmd(str(path))
+    if start_s > 0:
+        cmd[cmd.index("-i"):cmd.index("-i")] = ["-ss", f"{start_s:.3f}"]
+    window_bytes = int(window_s * SAMPLE_RATE) * BYTES_PER_SAMPLE
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL)
+    offset = start_s
+    try:
+        while True:
+            pcm = proc.stdout.read(window_bytes)
+            if not pcm:
+                break
+            yield offset, pcm
+            offset += len(pcm) / (SAMPLE_RATE * BYTES_PER_SAMPLE)
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+    if proc.returncode not in (0, -9) and offset == start_s:
+        raise RuntimeError(f"ffmpeg não conseguiu decodificar {path.name} (código {proc.returncode})")
+
+
+class ReplayCheckpoint:
+    """
+    Progresso por arquivo: segundos já processados (prefixo contíguo) e se
+    terminou. Um arquivo alterado (tamanho/mtime) recomeça do zero.
+    Gravado de forma atômica a cada avanço — matar o replay perde no máximo
+    as janelas em andamento.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._files: dict[str, dict] = {}
+        if path.exists():
+            try:
+                self._files = json.loads(path.read_text(encoding="utf-8")).get("files", {})
+            except (OSError, ValueError) as e:
+                log.warning(f"Checkpoint do replay ilegível ({e}) — começando do zero")
+
+    @staticmethod
+    def _key(audio: Path) -> str:
+        return str(audio.resolve())
+
+    @staticmethod
+    def _signature(audio: Path) -> dict:
+        st = audio.stat()
+        return {"size": st.st_size, "mtime": int(st.st_mtime)}
+
+    def _entry(self, audio: Path) -> dict | None:
+        entry = self._files.get(self._key(audio))
+        if entry is None:
+            return None
+        signature = self._signature(audio)
+        if (entry.get("size"), entry.get("mtime")) != (signature["size"], signature["mtime"]):
+            return None
+        return entry
+
+    def offset(self, audio: Path) -> float:
+        with self._lock:
+            entry = self._entry(audio)
+            return float(entry["done_s"]) if entry else 0.0
+
+    def is_complete(self, audio: Path) -> bool:
+        with self._lock:
+            entry = self._entry(audio)
+            return bool(entry and entry.get("complete"))
+
+    def advance(self, audio: Path, done_s: float, complete: bool = False):
+        with self._lock:
+            self._files[self._key(audio)] = {
+                **self._signature(audio),
+                "done_s": round(done_s, 3),
+                "complete": complete,
+            }
+            self._save()
+
+    def _save(self):
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps({"files": self._files}, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.warning(f"Falha ao salvar checkpoint do replay: {e}")
+
+
+class EventFileSink:
+    """
+    Saída local do replay: um evento por linha (JSON Lines), com a mesma
+    interface do Outbox (`put`, `start`, `stop`) para o monitor não distinguir.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self.written = 0
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def stop(self, flush_timeout: float = 0.0):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def put(self, kind: str, payload: dict):
+        line = json.dumps({"kind": kind, **payload}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.written += 1
+
+    def pending(self) -> int:
+        return 0
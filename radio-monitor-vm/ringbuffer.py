@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Ring buffer de PCM por estação
+====================================================
+
+Buffer circular pré-alocado com os últimos N segundos de áudio de uma
+estação. A escrita copia o bloco direto para o bytearray fixo (via
+memoryview, sem realocar); a leitura devolve memoryviews sobre o próprio
+buffer — no máximo dois pedaços quando o intervalo dá a volta no anel.
+
+Posições são offsets absolutos em bytes desde o início da captura, então
+um leitor pode guardar um cursor e continuar de onde parou. Cada bloco
+escrito registra o horário (epoch) do seu primeiro sample, o que permite
+converter horário ↔ offset mesmo com buracos de reconexão no meio.
+"""
+
+import bisect
+import threading
+from collections import deque
+
+BYTES_PER_SAMPLE = 2  # PCM 16-bit mono
+
+
+class PcmRingBuffer:
+    def __init__(self, seconds: float, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self.bytes_per_s = sample_rate * BYTES_PER_SAMPLE
+        self.capacity = int(seconds * sample_rate) * BYTES_PER_SAMPLE
+        self._buf = bytearray(self.capacity)
+        self._view = memoryview(self._buf)
+        self.total = 0  # bytes escritos desde o início (offset absoluto do fim)
+
+        # (offset_absoluto, epoch) do início de cada bloco ainda no anel
+        self._marks: deque[tuple[int, float]] = deque()
+        self._lock = threading.Lock()
+
+    # ── Escrita ───────────────────────────────────────────────────────────
+
+    def write(self, block, captured_at: float):
+        """Copia `block` (bytes/memoryview) para o anel."""
+        block = memoryview(block)
+        n = len(block)
+        if n > self.capacity:
+            block = block[n - self.capacity:]
+            captured_at += (n - self.capacity) / self.bytes_per_s
+            n = self.capacity
+        with self._lock:
+            pos = self.total % self.capacity
+            first = min(n, self.capacity - pos)
+            self._view[pos:pos + first] = block[:first]
+            if first < n:
+                self._view[:n - first] = block[first:]
+
+            self._marks.append((self.total, captured_at))
+            self.total += n
+            oldest = self.oldest
+            while len(self._marks) > 1 and self._marks[1][0] <= oldest:
+                self._marks.popleft()
+
+    # ── Leitura ───────────────────────────────────────────────────────────
+
+    @property
+    def oldest(self) -> int:
+        """Offset absoluto do byte mais antigo ainda disponível."""
+        return max(0, self.total - self.capacity)
+
+    def views(self, start: int, end: int) -> list[memoryview]:
+        """
+        Memoryviews (sem cópia) do intervalo absoluto [start, end).
+        O intervalo é recortado ao que ainda está no anel. Os views só são
+        válidos até o anel dar a volta — consuma-os logo.
+        """
+        start = max(start, self.oldest)
+        end = min(end, self.total)
+        if end <= start:
+            return []
+        a = start % self.capacity
+        b = a + (end - start)
+        if b <= self.capacity:
+            return [self._view[a:b]]
+        return [self._view[a:], self._view[:b - self.capacity]]
+
+    def read(self, start: int, end: int) -> bytes:
+        """Cópia contígua de [start, end) — para recortes que saem do anel."""
+        with self._lock:
+            return b"".join(self.views(start, end))
+
+    # ── Conversão horário ↔ offset ────────────────────────────────────────
+
+    def offset_at(self, ts: float) -> int:
+        """Offset absoluto do sample capturado no horário `ts` (epoch)."""
+        with self._lock:
+            if not self._marks:
+                return self.total
+            times = [t for _, t in self._marks]
+            i = max(0, bisect.bisect_right(times, ts) - 1)
+            base_offset, base_time = self._marks[i]
+            offset = base_offset + int((ts - base_time) * self.sample_rate) * BYTES_PER_SAMPLE
+            # Horário dentro de um buraco (reconexão): encosta no próximo bloco
+            limit = self._marks[i + 1][0] if i + 1 < len(self._marks) else self.total
+            return max(self.oldest, min(offset, limit))
+
+    def time_at(self, offset: int) -> float | None:
+        """Horário (epoch) do sample no offset absoluto `offset`."""
+        with self._lock:
+            if not self._marks:
+                return None
+            offsets = [o for o, _ in self._marks]
+            i = max(0, bisect.bisect_right(offsets, offset) - 1)
+            base_offset, base_time = self._marks[i]
+            return base_time + (offset - base_offset) / self.bytes_per_s
+
+    @property
+    def latest_time(self) -> float | None:
+        """Horário (epoch) do fim do último bloco escrito."""
+        return self.time_at(self.total)
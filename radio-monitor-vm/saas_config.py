@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Cliente de config do SAAS
+===============================================
+
+Cliente compartilhado por monitor.py e musicas.py para buscar estações,
+keywords e credenciais ACRCloud em /api/radio-monitor-config.
+
+  - Session persistente: a conexão HTTPS é reaproveitada entre refreshes.
+  - ETag / If-None-Match: config sem mudança custa uma resposta 304 vazia.
+  - Cada config nova é comparada com a anterior (`ConfigDiff`), e o daemon
+    aplica só o que mudou — capturas das estações intactas continuam
+    rodando, e o matcher só é recompilado se as keywords mudaram.
+
+Falha de rede ou do SAAS não apaga nada: a última config boa continua valendo.
+
+Uso:
+  client = SaasConfigClient(saas_url, secret)
+  diff = client.fetch()      # None = nada mudou (304, erro ou corpo igual)
+  if diff: aplicar(diff)     # client.data tem a config completa atual
+"""
+
+import logging
+
+import requests
+
+log = logging.getLogger("radio-monitor")
+
+CONFIG_ENDPOINT = "/api/radio-monitor-config"
+REQUEST_TIMEOUT_S = 15
+
+
+def _by_id(items: list[dict]) -> dict[str, dict]:
+    return {item["id"]: item for item in items if item.get("id")}
+
+
+class ConfigDiff:
+    """Diferença entre duas configs do SAAS (estações, keywords e ACRCloud)."""
+
+    def __init__(self, old: dict, new: dict):
+        old_stations = _by_id(old.get("stations", []))
+        new_stations = _by_id(new.get("stations", []))
+        self.stations_added = [s for sid, s in new_stations.items() if sid not in old_stations]
+        self.stations_removed = [s for sid, s in old_stations.items() if sid not in new_stations]
+        self.stations_changed = [
+            s for sid, s in new_stations.items()
+            if sid in old_stations and old_stations[sid] != s
+        ]
+
+        old_keywords = _by_id(old.get("keywords", []))
+        new_keywords = _by_id(new.get("keywords", []))
+        self.keywords_added = [k for kid, k in new_keywords.items() if kid not in old_keywords]
+        self.keywords_removed = [k for kid, k in old_keywords.items() if kid not in new_keywords]
+        self.keywords_changed = [
+            k for kid, k in new_keywords.items()
+            if kid in old_keywords and old_keywords[kid] != k
+        ]
+
+        self.acrcloud_changed = old.get("acrcloud") != new.get("acrcloud")
+
+    @property
+    def stations(self) -> bool:
+        return bool(self.stations_added or self.stations_removed or self.stations_changed)
+
+    @property
+    def keywords(self) -> bool:
+        return bool(self.keywords_added or self.keywords_removed or self.keywords_changed)
+
+    def __bool__(self) -> bool:
+        return self.stations or self.keywords or self.acrcloud_changed
+
+    def summary(self) -> str:
+        parts = []
+        if self.stations:
+            parts.append(
+                f"estações +{len(self.stations_added)} -{len(self.stations_removed)} "
+                f"~{len(self.stations_changed)}"
+            )
+        if self.keywords:
+            parts.append(
+                f"keywords +{len(self.keywords_added)} -{len(self.keywords_removed)} "
+                f"~{len(self.keywords_changed)}"
+            )
+        if self.acrcloud_changed:
+            parts.append("credenciais ACRCloud")
+        return ", ".join(parts) or "sem mudanças"
+
+
+class SaasConfigClient:
+    def __init__(self, saas_url: str, secret: str, logger: logging.Logger = log):
+        self.url = f"{saas_url.rstrip('/')}{CONFIG_ENDPOINT}"
+        self.log = logger
+        self.data: dict = {}
+        self.etag: str | None = None
+
+        self.session = requests.Session()
+        self.session.headers.update({"x-radio-monitor-key": secret})
+
+    def fetch(self) -> ConfigDiff | None:
+        """
+        Busca a config (condicional). Retorna o diff em relação à anterior,
+        ou None se nada mudou ou se a busca falhou.
+        """
+        headers = {"If-None-Match": self.etag} if self.etag and self.data else {}
+        try:
+            resp = self.session.get(self.url, headers=headers, timeout=REQUEST_TIMEOUT_S)
+            if resp.status_code == 304:
+                return None
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as e:
+            self.log.warning(f"Erro ao buscar config do SAAS: {e}")
+            return None
+
+        self.etag = resp.headers.get("ETag")
+        diff = ConfigDiff(self.data, data)
+        self.data = data
+        if not diff:
+            return None
+        self.log.info(
+            f"Config SAAS: {len(data.get('stations', []))} estações, "
+            f"{len(data.get('keywords', []))} keywords ({diff.summary()})"
+        )
+        return diff
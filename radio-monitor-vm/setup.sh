@@ -14,7 +14,7 @@ echo "=== Instalando dependências ==="
 sudo apt install python3 python3-pip ffmpeg unzip wget -y
 
 echo "=== Instalando bibliotecas Python ==="
-pip3 install vosk requests
+pip3 install vosk requests numpy
 
 echo "=== Baixando modelo VOSK PT-BR (small, ~40MB) ==="
 if [ ! -d "vosk-model-small-pt-0.3" ]; then
@@ -40,7 +40,7 @@ echo ""
 echo "=== Setup completo! ==="
 echo ""
 echo "Para iniciar em segundo plano (24/7):"
-echo "  nohup python3 monitor.py > monitor.log 2>&1 &"
+echo "  nohup python3 monitor.py > monitor.out 2>&1 &   # log em monitor.log (JSON, com rotação)"
 echo ""
 echo "Para iniciar com systemd (recomendado — reinicia automaticamente):"
 echo "  sudo bash install-service.sh"
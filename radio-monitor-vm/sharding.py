@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Divisão das estações entre VMs (sharding)
+===============================================================
+
+Uma VM não dá conta do VOSK de todas as estações, e cada monitor.py a mais
+só duplicava o trabalho e os alertas. Com "sharding": true, cada VM (nó)
+fica só com a sua parte:
+
+  - cada nó tem um id ("node_id", padrão: hostname) e renova um lease no
+    SAAS (POST /api/radio-monitor-nodes) a cada lease_s/3; a resposta traz
+    os nós do mesmo papel ("monitor" ou "musicas") com lease válido;
+  - cada estação fica com o nó de maior peso no rendezvous hashing
+    (hash de nó + estação): todos os nós chegam à mesma divisão sem
+    conversar entre si, e a entrada ou saída de um nó só move as estações
+    dele. "node_weight" (padrão 1) dá proporcionalmente mais estações a
+    uma VM maior;
+  - nó que para de renovar (caiu, travou, perdeu a rede) sai da lista
+    quando o lease vence, e os outros assumem as estações dele na renovação
+    seguinte — até lease_s + lease_s/3 depois da última renovação dele.
+    Encerramento normal libera o lease na hora;
+  - falha ao renovar mantém a última divisão conhecida: com o SAAS fora do
+    ar nenhuma estação fica sem monitoramento (no pior caso, uma estação é
+    coberta por duas VMs até a rede voltar).
+
+Uso:
+  shard = ShardMembership(saas_url, secret, "vm-1", role="monitor", lease_s=30)
+  shard.start()                           # primeira renovação + thread de heartbeat
+  minhas = shard.assign(stations)         # refazer quando shard.version mudar
+  shard.stop()                            # libera o lease
+"""
+
+import hashlib
+import logging
+import math
+import socket
+import threading
+
+import requests
+
+from metrics import REGISTRY
+
+log = logging.getLogger("radio-monitor")
+
+# ── Configuração ───────────────────────────────────────────────────────────
+
+NODES_ENDPOINT = "/api/radio-monitor-nodes"
+LEASE_S = 30                  # Nó sem renovar há mais que isso sai da divisão
+REQUEST_TIMEOUT_S = 10
+
+# ── Métricas ───────────────────────────────────────────────────────────────
+
+LIVE_NODES = REGISTRY.gauge("radio_monitor_shard_nodes", "Nós com lease válido (mesmo papel)")
+OWNED_STATIONS = REGISTRY.gauge("radio_monitor_shard_stations", "Estações atribuídas a este nó")
+RENEW_FAILURES = REGISTRY.counter("radio_monitor_shard_renew_failures_total", "Renovações de lease que falharam")
+
+
+def default_node_id() -> str:
+    return socket.gethostname()
+
+
+def rendezvous_score(node_id: str, station_id: str, weight: float = 1.0) -> float:
+    """Peso do nó para a estação (HRW ponderado: -peso / ln(u), u uniforme em (0, 1))."""
+    digest = hashlib.sha256(f"{node_id}\0{station_id}".encode("utf-8")).digest()
+    u = (int.from_bytes(digest[:8], "big") + 0.5) / 2**64
+    return -weight / math.log(u)
+
+
+def rendezvous_owner(station_id: str, nodes: dict[str, float]) -> str | None:
+    """Nó dono da estação entre `nodes` (id → peso); empate fica com o menor id."""
+    return max(nodes, key=lambda n: (rendezvous_score(n, station_id, nodes[n]), n), default=None)
+
+
+class ShardMembership:
+    """
+    Lease deste nó no SAAS e a lista de nós vivos. A thread de heartbeat
+    atualiza `nodes` e incrementa `version` quando a lista muda; o loop do
+    daemon compara `version` e refaz a divisão com `assign`.
+    """
+
+    def __init__(
+        self,
+        saas_url: str,
+        secret: str,
+        node_id: str,
+        role: str = "monitor",
+        lease_s: float = LEASE_S,
+        weight: float = 1.0,
+        logger: logging.Logger = log,
+    ):
+        self.url = f"{saas_url.rstrip('/')}{NODES_ENDPOINT}"
+        self.node_id = node_id
+        self.role = role
+        self.lease_s = lease_s
+        self.weight = weight
+        self.log = logger
+        self.nodes: dict[str, float] = {node_id: weight}
+        self.version = 0
+        self.owned = 0
+
+        # Session própria: a do config client é usada pela thread principal
+        self.session = requests.Session()
+        self.session.headers.update({"x-radio-monitor-key": secret})
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        LIVE_NODES.track(lambda: len(self.nodes))
+        OWNED_STATIONS.track(lambda: self.owned)
+        self.renew()
+        self._thread = threading.Thread(target=self._heartbeat, name="shard-lease", daemon=True)
+        self._thread.start()
+        self.log.info(
+            f"Sharding: nó {self.node_id!r} ({self.role}, peso {self.weight:g}, lease {self.lease_s:g}s) | "
+            f"{len(self.nodes)} nó(s) vivo(s)"
+        )
+
+    def stop(self):
+        """Para o heartbeat e libera o lease (os outros nós assumem na próxima renovação)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(REQUEST_TIMEOUT_S)
+        self._post(release=True)
+
+    # ── Divisão ───────────────────────────────────────────────────────────
+
+    def owner(self, station_id: str) -> str | None:
+        return rendezvous_owner(station_id, self.nodes)
+
+    def owns(self, station_id: str) -> bool:
+        return self.owner(station_id) == self.node_id
+
+    def assign(self, stations: list[dict]) -> list[dict]:
+        """Só as estações deste nó."""
+        mine = [s for s in stations if self.owns(s["id"])]
+        self.owned = len(mine)
+        return mine
+
+    def share(self) -> float:
+        """Fração deste nó no total (pelos pesos) — para dividir cotas entre as VMs."""
+        return self.weight / (sum(self.nodes.values()) or self.weight)
+
+    # ── Lease ─────────────────────────────────────────────────────────────
+
+    def renew(self) -> bool:
+        """Renova o lease; True se a lista de nós vivos mudou."""
+        data = self._post()
+        if data is None:
+            return False
+        nodes = {
+            n["nodeId"]: float(n.get("weight") or 1.0)
+            for n in data.get("nodes", []) if n.get("nodeId")
+        }
+        nodes[self.node_id] = self.weight  # a resposta pode ter vindo antes do próprio upsert
+        if nodes == self.nodes:
+            return False
+        joined = sorted(set(nodes) - set(self.nodes))
+        left = sorted(set(self.nodes) - set(nodes))
+        self.nodes = nodes
+        self.version += 1
+        self.log.info(
+            f"Sharding: {len(nodes)} nó(s) vivo(s)"
+            + (f" | entrou: {', '.join(joined)}" if joined else "")
+            + (f" | saiu: {', '.join(left)}" if left else "")
+        )
+        return True
+
+    def _heartbeat(self):
+        # Três renovações por lease: uma falha isolada não derruba o nó
+        while not self._stop.wait(self.lease_s / 3):
+            self.renew()
+
+    def _post(self, release: bool = False) -> dict | None:
+        body = {
+            "nodeId": self.node_id,
+            "role": self.role,
+            "leaseS": self.lease_s,
+            "weight": self.weight,
+            "ownedStations": self.owned,
+        }
+        if release:
+            body["release"] = True
+        try:
+            resp = self.session.post(self.url, json=body, timeout=REQUEST_TIMEOUT_S)
+            resp.raise_for_status()
+            return resp.json()
+        except Exception as e:
+            RENEW_FAILURES.inc()
+            self.log.warning(f"Sharding: falha ao {'liberar' if release else 'renovar'} o lease: {e}")
+            return None
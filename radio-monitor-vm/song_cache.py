@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Cache "tocando agora" por estação
+=======================================================
+
+O ACRCloud diz, além de título/artista, em que ponto da música o trecho
+estava (`play_offset_ms`) e quanto ela dura (`duration_ms`) — ou seja, até
+quando aquela música deve continuar no ar. Com isso, a próxima consulta da
+estação pode ser evitada enquanto a mesma música estiver tocando.
+
+Para não confiar só no relógio (locutor corta a música, estação troca de
+faixa antes do fim), cada identificação guarda uma impressão digital local
+e barata do áudio (NumPy): perfil de croma (12 classes de altura) e de
+energia por banda. A consulta só é pulada se o trecho novo ainda "soa"
+como o anterior.
+
+Uso:
+  cache = NowPlayingCache()
+  song = cache.lookup(station_id, pcm, sample_rate)   # None = consultar ACRCloud
+  cache.store(station_id, song, pcm, sample_rate)     # após identificar
+"""
+
+import time
+
+import numpy as np
+
+# ── Parâmetros ─────────────────────────────────────────────────────────────
+
+FRAME = 2048                  # Amostras por quadro da FFT (256 ms a 8 kHz)
+HOP = 1024
+MIN_FREQ_HZ = 55.0            # Faixa usada no croma (A1 .. ~B6)
+MAX_FREQ_HZ = 2000.0
+ENERGY_BANDS = 12             # Bandas log-espaçadas do perfil de energia
+CHROMA_WEIGHT = 0.7           # Peso do croma na similaridade (o resto é da energia por banda)
+SIMILARITY_MIN = 0.80         # Similaridade mínima para "ainda é a mesma música"
+END_MARGIN_S = 10             # Não confia no cache nos últimos segundos da faixa
+DEFAULT_DURATION_S = 180      # Quando o ACRCloud não informa a duração
+
+
+def fingerprint(pcm: bytes, sample_rate: int) -> np.ndarray | None:
+    """
+    Vetor de 24 posições (croma médio + energia por banda), normalizado.
+    Cada metade é normalizada sozinha e pesada por CHROMA_WEIGHT, então a
+    similaridade é a média ponderada dos cossenos das duas (normalizadas
+    juntas, a energia dominava a norma e músicas diferentes pareciam
+    iguais). None se o trecho for curto demais ou silencioso.
+    """
+    x = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    if len(x) < FRAME * 4:
+        return None
+    n_frames = 1 + (len(x) - FRAME) // HOP
+    idx = np.arange(FRAME)[None, :] + HOP * np.arange(n_frames)[:, None]
+    spec = np.abs(np.fft.rfft(x[idx] * np.hanning(FRAME).astype(np.float32), axis=1))
+    freqs = np.fft.rfftfreq(FRAME, 1.0 / sample_rate)
+
+    band = (freqs >= MIN_FREQ_HZ) & (freqs <= min(MAX_FREQ_HZ, sample_rate / 2))
+    pitch_class = np.mod(np.round(12 * np.log2(freqs[band] / 440.0)).astype(int), 12)
+    # (quadros × bins) → (quadros × 12): soma a energia de cada classe de altura
+    chroma = spec[:, band] ** 2 @ np.eye(12, dtype=np.float32)[pitch_class]
+    chroma /= chroma.sum(axis=1, keepdims=True) + 1e-9
+
+    edges = np.geomspace(MIN_FREQ_HZ, sample_rate / 2, ENERGY_BANDS + 1)
+    band_idx = np.clip(np.searchsorted(edges, freqs) - 1, 0, ENERGY_BANDS - 1)
+    energy = spec ** 2 @ np.eye(ENERGY_BANDS, dtype=np.float32)[band_idx]
+    energy = np.log10(energy.mean(axis=0) + 1e-9)
+    energy -= energy.mean()
+
+    if spec.mean() < 1e-4:
+        return None
+    chroma = chroma.mean(axis=0) - 1.0 / 12
+    return np.concatenate([
+        np.sqrt(CHROMA_WEIGHT) * chroma / (np.linalg.norm(chroma) + 1e-9),
+        np.sqrt(1 - CHROMA_WEIGHT) * energy / (np.linalg.norm(energy) + 1e-9),
+    ])
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.dot(a, b))
+
+
+class NowPlayingCache:
+    """Música atual de cada estação, com o horário previsto de término."""
+
+    def __init__(self, similarity_min: float = SIMILARITY_MIN):
+        self.similarity_min = similarity_min
+        self._entries: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def store(self, station_id: str, song: dict, pcm: bytes, sample_rate: int, captured_at: float | None = None):
+        """
+        Registra a música identificada e até quando ela deve tocar.
+        `captured_at` é o fim do trecho enviado (padrão: agora); o offset do
+        ACRCloud é tratado como o fim do trecho — erra para o lado de
+        consultar de novo mais cedo, nunca de pular uma troca de música.
+        """
+        captured_at = captured_at or time.time()
+        duration_s = (song.get("durationMs") or DEFAULT_DURATION_S * 1000) / 1000
+        offset_s = (song.get("playOffsetMs") or 0) / 1000
+        self._entries[station_id] = {
+            "song": song,
+            "ends_at": captured_at + max(0.0, duration_s - offset_s),
+            "fingerprint": fingerprint(pcm, sample_rate),
+        }
+
+    def forget(self, station_id: str):
+        self._entries.pop(station_id, None)
+
+    def ends_at(self, station_id: str) -> float | None:
+        entry = self._entries.get(station_id)
+        return entry["ends_at"] if entry else None
+
+    def same_song(self, station_id: str, song: dict) -> bool:
+        """A música recém-identificada é a mesma que já estava no cache?"""
+        entry = self._entries.get(station_id)
+        if entry is None or time.time() > entry["ends_at"] + END_MARGIN_S:
+            return False  # mesma faixa tocando de novo mais tarde conta como nova execução
+        cached = entry["song"]
+        return (cached["title"], cached["artist"]) == (song["title"], song["artist"])
+
+    def lookup(self, station_id: str, pcm: bytes, sample_rate: int, now: float | None = None) -> dict | None:
+        """
+        Música em cache se ela ainda deve estar tocando e o áudio novo
+        confirma (impressão digital parecida). None = consultar o ACRCloud.
+        """
+        entry = self._entries.get(station_id)
+        now = now or time.time()
+        if entry is None or now > entry["ends_at"] - END_MARGIN_S:
+            self.misses += 1
+            return None
+        current = fingerprint(pcm, sample_rate)
+        if current is None or entry["fingerprint"] is None:
+            self.misses += 1
+            return None
+        if similarity(current, entry["fingerprint"]) < self.similarity_min:
+            # Som mudou antes do fim previsto: música trocada/cortada
+            self.forget(station_id)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["song"]
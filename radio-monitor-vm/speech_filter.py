@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Pré-classificador fala / música / silêncio
+================================================================
+
+Filtro barato (NumPy, vetorizado) na frente do VOSK: a maior parte do
+tempo de rádio é música, vinheta ou silêncio, e decodificar isso no Kaldi
+é CPU jogada fora. O PCM é dividido em quadros de 25 ms e, para cada
+quadro, calculamos de uma vez (matriz quadros × samples):
+
+  - energia (RMS, dBFS);
+  - taxa de cruzamentos por zero (ZCR);
+  - planura espectral (média geométrica / média aritmética do espectro).
+
+A decisão é por segmento de 1 s, usando a *variação* dessas medidas — a
+fala alterna sílabas e pausas (~4 Hz), sons vozeados e fricativas, então
+tem muitos quadros de baixa energia e ZCR/planura instáveis; música tende
+a ser contínua e estável. Cada segmento vira "silence", "music" ou
+"speech". Os segmentos de fala são dilatados (±HANGOVER_SEGMENTS) para
+não cortar palavras na borda — na dúvida, o filtro manda para o VOSK:
+perder keyword custa mais caro que decodificar um pouco de música.
+
+Modos (config "speech_filter"):
+  "music"   — só fala vai ao VOSK (maior economia em estação musical; só
+              depois que o benchmark mostrar que não perde keyword)
+  "silence" — só descarta silêncio/ar morto (padrão do monitor; conservador)
+  "off"     — desliga o filtro
+
+Os limiares abaixo são conservadores; valide a recall com o benchmark
+(gravações reais de cada estação) antes de apertá-los.
+
+Uso:
+  segments = speech_segments(pcm)         # [(byte_inicial, byte_final), ...]
+  gate = SpeechGate()                     # modo streaming, bloco a bloco
+  for blk, at in gate.push(block, captured_at): recognizer.feed(blk, at)
+"""
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+# ── Parâmetros ─────────────────────────────────────────────────────────────
+
+FRAME_S = 0.025               # Quadro de análise (25 ms)
+SEGMENT_S = 1.0               # Granularidade da decisão
+SILENCE_DBFS = -45.0          # Segmento abaixo disso (energia média) = silêncio
+LOW_ENERGY_RATIO = 0.20       # Fala: ≥ 20% dos quadros abaixo de metade do RMS médio
+ZCR_CV = 0.60                 # Fala: desvio/média do ZCR acima disso
+FLATNESS_STD = 0.08           # Fala: planura espectral variando acima disso
+HANGOVER_SEGMENTS = 1         # Segmentos de margem em volta de cada trecho de fala
+MERGE_GAP_SEGMENTS = 2        # Buracos menores que isso entre trechos são unidos
+
+LABELS = ("silence", "music", "speech")
+SILENCE, MUSIC, SPEECH = range(3)
+MODES = ("off", "silence", "music")
+
+
+def _keep_mask(labels: np.ndarray, mode: str) -> np.ndarray:
+    """Segmentos que vão ao VOSK no modo dado."""
+    if mode == "silence":
+        return labels != SILENCE
+    return labels == SPEECH
+
+
+def frame_features(pcm, sample_rate: int = SAMPLE_RATE) -> dict[str, np.ndarray]:
+    """Features por quadro (energia dBFS, RMS, ZCR, planura) do PCM s16le."""
+    samples = np.frombuffer(pcm, dtype="<i2")
+    frame_len = int(sample_rate * FRAME_S)
+    n_frames = len(samples) // frame_len
+    frames = samples[: n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float32) / 32768.0
+
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20.0 * np.log10(rms + 1e-10)
+
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_len
+
+    power = np.abs(np.fft.rfft(frames * np.hanning(frame_len).astype(np.float32), axis=1)) ** 2 + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    return {"rms": rms, "energy_db": energy_db, "zcr": zcr, "flatness": flatness}
+
+
+def classify(pcm, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Rótulo (SILENCE/MUSIC/SPEECH) de cada segmento de SEGMENT_S segundos."""
+    feats = frame_features(pcm, sample_rate)
+    per_segment = int(SEGMENT_S / FRAME_S)
+    n_segments = len(feats["rms"]) // per_segment
+    if n_segments == 0:
+        return np.zeros(0, dtype=np.int8)
+
+    def seg(name):
+        return feats[name][: n_segments * per_segment].reshape(n_segments, per_segment)
+
+    rms, energy_db, zcr, flatness = seg("rms"), seg("energy_db"), seg("zcr"), seg("flatness")
+
+    mean_rms = np.mean(rms, axis=1, keepdims=True)
+    low_energy = np.mean(rms < 0.5 * mean_rms, axis=1)
+    zcr_cv = np.std(zcr, axis=1) / (np.mean(zcr, axis=1) + 1e-6)
+    flat_std = np.std(flatness, axis=1)
+
+    # 2 de 3 votos = fala (os três são indícios independentes de modulação silábica)
+    votes = (
+        (low_energy >= LOW_ENERGY_RATIO).astype(np.int8)
+        + (zcr_cv >= ZCR_CV).astype(np.int8)
+        + (flat_std >= FLATNESS_STD).astype(np.int8)
+    )
+    labels = np.where(votes >= 2, SPEECH, MUSIC).astype(np.int8)
+    labels[20.0 * np.log10(mean_rms[:, 0] + 1e-10) < SILENCE_DBFS] = SILENCE
+    return labels
+
+
+def _speech_runs(speech: np.ndarray) -> list[tuple[int, int]]:
+    """Trechos [início, fim) de segmentos marcados, dilatados e unidos."""
+    if not speech.any():
+        return []
+    # Dilatação: margem de HANGOVER_SEGMENTS antes e depois de cada segmento de fala
+    kernel = np.ones(2 * HANGOVER_SEGMENTS + 1, dtype=bool)
+    speech = np.convolve(speech, kernel, mode="same") > 0
+
+    runs = []
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.astype(np.int8), [0]))))
+    for start, end in zip(edges[::2], edges[1::2]):
+        if runs and start - runs[-1][1] < MERGE_GAP_SEGMENTS:
+            runs[-1] = (runs[-1][0], int(end))
+        else:
+            runs.append((int(start), int(end)))
+    return runs
+
+
+def speech_segments(pcm, sample_rate: int = SAMPLE_RATE, mode: str = "music") -> list[tuple[int, int]]:
+    """
+    Trechos do PCM que devem ir ao VOSK, como offsets em bytes [início, fim).
+    O resto do último segmento incompleto (< SEGMENT_S) segue junto se o
+    trecho de fala encostar no fim.
+    """
+    labels = classify(pcm, sample_rate)
+    seg_bytes = int(sample_rate * SEGMENT_S) * BYTES_PER_SAMPLE
+    total = len(pcm) - len(pcm) % BYTES_PER_SAMPLE
+    segments = []
+    for start, end in _speech_runs(_keep_mask(labels, mode)):
+        end_byte = total if end >= len(labels) else end * seg_bytes
+        segments.append((start * seg_bytes, end_byte))
+    return segments
+
+
+class SpeechGate:
+    """
+    Porta de fala para o modo streaming: recebe blocos curtos (0,5 s) e
+    devolve só os que devem ir ao recognizer.
+
+    Cada bloco é classificado junto com o anterior (janela de ~1 s). Ao
+    abrir, a porta devolve também o bloco anterior (pré-roll) para não cortar
+    o começo da palavra; ao fechar, espera `hangover_s` de não-fala.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, hangover_s: float = 2.0, mode: str = "music"):
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.hangover_s = hangover_s
+        self.open = False
+        self._previous: tuple[bytes, float] | None = None
+        self._quiet_s = 0.0
+        self.speech_s = 0.0
+        self.total_s = 0.0
+
+    def push(self, block: bytes, captured_at: float) -> list[tuple[bytes, float]]:
+        duration = len(block) / (self.sample_rate * BYTES_PER_SAMPLE)
+        self.total_s += duration
+
+        context = (self._previous[0] if self._previous else b"") + block
+        labels = classify(context, self.sample_rate)
+        is_speech = bool(labels.size) and bool(_keep_mask(labels[-1:], self.mode)[0])
+
+        out = []
+        if is_speech:
+            if not self.open and self._previous is not None:
+                out.append(self._previous)  # pré-roll
+            self.open = True
+            self._quiet_s = 0.0
+        elif self.open:
+            self._quiet_s += duration
+            if self._quiet_s > self.hangover_s:
+                self.open = False
+
+        if self.open:
+            out.append((block, captured_at))
+            self.speech_s += duration
+        self._previous = (block, captured_at)
+        return out
+
+    @property
+    def speech_ratio(self) -> float:
+        return self.speech_s / self.total_s if self.total_s else 0.0
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Saúde por estação, circuit breaker e prioridade
+=====================================================================
+
+Cada estação tem um registro de saúde: falhas consecutivas, bytes recebidos,
+último sucesso/falha e quantas keywords ela rendeu.
+
+  - Circuit breaker: após FAILURES_TO_OPEN falhas seguidas a estação fica
+    "aberta" (fora das capturas) por um tempo que dobra a cada nova falha
+    (BREAKER_MIN_S .. BREAKER_MAX_S). Vencido o prazo, uma tentativa passa
+    (meia-abertura); sucesso fecha o circuito. Um stream morto deixa de
+    segurar um slot de captura por duration_s + 15s todo ciclo.
+  - Prioridade: prioridade comercial (maior `priority` entre as keywords
+    que valem para a estação) + rendimento (keywords por hora de áudio).
+    Estações de maior prioridade são capturadas/transcritas primeiro e, no
+    modo por blocos, as de baixo rendimento podem pular ciclos (nunca menos
+    que MIN_WEIGHT dos ciclos).
+  - `snapshot()` vira o relatório enviado ao SAAS (/api/radio-monitor-health).
+
+Uso:
+  health = HealthTracker()
+  if health.allow(station_id): ...captura...
+  health.record_success(station_id, n_bytes) / health.record_failure(station_id, "timeout")
+  health.record_hits(station_id, 2)
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+# ── Parâmetros ─────────────────────────────────────────────────────────────
+
+FAILURES_TO_OPEN = 2          # Falhas seguidas até abrir o circuito
+BREAKER_MIN_S = 60            # Primeiro período fora
+BREAKER_MAX_S = 3600          # Teto do backoff (estação morta é testada 1x/hora)
+STALE_AFTER_S = 300           # Sem áudio há mais que isso = "degraded"
+MIN_WEIGHT = 0.25             # Estação de rendimento zero ainda roda 1 a cada 4 ciclos
+
+KEYWORD_PRIORITY = {"low": 0, "medium": 1, "high": 2}
+
+BRASILIA_TZ = timezone(timedelta(hours=-3))
+
+
+def _iso(ts: float | None) -> str | None:
+    return datetime.fromtimestamp(ts, tz=BRASILIA_TZ).isoformat() if ts else None
+
+
+def business_priorities(stations: list[dict], keywords: list[dict]) -> dict[str, int]:
+    """
+    Prioridade comercial de cada estação (0 = low, 1 = medium, 2 = high):
+    a maior entre as keywords globais e as específicas da estação.
+    """
+    global_priority = max(
+        (KEYWORD_PRIORITY.get(k.get("priority"), 1) for k in keywords if not k.get("stationId")),
+        default=0,
+    )
+    priorities = {}
+    for station in stations:
+        own = [KEYWORD_PRIORITY.get(k.get("priority"), 1) for k in keywords if k.get("stationId") == station["id"]]
+        priorities[station["id"]] = max(own + [global_priority])
+    return priorities
+
+
+class StationHealth:
+    """Contadores de saúde de uma estação."""
+
+    def __init__(self):
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.bytes_received = 0
+        self.keyword_hits = 0
+        self.last_success_at: float | None = None
+        self.last_failure_at: float | None = None
+        self.last_error: str | None = None
+        self.open_until: float | None = None
+
+    @property
+    def audio_hours(self) -> float:
+        return self.bytes_received / (SAMPLE_RATE * BYTES_PER_SAMPLE * 3600)
+
+    @property
+    def hits_per_hour(self) -> float:
+        return self.keyword_hits / self.audio_hours if self.audio_hours else 0.0
+
+    def status(self, now: float) -> str:
+        if self.open_until and now < self.open_until:
+            return "down"
+        if self.last_success_at is None:
+            return "down" if self.consecutive_failures else "unknown"
+        if self.consecutive_failures or now - self.last_success_at > STALE_AFTER_S:
+            return "degraded"
+        return "ok"
+
+
+class HealthTracker:
+    """Saúde de todas as estações; chamado das threads de captura e do pipeline."""
+
+    def __init__(self):
+        self._stations: dict[str, StationHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, station_id: str) -> StationHealth:
+        health = self._stations.get(station_id)
+        if health is None:
+            health = self._stations[station_id] = StationHealth()
+        return health
+
+    def get(self, station_id: str) -> StationHealth:
+        with self._lock:
+            return self._get(station_id)
+
+    # ── Registro ──────────────────────────────────────────────────────────
+
+    def record_success(self, station_id: str, n_bytes: int):
+        with self._lock:
+            health = self._get(station_id)
+            health.bytes_received += n_bytes
+            health.last_success_at = time.time()
+            health.consecutive_failures = 0
+            health.open_until = None
+
+    def record_failure(self, station_id: str, error: str, retry_in_s: float | None = None) -> float | None:
+        """
+        Conta uma falha. Retorna por quantos segundos a estação fica fora
+        (None se o circuito continua fechado). `retry_in_s` força o prazo —
+        a captura contínua já tem o próprio backoff de reconexão.
+        """
+        with self._lock:
+            health = self._get(station_id)
+            now = time.time()
+            health.consecutive_failures += 1
+            health.total_failures += 1
+            health.last_failure_at = now
+            health.last_error = error[:200]
+            if retry_in_s is None:
+                if health.consecutive_failures < FAILURES_TO_OPEN:
+                    return None
+                retry_in_s = min(
+                    BREAKER_MAX_S,
+                    BREAKER_MIN_S * 2 ** (health.consecutive_failures - FAILURES_TO_OPEN),
+                )
+            health.open_until = now + retry_in_s
+            return retry_in_s
+
+    def record_hits(self, station_id: str, n_hits: int):
+        with self._lock:
+            self._get(station_id).keyword_hits += n_hits
+
+    def forget(self, station_id: str):
+        with self._lock:
+            self._stations.pop(station_id, None)
+
+    # ── Decisões ──────────────────────────────────────────────────────────
+
+    def allow(self, station_id: str, now: float | None = None) -> bool:
+        """Circuito fechado ou prazo vencido (meia-abertura: uma tentativa passa)."""
+        with self._lock:
+            open_until = self._get(station_id).open_until
+        return open_until is None or (now or time.time()) >= open_until
+
+    def weight(self, station_id: str, business_priority: int = 1) -> float:
+        """
+        Fração dos ciclos em que a estação deve ser capturada (MIN_WEIGHT..1).
+        Prioridade comercial alta ou nenhum histórico de keywords = sempre.
+        """
+        if business_priority >= KEYWORD_PRIORITY["high"]:
+            return 1.0
+        with self._lock:
+            best = max((h.hits_per_hour for h in self._stations.values()), default=0.0)
+            if best <= 0:
+                return 1.0
+            own = self._get(station_id).hits_per_hour
+        return MIN_WEIGHT + (1 - MIN_WEIGHT) * min(1.0, own / best)
+
+    def priority(self, station_id: str, business_priority: int = 1) -> float:
+        """Ordenação: prioridade comercial primeiro, rendimento como desempate."""
+        return business_priority + self.weight(station_id, business_priority)
+
+    # ── Relatório ─────────────────────────────────────────────────────────
+
+    def snapshot(self, station_ids: list[str] | None = None) -> list[dict]:
+        """Estado de cada estação no formato do /api/radio-monitor-health."""
+        now = time.time()
+        with self._lock:
+            ids = station_ids if station_ids is not None else list(self._stations)
+            report = []
+            for station_id in ids:
+                h = self._get(station_id)
+                report.append({
+                    "stationId": station_id,
+                    "status": h.status(now),
+                    "consecutiveFailures": h.consecutive_failures,
+                    "totalFailures": h.total_failures,
+                    "bytesReceived": h.bytes_received,
+                    "keywordHits": h.keyword_hits,
+                    "lastSuccessAt": _iso(h.last_success_at),
+                    "lastFailureAt": _iso(h.last_failure_at),
+                    "lastError": h.last_error,
+                    "circuitOpenUntil": _iso(h.open_until) if h.open_until and h.open_until > now else None,
+                })
+            return report
@@ -0,0 +1,51 @@
+from cooldown import DetectionCoalescer
+
+T0 = 1_700_000_000.0
+
+
+def _payload(keywords):
+    return {
+        "stationId": "st-1",
+        "stationName": "Rádio Teste",
+        "transcriptionText": " ".join(keywords),
+        "detectedKeywords": list(keywords),
+        "confidence": 80,
+        "audioSnippet": "AAAA",
+    }
+
+
+def test_keywords_of_one_event_keep_their_own_counts():
+    coalescer = DetectionCoalescer(None, cooldown_s=600)
+    event = coalescer.admit(_payload(["promoção", "sorteio"]), [("promoção", T0), ("sorteio", T0 + 1)])
+    assert event["detectedKeywords"] == ["promoção", "sorteio"]
+
+    # "promoção" repete mais 2 vezes, "sorteio" mais 4, em trechos seguintes
+    for i in range(1, 5):
+        hits = [("sorteio", T0 + 60 * i)]
+        if i <= 2:
+            hits.append(("promoção", T0 + 60 * i + 5))
+        assert coalescer.admit(_payload([k for k, _ in hits]), hits) is None
+
+    updates = {u["detectedKeywords"][0]: u for u in coalescer.flush()}
+    assert set(updates) == {"promoção", "sorteio"}
+    assert all(len(u["detectedKeywords"]) == 1 for u in updates.values())
+    assert updates["promoção"]["occurrences"] == 3
+    assert updates["sorteio"]["occurrences"] == 5
+    assert {u["eventKey"] for u in updates.values()} == {event["eventKey"]}
+    assert "audioSnippet" not in updates["sorteio"]
+
+
+def test_overlapping_captures_count_once():
+    coalescer = DetectionCoalescer(None, cooldown_s=600)
+    coalescer.admit(_payload(["promoção"]), [("promoção", T0)])
+    coalescer.admit(_payload(["promoção"]), [("promoção", T0 + 0.5)])
+    assert coalescer.flush() == []
+
+
+def test_window_reopens_after_cooldown():
+    coalescer = DetectionCoalescer(None, cooldown_s=600)
+    first = coalescer.admit(_payload(["promoção"]), [("promoção", T0)])
+    coalescer.admit(_payload(["promoção"]), [("promoção", T0 + 300)])
+    second = coalescer.admit(_payload(["promoção"]), [("promoção", T0 + 1000)])
+    assert second is not None and second["eventKey"] != first["eventKey"]
+    assert [u["occurrences"] for u in coalescer.due(T0 + 1000)] == [2]
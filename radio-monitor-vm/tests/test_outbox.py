@@ -0,0 +1,47 @@
+from outbox import Outbox
+
+
+class _Response:
+    def __init__(self, body):
+        self._body = body
+
+    def json(self):
+        if isinstance(self._body, Exception):
+            raise self._body
+        return self._body
+
+
+def _outbox(db_path):
+    outbox = Outbox(db_path, "http://saas.test", "secret")
+    outbox.put("event", {"stationId": "st-1"})
+    outbox.put("song", {"stationId": "st-1", "songKey": "a"})
+    outbox.put("song", {"stationId": "st-1", "songKey": "b"})
+    return outbox
+
+
+def _dead(outbox):
+    return outbox._db.execute("SELECT COUNT(*) FROM outbox WHERE dead = 1").fetchone()[0]
+
+
+def test_batch_report_marks_rejected_dead_and_keeps_failed(tmp_path):
+    outbox = _outbox(tmp_path / "outbox.db")
+    rows = outbox._next_batch()
+
+    outbox._apply_batch_report(rows, _Response({
+        "success": True,
+        "events": {"rejected": [], "failed": [0]},
+        "songs": {"rejected": [1], "failed": []},
+    }))
+
+    assert outbox.pending() == 1
+    assert _dead(outbox) == 1
+
+
+def test_batch_report_that_is_not_an_object_confirms_the_batch(tmp_path):
+    bodies = ([], None, "ok", ValueError("not json"), {"events": [0], "songs": None})
+    for i, body in enumerate(bodies):
+        outbox = _outbox(tmp_path / f"outbox-{i}.db")
+        outbox._apply_batch_report(outbox._next_batch(), _Response(body))
+
+        assert outbox.pending() == 0
+        assert _dead(outbox) == 0
@@ -0,0 +1,46 @@
+import numpy as np
+
+from song_cache import SIMILARITY_MIN, fingerprint, similarity
+
+SR = 8000
+TIMBRE = [1, .5, .3, .2]
+# Progressões de acordes (semitons acima de A4), uma por "música"
+SONG_A = [[0, 4, 7], [5, 9, 12], [7, 11, 14], [0, 4, 7]]
+SONG_B = [[1, 5, 8], [6, 10, 13], [3, 6, 10], [8, 12, 15]]
+SONG_C = [[2, 5, 9], [7, 10, 14], [0, 3, 7], [5, 8, 12]]
+
+
+def _track(chords, seed, start=0, noise=0.05, dur=10, chord_s=0.5):
+    """PCM 16-bit sintético: acordes com o mesmo timbre e ruído de fundo."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(chord_s * SR)) / SR
+    parts = []
+    for i in range(int(dur / chord_s)):
+        chord = chords[(start + i) % len(chords)]
+        parts.append(sum(
+            a * np.sin(2 * np.pi * 440 * 2 ** (k / 12) * (h + 1) * t)
+            for k in chord for h, a in enumerate(TIMBRE)
+        ))
+    x = np.concatenate(parts)
+    x = x / np.abs(x).max() * 0.5 + noise * rng.standard_normal(len(x))
+    return (np.clip(x, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def _sim(a, b):
+    return similarity(fingerprint(a, SR), fingerprint(b, SR))
+
+
+def test_same_song_stays_above_threshold():
+    ref = _track(SONG_A, seed=1)
+    assert _sim(ref, _track(SONG_A, seed=2, start=2)) >= SIMILARITY_MIN
+    assert _sim(ref, _track(SONG_A, seed=3, noise=0.15)) >= SIMILARITY_MIN
+
+
+def test_different_songs_fall_below_threshold():
+    # Mesmo timbre e mesmo perfil de energia: só o croma separa as músicas
+    for x, y in ((SONG_A, SONG_B), (SONG_A, SONG_C), (SONG_B, SONG_C)):
+        assert _sim(_track(x, seed=1), _track(y, seed=2)) < SIMILARITY_MIN
+
+
+def test_silence_has_no_fingerprint():
+    assert fingerprint(bytes(SR * 2 * 4), SR) is None
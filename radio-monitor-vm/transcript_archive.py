@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+LHFEX Radio Monitor — Arquivo local de transcrições (SQLite FTS5)
+=================================================================
+
+Toda transcrição finalizada (não só as que casaram keyword) é guardada
+com os tempos por palavra, para responder "essa keyword nova foi falada
+semana passada?" em milissegundos, sem decodificar áudio de novo.
+
+Armazenamento (pasta "archive_dir", padrão archive/ ao lado do script):
+  - um arquivo SQLite por dia (Brasília): AAAA-MM-DD.db — a retenção apaga
+    o arquivo inteiro, sem DELETE/VACUUM;
+  - tabela `segments`: estação, início/fim (epoch) e as palavras com tempo
+    e confiança num JSON compacto comprimido com zlib (~5x menor);
+  - índice FTS5 sem conteúdo (contentless) sobre o texto, com tokenizer
+    unicode61 sem acentos ("promocao" acha "promoção") — o texto em si não
+    é guardado duas vezes, sai das palavras comprimidas;
+  - índice (station_id, started_at) para filtrar por estação.
+
+Configuração (config.json):
+  "transcript_archive": true          # padrão: ligado
+  "archive_dir": "/var/lib/radio/archive"
+  "archive_retention_days": 30
+  "archive_api_port": 9412            # API local de busca (padrão: desligada)
+
+Busca (CLI e API local):
+  python3 transcript_archive.py search "loja central" --station <id> --since 2026-10-01
+  python3 transcript_archive.py stats
+  python3 transcript_archive.py serve --port 9412
+  curl 'http://127.0.0.1:9412/search?q=loja+central&since=2026-10-01&limit=20'
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from keywords import KeywordMatcher, tokenize
+
+log = logging.getLogger("radio-monitor")
+
+BRASILIA_TZ = timezone(timedelta(hours=-3))
+
+ARCHIVE_DIR = Path(__file__).parent / "archive"
+RETENTION_DAYS = 30
+SEARCH_LIMIT = 100
+CONTEXT_WORDS = 12            # Palavras de contexto em volta da ocorrência
+API_HOST = "127.0.0.1"
+DAY_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.db$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    station_id TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL,
+    words BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_station ON segments (station_id, started_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, content='', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+
+def _day_of(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=BRASILIA_TZ).date().isoformat()
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=BRASILIA_TZ).isoformat(timespec="seconds")
+
+
+def pack_words(words: list[dict], started_at: float) -> bytes:
+    """Palavras → JSON colunar (tempos em centésimos relativos ao início, conf em %) + zlib."""
+    packed = {
+        "w": [w["word"] for w in words],
+        "s": [round((w["start"] - started_at) * 100) for w in words],
+        "e": [round((w["end"] - started_at) * 100) for w in words],
+        "c": [round(w.get("conf", 1.0) * 100) for w in words],
+    }
+    return zlib.compress(json.dumps(packed, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_words(blob: bytes, started_at: float) -> list[dict]:
+    packed = json.loads(zlib.decompress(blob))
+    return [
+        {"word": w, "start": started_at + s / 100, "end": started_at + e / 100, "conf": c / 100}
+        for w, s, e, c in zip(packed["w"], packed["s"], packed["e"], packed["c"])
+    ]
+
+
+def fts_query(text: str) -> str:
+    """Keyword → frase FTS5 (tokens normalizados, sem operadores do usuário)."""
+    tokens = tokenize(text)
+    return '"' + " ".join(tokens) + '"' if tokens else ""
+
+
+def parse_day(value: str | None) -> date | None:
+    return date.fromisoformat(value) if value else None
+
+
+class TranscriptArchive:
+    """Escrita (monitor.py) e leitura (CLI/API) do arquivo de transcrições."""
+
+    def __init__(self, root: Path = ARCHIVE_DIR, retention_days: int = RETENTION_DAYS):
+        self.root = Path(root)
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._writers: dict[str, sqlite3.Connection] = {}
+        self._pruned_on: str | None = None
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ── Escrita ───────────────────────────────────────────────────────────
+
+    def _writer(self, day: str) -> sqlite3.Connection:
+        conn = self._writers.get(day)
+        if conn is None:
+            conn = sqlite3.connect(self.root / f"{day}.db", check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            # Poucos dias abertos ao mesmo tempo (virada de dia, replay): fecha os mais antigos
+            for old in sorted(self._writers)[:-1]:
+                self._writers.pop(old).close()
+            self._writers[day] = conn
+        return conn
+
+    def add(self, station_id: str, text: str, words: list[dict], started_at: float, ended_at: float):
+        """Guarda um segmento finalizado. Sem tempos por palavra, o texto vira palavras sem tempo."""
+        if not text:
+            return
+        if not words:
+            words = [{"word": w, "start": started_at, "end": started_at} for w in text.split()]
+        day = _day_of(started_at)
+        blob = pack_words(words, started_at)
+        with self._lock:
+            if self._pruned_on != _day_of(time.time()):
+                self.prune()
+            if day < self._cutoff():
+                return  # replay de áudio mais antigo que a retenção
+            conn = self._writer(day)
+            cur = conn.execute(
+                "INSERT INTO segments (station_id, started_at, ended_at, words) VALUES (?, ?, ?, ?)",
+                (station_id, started_at, ended_at, blob),
+            )
+            conn.execute("INSERT INTO segments_fts (rowid, text) VALUES (?, ?)", (cur.lastrowid, text))
+            conn.commit()
+
+    def prune(self) -> int:
+        """Apaga os arquivos de dias fora da retenção. Retorna quantos foram removidos."""
+        self._pruned_on = _day_of(time.time())
+        cutoff = self._cutoff()
+        removed = 0
+        for day, path in self.day_files():
+            if day < cutoff:
+                conn = self._writers.pop(day, None)
+                if conn is not None:
+                    conn.close()
+                for suffix in ("", "-wal", "-shm"):
+                    Path(f"{path}{suffix}").unlink(missing_ok=True)
+                removed += 1
+        if removed:
+            log.info(f"Arquivo de transcrições: {removed} dia(s) fora da retenção ({self.retention_days}d) removido(s)")
+        return removed
+
+    def _cutoff(self) -> str:
+        today = datetime.now(tz=BRASILIA_TZ).date()
+        return (today - timedelta(days=self.retention_days)).isoformat()
+
+    def close(self):
+        with self._lock:
+            for conn in self._writers.values():
+                conn.close()
+            self._writers.clear()
+
+    # ── Leitura ───────────────────────────────────────────────────────────
+
+    def day_files(self, since: date | None = None, until: date | None = None) -> list[tuple[str, Path]]:
+        """(dia, arquivo) dentro do intervalo, do mais recente para o mais antigo."""
+        days = []
+        for path in self.root.glob("*.db"):
+            m = DAY_FILE_RE.match(path.name)
+            if m is None:
+                continue
+            day = m.group(1)
+            if (since and day < since.isoformat()) or (until and day > until.isoformat()):
+                continue
+            days.append((day, path))
+        return sorted(days, reverse=True)
+
+    def search(
+        self,
+        keyword: str,
+        station_id: str | None = None,
+        since: date | None = None,
+        until: date | None = None,
+        limit: int = SEARCH_LIMIT,
+    ) -> list[dict]:
+        """
+        Ocorrências da keyword (palavras inteiras, sem acento/caixa), mais
+        recentes primeiro, com o horário exato em que foi dita.
+        """
+        query = fts_query(keyword)
+        if not query:
+            return []
+        matcher = KeywordMatcher([{"keyword": keyword}])
+        sql = (
+            "SELECT s.station_id, s.started_at, s.words FROM segments_fts f "
+            "JOIN segments s ON s.id = f.rowid WHERE segments_fts MATCH ?"
+        )
+        params: list = [query]
+        if station_id:
+            sql += " AND s.station_id = ?"
+            params.append(station_id)
+        sql += " ORDER BY s.started_at DESC LIMIT ?"
+
+        results = []
+        for _, path in self.day_files(since, until):
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                rows = conn.execute(sql, params + [limit - len(results)]).fetchall()
+            except sqlite3.DatabaseError as e:
+                log.warning(f"Arquivo de transcrições: {path.name} ilegível: {e}")
+                rows = []
+            finally:
+                conn.close()
+            for sid, started_at, blob in rows:
+                results += self._occurrences(matcher, sid, started_at, blob)
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    @staticmethod
+    def _occurrences(matcher: KeywordMatcher, station_id: str, started_at: float, blob: bytes) -> list[dict]:
+        words = unpack_words(blob, started_at)
+        tokens, token_word = [], []
+        for i, w in enumerate(words):
+            for token in tokenize(w["word"]):
+                tokens.append(token)
+                token_word.append(i)
+        found = []
+        for _, start, end in matcher.find(tokens):
+            first, last = token_word[start], token_word[end - 1]
+            lo = max(0, first - CONTEXT_WORDS)
+            confs = [w["conf"] for w in words[first:last + 1]]
+            found.append({
+                "stationId": station_id,
+                "saidAt": _iso(words[first]["start"]),
+                "endedAt": _iso(words[last]["end"]),
+                "confidence": round(100 * sum(confs) / len(confs), 1),
+                "text": " ".join(w["word"] for w in words[lo:last + CONTEXT_WORDS + 1]),
+            })
+        return found
+
+    def stats(self) -> list[dict]:
+        report = []
+        for day, path in self.day_files():
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                rows = conn.execute(
+                    "SELECT station_id, COUNT(*), SUM(ended_at - started_at) FROM segments GROUP BY station_id"
+                ).fetchall()
+            finally:
+                conn.close()
+            report.append({
+                "day": day,
+                "bytes": path.stat().st_size,
+                "stations": {sid: {"segments": n, "audio_s": round(secs or 0)} for sid, n, secs in rows},
+            })
+        return report
+
+
+# ── API local ──────────────────────────────────────────────────────────────
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        archive: TranscriptArchive = self.server.archive  # type: ignore[attr-defined]
+        try:
+            if url.path == "/search" and params.get("q"):
+                t0 = time.perf_counter()
+                results = archive.search(
+                    params["q"],
+                    station_id=params.get("station"),
+                    since=parse_day(params.get("since")),
+                    until=parse_day(params.get("until")),
+                    limit=min(int(params.get("limit", SEARCH_LIMIT)), 1000),
+                )
+                body = {"query": params["q"], "tookMs": round((time.perf_counter() - t0) * 1000, 1), "results": results}
+            elif url.path == "/stats":
+                body = {"days": archive.stats()}
+            else:
+                self._reply(404, {"error": "use /search?q=...&station=&since=AAAA-MM-DD&until=&limit= ou /stats"})
+                return
+        except ValueError as e:
+            self._reply(400, {"error": str(e)})
+            return
+        self._reply(200, body)
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_archive_api(
+    archive: TranscriptArchive, port: int, host: str = API_HOST, logger: logging.Logger = log
+) -> ThreadingHTTPServer | None:
+    """Sobe a API de busca numa thread daemon. None se a porta não abrir."""
+    try:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError as e:
+        logger.warning(f"Não foi possível abrir a API do arquivo de transcrições em {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    server.archive = archive  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, name="archive-api", daemon=True).start()
+    logger.info(f"Busca no arquivo de transcrições em http://{host}:{port}/search?q=...")
+    return server
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────
+
+def _config_archive() -> TranscriptArchive:
+    """Arquivo configurado no config.json do monitor (mesma pasta e retenção)."""
+    config_file = Path(os.environ.get("RADIO_MONITOR_CONFIG") or Path(__file__).parent / "config.json")
+    config = json.loads(config_file.read_text(encoding="utf-8")) if config_file.exists() else {}
+    return TranscriptArchive(
+        Path(config.get("archive_dir") or ARCHIVE_DIR),
+        int(config.get("archive_retention_days", RETENTION_DAYS)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", type=Path, help="pasta do arquivo (padrão: a do config.json)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    search = sub.add_parser("search", help="busca uma keyword")
+    search.add_argument("keyword")
+    search.add_argument("--station")
+    search.add_argument("--since", help="AAAA-MM-DD")
+    search.add_argument("--until", help="AAAA-MM-DD")
+    search.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    search.add_argument("--json", action="store_true")
+    sub.add_parser("stats", help="segmentos e tamanho por dia")
+    sub.add_parser("prune", help="aplica a retenção agora")
+    serve = sub.add_parser("serve", help="API local de busca")
+    serve.add_argument("--port", type=int, default=9412)
+    serve.add_argument("--host", default=API_HOST)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    archive = TranscriptArchive(args.dir) if args.dir else _config_archive()
+
+    if args.command == "search":
+        t0 = time.perf_counter()
+        results = archive.search(
+            args.keyword, args.station, parse_day(args.since), parse_day(args.until), args.limit
+        )
+        took_ms = (time.perf_counter() - t0) * 1000
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+            return
+        for r in results:
+            print(f"{r['saidAt']}  {r['stationId']}  ({r['confidence']}%)  …{r['text']}…")
+        print(f"{len(results)} ocorrência(s) em {took_ms:.0f} ms")
+    elif args.command == "stats":
+        for d in archive.stats():
+            segments = sum(s["segments"] for s in d["stations"].values())
+            hours = sum(s["audio_s"] for s in d["stations"].values()) / 3600
+            print(f"{d['day']}  {len(d['stations']):>3} estação(ões)  {segments:>7} segmento(s)  "
+                  f"{hours:>6.1f}h  {d['bytes'] / 2**20:>7.1f} MB")
+    elif args.command == "prune":
+        print(f"{archive.prune()} dia(s) removido(s)")
+    elif args.command == "serve":
+        server = start_archive_api(archive, args.port, args.host)
+        if server is None:
+            raise SystemExit(1)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()